@@ -0,0 +1,183 @@
+"""
+Local stand-ins for Gemini, AssemblyAI and gTTS with configurable latency and
+error rates, so the API can be load tested without the external services.
+Each fake records how long its calls took under benchmarks.fakes.backend_timings.
+"""
+import asyncio
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+backend_timings = defaultdict(list)
+_timings_lock = threading.Lock()
+
+def _record(stage, started):
+    with _timings_lock:
+        backend_timings[stage].append((time.perf_counter() - started) * 1000)
+
+class Latency:
+    """A latency distribution (normal, clipped at zero) plus an error rate."""
+
+    def __init__(self, mean_ms, stdev_ms=0.0, error_rate=0.0):
+        self.mean_ms = mean_ms
+        self.stdev_ms = stdev_ms
+        self.error_rate = error_rate
+
+    def sample(self):
+        return max(0.0, random.gauss(self.mean_ms, self.stdev_ms)) / 1000
+
+    def fails(self):
+        return random.random() < self.error_rate
+
+    def describe(self):
+        return {"mean_ms": self.mean_ms, "stdev_ms": self.stdev_ms, "error_rate": self.error_rate}
+
+class FakeRateLimited(Exception):
+    # Carries the HTTP status like google.api_core's ResourceExhausted, so the
+    # LLM scheduler backs off and retries it
+    code = 429
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+HR_QUESTIONS = [
+    "Why do you want to work here?",
+    "Describe a conflict with a teammate and how you resolved it?",
+    "Tell me about a time you missed a deadline?",
+    "Where do you see yourself in five years?",
+    "What is your biggest professional achievement?",
+    "How do you handle critical feedback?",
+    "Describe a time you led a team through a change?",
+    "What motivates you at work?",
+]
+
+class FakeGeminiModel:
+    """
+    Drop-in for genai.GenerativeModel: generate_content() blocks for a sampled
+    latency like the real client. Replies are numbered so TTS caching does not
+    hide synthesis cost.
+    """
+
+    def __init__(self, latency, stream_chunks=6):
+        self.latency = latency
+        self.stream_chunks = stream_chunks
+        self._counter = itertools.count(1)
+
+    def _reply(self, prompt):
+        if "distinct common HR interview questions" in prompt:
+            return "\n".join(HR_QUESTIONS)
+        if "You are grading one answer" in prompt:
+            scores = {c: random.randint(3, 9) for c in ("confidence", "tone", "sentiment", "accuracy", "empathy", "articulation", "star")}
+            return json.dumps({**scores, "strength": "Concrete example", "improve": "State the result"})
+        if "You are writing the final feedback" in prompt:
+            texts = {
+                "confidence": "Steady throughout.", "tone": "Professional.", "sentiment": "Positive.",
+                "accuracy": "Mostly correct.", "empathy": "Considers the team.", "star": "Results were often missing.",
+                "articulation": "Clear.", "summary": "A solid interview.",
+            }
+            # Answer the fields the prompt asks for, one line each
+            fields = re.findall(r"^(\w+): <", prompt, re.M)
+            return "\n".join(f"{field}: {texts.get(field, 'Quantify results')}" for field in fields)
+        n = next(self._counter)
+        return f"Thanks for that answer. Can you walk me through question number {n} in more detail?"
+
+    def generate_content(self, prompt, stream=False):
+        started = time.perf_counter()
+        delay = self.latency.sample()
+        if not stream:
+            time.sleep(delay)
+            _record("llm", started)
+            if self.latency.fails():
+                raise FakeRateLimited("Fake Gemini quota exceeded")
+            return _Response(self._reply(prompt))
+        return self._stream(prompt, delay, started)
+
+    def _stream(self, prompt, delay, started):
+        words = self._reply(prompt).split(" ")
+        size = max(1, len(words) // self.stream_chunks)
+        for i in range(0, len(words), size):
+            time.sleep(delay / self.stream_chunks)
+            yield _Response(" ".join(words[i:i + size]) + " ")
+        _record("llm", started)
+        if self.latency.fails():
+            raise RuntimeError("Fake Gemini stream error")
+
+def fake_synthesize(latency):
+    """A replacement for tts_service._synthesize returning a fake MP3 payload."""
+    def synthesize(text, voice, lang):
+        started = time.perf_counter()
+        time.sleep(latency.sample())
+        _record("tts", started)
+        if latency.fails():
+            raise RuntimeError("Fake TTS error")
+        # Roughly the size of a 32 kbit/s MP3 of this much speech
+        return b"ID3" + b"\0" * (len(text) * 250)
+    return synthesize
+
+def fake_assemblyai_app(upload_latency, transcribe_latency):
+    """
+    AssemblyAI's /v2/upload and /v2/transcript endpoints. Transcripts report
+    "processing" until their sampled transcription time has passed.
+    """
+    app = FastAPI()
+    transcripts = {}
+    ids = itertools.count(1)
+
+    @app.post("/v2/upload")
+    async def upload(request: Request):
+        started = time.perf_counter()
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+        await asyncio.sleep(upload_latency.sample())
+        _record("stt_upload", started)
+        if upload_latency.fails():
+            return JSONResponse({"error": "fake upload failure"}, status_code=500)
+        return {"upload_url": f"fake://upload/{size}"}
+
+    @app.post("/v2/transcript")
+    async def request_transcript(request: Request):
+        transcript_id = f"t{next(ids)}"
+        transcripts[transcript_id] = {
+            "requested": time.perf_counter(),
+            "ready_at": time.perf_counter() + transcribe_latency.sample(),
+            "failed": transcribe_latency.fails(),
+        }
+        return {"id": transcript_id}
+
+    @app.get("/v2/transcript/{transcript_id}")
+    async def get_transcript(transcript_id: str):
+        job = transcripts.get(transcript_id)
+        if job is None:
+            return JSONResponse({"error": "not found"}, status_code=404)
+        if time.perf_counter() < job["ready_at"]:
+            return {"id": transcript_id, "status": "processing"}
+        if "recorded" not in job:
+            job["recorded"] = True
+            _record("stt_transcribe", job["requested"])
+        if job["failed"]:
+            return {"id": transcript_id, "status": "error", "error": "fake transcription failure"}
+        words = [
+            {"text": w, "start": i * 400, "end": i * 400 + 300, "confidence": round(random.uniform(0.7, 0.99), 3)}
+            for i, w in enumerate("I built a data pipeline with Kafka and Python um for real time analytics".split())
+        ]
+        return {
+            "id": transcript_id,
+            "status": "completed",
+            "text": " ".join(w["text"] for w in words),
+            "confidence": 0.9,
+            "audio_duration": len(words) * 0.4,
+            "words": words,
+            "sentiment_analysis_results": [
+                {"text": "", "start": 0, "end": len(words) * 400, "sentiment": random.choice(["POSITIVE", "NEUTRAL"]), "confidence": 0.8},
+            ],
+        }
+
+    return app
@@ -0,0 +1,244 @@
+"""
+End-to-end load benchmark for the interview API with Gemini, AssemblyAI and
+gTTS replaced by local fakes (see benchmarks/fakes.py).
+
+Run from fastAPI_backend/:
+
+    python -m benchmarks.run_benchmark --scenario mixed --interviews 40 --concurrency 8
+    python -m benchmarks.run_benchmark --compare benchmarks/results/baseline.json
+
+The API runs in-process under uvicorn in a scratch working directory. The
+results JSON holds per-stage latency percentiles (client-side per endpoint,
+and per fake backend), throughput and the server's event-loop lag. With
+--compare, p95 latencies and throughput are checked against an earlier run
+and the exit code is 1 if any got worse by more than --max-regression percent.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = BACKEND_DIR / "benchmarks" / "results"
+LOOP_LAG_INTERVAL = 0.02
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _serve(app, port):
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f"Server on port {port} failed to start")
+        time.sleep(0.05)
+    return server, thread
+
+def _summary(samples):
+    if not samples:
+        return {"count": 0}
+    values = np.asarray(samples)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": int(values.size),
+        "mean_ms": round(float(values.mean()), 1),
+        "p50_ms": round(float(p50), 1),
+        "p95_ms": round(float(p95), 1),
+        "p99_ms": round(float(p99), 1),
+        "max_ms": round(float(values.max()), 1),
+    }
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def _install_fakes(args):
+    from benchmarks import fakes
+    fake_stt, _ = _serve(
+        fakes.fake_assemblyai_app(
+            fakes.Latency(args.stt_upload_ms, args.stt_upload_ms / 4, args.stt_error_rate),
+            fakes.Latency(args.stt_ms, args.stt_ms / 4, args.stt_error_rate),
+        ),
+        _free_port(),
+    )
+    os.environ["ASSEMBLYAI_BASE_URL"] = f"http://127.0.0.1:{fake_stt.config.port}"
+    os.environ.setdefault("ASSEMBLYAI_API_KEY", "benchmark")
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ["LLM_REQUESTS_PER_MINUTE"] = str(args.llm_rpm)
+    import main
+    from services import tts_service
+    from services.registry import services
+    services.override("gemini", fakes.FakeGeminiModel(fakes.Latency(args.llm_ms, args.llm_ms / 4, args.llm_error_rate)))
+    tts_service._synthesize = fakes.fake_synthesize(fakes.Latency(args.tts_ms, args.tts_ms / 4, args.tts_error_rate))
+    return main.app, fake_stt
+
+def _watch_loop_lag(app, lag_ms, stop):
+    # Measures how late the server's event loop wakes up from a short sleep;
+    # anything blocking the loop shows up here
+    async def probe():
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            lag_ms.append(max(0.0, (time.perf_counter() - started - LOOP_LAG_INTERVAL) * 1000))
+
+    async def start_probe():
+        app.state.loop_lag_probe = asyncio.get_running_loop().create_task(probe())
+
+    app.router.on_startup.append(start_probe)
+
+async def _drive(base_url, args, recorder):
+    import httpx
+    from benchmarks.scenarios import SCENARIOS, make_resume_pdf, make_answer_audio
+    scenarios = SCENARIOS[args.scenario]
+    resume_pdf = make_resume_pdf(args.resume_pages)
+    audio = make_answer_audio()
+    queue = asyncio.Queue()
+    for index in range(args.interviews):
+        queue.put_nowait(index)
+
+    async def worker(client):
+        while not queue.empty():
+            index = queue.get_nowait()
+            scenario = scenarios[index % len(scenarios)]
+            started = time.perf_counter()
+            await scenario(client, recorder, index, args.turns, resume_pdf, audio)
+            recorder.timings[f"interview:{scenario.__name__}"].append((time.perf_counter() - started) * 1000)
+
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        await asyncio.gather(*(worker(client) for _ in range(args.concurrency)))
+
+def run(args):
+    from benchmarks.fakes import backend_timings
+    from benchmarks.scenarios import Recorder
+    app, fake_stt = _install_fakes(args)
+    lag_ms = []
+    stop = threading.Event()
+    _watch_loop_lag(app, lag_ms, stop)
+    api, api_thread = _serve(app, _free_port())
+    recorder = Recorder()
+    started = time.perf_counter()
+    try:
+        asyncio.run(_drive(f"http://127.0.0.1:{api.config.port}", args, recorder))
+    finally:
+        elapsed = time.perf_counter() - started
+        stop.set()
+        api.should_exit = True
+        api_thread.join(30)
+        fake_stt.should_exit = True
+
+    stages = {
+        stage: {**_summary(samples), "errors": recorder.errors.get(stage, 0)}
+        for stage, samples in sorted(recorder.timings.items())
+    }
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        },
+        "elapsed_s": round(elapsed, 2),
+        "throughput": {
+            "requests_per_s": round(recorder.requests / elapsed, 2),
+            "interviews_per_s": round(args.interviews / elapsed, 3),
+            "requests": recorder.requests,
+            "errors": sum(recorder.errors.values()),
+        },
+        "stages": stages,
+        "backends": {stage: _summary(samples) for stage, samples in sorted(backend_timings.items())},
+        "event_loop_lag": _summary(lag_ms),
+    }
+
+def compare(results, baseline, max_regression):
+    """Print p95 and throughput changes against `baseline`; return the regressions."""
+    regressions = []
+    print(f"\nCompared with {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')}):")
+    for section in ("stages", "backends"):
+        for stage, current in results[section].items():
+            before = baseline.get(section, {}).get(stage)
+            if not before or not before.get("p95_ms") or "p95_ms" not in current:
+                continue
+            change = (current["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+            flag = "  REGRESSION" if change > max_regression else ""
+            print(f"  {stage:32} p95 {before['p95_ms']:>9.1f} -> {current['p95_ms']:>9.1f} ms ({change:+.1f}%){flag}")
+            if flag:
+                regressions.append(stage)
+    before = baseline["throughput"]["requests_per_s"]
+    change = (results["throughput"]["requests_per_s"] - before) / before * 100 if before else 0.0
+    flag = "  REGRESSION" if change < -max_regression else ""
+    print(f"  {'throughput':32} {before:>9.2f} -> {results['throughput']['requests_per_s']:>9.2f} req/s ({change:+.1f}%){flag}")
+    if flag:
+        regressions.append("throughput")
+    return regressions
+
+def print_report(results):
+    print(f"\n{results['throughput']['requests']} requests in {results['elapsed_s']} s: "
+          f"{results['throughput']['requests_per_s']} req/s, {results['throughput']['errors']} errors")
+    header = f"  {'stage':32} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7}"
+    for title, rows in (("Endpoints", results["stages"]), ("Fake backends", results["backends"])):
+        print(f"\n{title} (ms)\n{header}")
+        for stage, s in rows.items():
+            print(f"  {stage:32} {s['count']:>6} {s.get('p50_ms', 0):>9.1f} {s.get('p95_ms', 0):>9.1f} "
+                  f"{s.get('p99_ms', 0):>9.1f} {s.get('errors', 0):>7}")
+    lag = results["event_loop_lag"]
+    if lag["count"]:
+        print(f"\nEvent loop lag (ms): p50 {lag['p50_ms']}, p95 {lag['p95_ms']}, p99 {lag['p99_ms']}, max {lag['max_ms']}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=["technical", "hr", "mixed"], default="mixed")
+    parser.add_argument("--interviews", type=int, default=20, help="interviews to run in total")
+    parser.add_argument("--concurrency", type=int, default=4, help="interviews in flight at once")
+    parser.add_argument("--turns", type=int, default=4, help="answers per interview")
+    parser.add_argument("--resume-pages", type=int, default=2)
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request client timeout (s)")
+    parser.add_argument("--llm-ms", type=float, default=800.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="share of LLM calls failing with a 429")
+    parser.add_argument("--llm-rpm", type=float, default=100000.0, help="LLM scheduler request budget per minute")
+    parser.add_argument("--tts-ms", type=float, default=300.0)
+    parser.add_argument("--tts-error-rate", type=float, default=0.0)
+    parser.add_argument("--stt-upload-ms", type=float, default=150.0)
+    parser.add_argument("--stt-ms", type=float, default=1200.0, help="time until a transcript completes")
+    parser.add_argument("--stt-error-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<scenario>-<time>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="allowed p95/throughput change (%%)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    output = Path(args.output).resolve() if args.output else (
+        RESULTS_DIR / f"{args.scenario}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    sys.path.insert(0, str(BACKEND_DIR))
+    # Sessions, caches and transcripts go to a scratch directory, not the checkout
+    os.chdir(tempfile.mkdtemp(prefix="interview-bench-"))
+    results = run(args)
+    print_report(results)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"\nResults saved to {output}")
+    if baseline and compare(results, baseline, args.max_regression):
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Interview scenarios driven against a running API with an httpx.AsyncClient.
+Every request is timed under a stage name by a Recorder.
+"""
+import io
+import os
+import shutil
+import time
+import wave
+from collections import defaultdict
+import numpy as np
+
+COMPANY = "Acme Corp"
+ROLE = "Backend Engineer"
+RESUME_LINES = [
+    "Jane Doe - jane@example.com",
+    "SUMMARY",
+    "Backend engineer focused on data pipelines and distributed systems.",
+    "EDUCATION",
+    "B.Tech Computer Science, 2022",
+    "PROJECTS",
+    "Real time analytics pipeline with Kafka, Python and PostgreSQL.",
+    "Chat application with React, Node.js and WebSockets.",
+    "TECHNICAL SKILLS",
+    "Python, Go, Kafka, Docker, Kubernetes, PostgreSQL, Redis",
+    "EXPERIENCE",
+    "Software intern at Initech: built ingestion services and Kubernetes operators.",
+]
+
+class Recorder:
+    def __init__(self):
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.requests = 0
+
+    async def timed(self, stage, request):
+        started = time.perf_counter()
+        self.requests += 1
+        try:
+            response = await request
+        except Exception as e:
+            self.errors[stage] += 1
+            print(f"{stage} failed: {e!r}")
+            return None
+        finally:
+            self.timings[stage].append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            self.errors[stage] += 1
+            return None
+        return response
+
+def make_resume_pdf(pages=2):
+    """A small text-only PDF, built by hand so no PDF writer is needed."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(pages))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>")
+    font_ref = 3 + 2 * pages
+    for _ in range(pages):
+        lines = " ".join(f"({line}) Tj 0 -14 Td" for line in RESUME_LINES)
+        content = f"BT /F1 11 Tf 72 740 Td {lines} ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {len(objects) + 2} 0 R "
+            f"/Resources << /Font << /F1 {font_ref} 0 R >> >> >>"
+        )
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF".encode()
+    return out
+
+def make_answer_audio(size=48 * 1024, seconds=8):
+    """
+    The recording each voice answer uploads, as a multipart file tuple. With
+    ffmpeg installed it is a WAV of tone bursts between silences, so the
+    decode/VAD/encode path runs; without it, WebM bytes that go to speech
+    recognition as-is.
+    """
+    if shutil.which("ffmpeg") is None:
+        return ("answer.webm", b"\x1aE\xdf\xa3" + os.urandom(size), "audio/webm")
+    rate = 16000
+    t = np.arange(seconds * rate) / rate
+    # Two seconds of "speech" then one of silence, with a little background noise
+    voiced = (t % 3) < 2
+    samples = np.where(voiced, 6000 * np.sin(2 * np.pi * 180 * t), 0) + np.random.normal(0, 30, t.size)
+    out = io.BytesIO()
+    with wave.open(out, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.astype("<i2").tobytes())
+    return ("answer.wav", out.getvalue(), "audio/wav")
+
+async def technical_interview(client, recorder, index, turns, resume_pdf, audio):
+    headers = {"X-Session-Id": f"bench-tech-{index}"}
+    await recorder.timed("set_difficulty", client.post("/set_difficulty", json={"difficulty": "Intermediate"}, headers=headers))
+    await recorder.timed("set_position", client.post("/set_position", json={"position": ROLE}, headers=headers))
+    await recorder.timed(
+        "analyze_resume",
+        client.post("/analyze_resume", files={"file": ("resume.pdf", resume_pdf, "application/pdf")}, headers=headers),
+    )
+    for turn in range(turns):
+        if turn % 2 == 0:
+            await recorder.timed(
+                "talk",
+                client.post("/talk?audio=url", files={"file": audio}, headers=headers),
+            )
+        else:
+            await recorder.timed(
+                "talk_text_full",
+                client.post(
+                    "/talk_text_full?audio=url",
+                    json={"answer": f"In my last project I scaled our Kafka consumers, step {turn}."},
+                    headers=headers,
+                ),
+            )
+    await recorder.timed("feedback", client.get("/feedback", headers=headers))
+
+async def hr_interview(client, recorder, index, turns, resume_pdf, audio):
+    headers = {"X-Session-Id": f"bench-hr-{index}"}
+    await recorder.timed("hr_start", client.post("/hr_interview/start", json={"company": COMPANY, "role": ROLE}, headers=headers))
+    for turn in range(turns):
+        if turn == turns - 1:
+            await recorder.timed(
+                "hr_voice_answer_and_next",
+                client.post("/hr_interview/voice_answer_and_next", files={"file": audio}, headers=headers),
+            )
+        else:
+            await recorder.timed(
+                "hr_answer",
+                client.post(
+                    "/hr_interview/answer",
+                    json={"answer": f"When our release slipped I reorganised the team's priorities, example {turn}."},
+                    headers=headers,
+                ),
+            )
+    await recorder.timed(
+        "hr_feedback",
+        client.post("/hr_interview/feedback", json={"company": COMPANY, "role": ROLE}, headers=headers),
+    )
+
+SCENARIOS = {
+    "technical": [technical_interview],
+    "hr": [hr_interview],
+    "mixed": [technical_interview, hr_interview],
+}
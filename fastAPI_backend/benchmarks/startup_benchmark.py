@@ -0,0 +1,163 @@
+"""
+Cold start benchmark: how long a fresh replica takes to import the app, to
+answer /ready, and to finish warming its backend clients up.
+
+Run from fastAPI_backend/:
+
+    python -m benchmarks.startup_benchmark --runs 5
+    python -m benchmarks.startup_benchmark --max-ready-ms 1000
+
+Every run starts a new interpreter, so nothing is shared between runs but
+the OS file cache. "ready" is measured from launching uvicorn until /ready
+first returns 200, with warm-up on startup disabled; warm-up is then started
+through /ready?warm=true and timed until every service reports back. Without
+network access or API keys the warm-ups fail quickly, which is reported but
+doesn't affect the other numbers. Exits with 1 if --max-ready-ms is given and
+the median time to ready exceeds it.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+import numpy as np
+from benchmarks.run_benchmark import BACKEND_DIR, _free_port
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import main; print((time.perf_counter() - t) * 1000)"
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def _env(workdir):
+    env = dict(os.environ, WARM_ON_STARTUP="0", PYTHONWARNINGS="ignore")
+    # Session state goes to the scratch directory, not the checkout
+    env["STATE_DB_PATH"] = str(Path(workdir) / "state.db")
+    return env
+
+def measure_import(workdir):
+    """(ms to import main, slowest direct imports of main as (module, ms))."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_SNIPPET],
+        cwd=BACKEND_DIR, env=_env(workdir), capture_output=True, text=True, check=True,
+    )
+    direct = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        # main's own imports are the ones nested one level under it
+        if match and len(match.group(3)) == 3:
+            direct.append((match.group(4), int(match.group(2)) / 1000))
+    return float(result.stdout.strip().splitlines()[-1]), direct
+
+def _get_json(url, timeout=1.0):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.status, json.loads(response.read())
+
+def measure_server(workdir, timeout):
+    """ms until /ready answers, ms until warm-up finishes, and the final /ready body."""
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", str(BACKEND_DIR),
+         "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=_env(workdir), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        ready_ms = None
+        while time.perf_counter() - started < timeout:
+            try:
+                status, _ = _get_json(f"{base}/ready")
+                if status == 200:
+                    ready_ms = (time.perf_counter() - started) * 1000
+                    break
+            except OSError:
+                pass
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited with code {server.returncode}")
+            time.sleep(0.005)
+        if ready_ms is None:
+            raise RuntimeError(f"Server not ready after {timeout} s")
+        warm_started = time.perf_counter()
+        _, body = _get_json(f"{base}/ready?warm=true")
+        while any(s["status"] in ("pending", "running") for s in body["warm_up"].values()):
+            if time.perf_counter() - warm_started > timeout:
+                break
+            time.sleep(0.02)
+            _, body = _get_json(f"{base}/ready")
+        return ready_ms, (time.perf_counter() - warm_started) * 1000, body
+    finally:
+        server.terminate()
+        server.wait(10)
+
+def _stats(values):
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 1),
+        "min_ms": round(float(np.min(values)), 1),
+        "max_ms": round(float(np.max(values)), 1),
+    }
+
+def run(args):
+    imports, ready, warm = [], [], []
+    direct, last = {}, None
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory(prefix="interview-startup-") as workdir:
+            import_ms, modules = measure_import(workdir)
+            imports.append(import_ms)
+            for module, ms in modules:
+                direct.setdefault(module, []).append(ms)
+            ready_ms, warm_ms, last = measure_server(workdir, args.timeout)
+            ready.append(ready_ms)
+            warm.append(warm_ms)
+    slowest = sorted(((m, float(np.median(v))) for m, v in direct.items()), key=lambda x: -x[1])[:args.top]
+    return {
+        "runs": args.runs,
+        "import": _stats(imports),
+        "ready": _stats(ready),
+        "warm_up": _stats(warm),
+        "slowest_imports_ms": {module: round(ms, 1) for module, ms in slowest},
+        "services": last["services"],
+        "warm_up_status": last["warm_up"],
+    }
+
+def print_report(results):
+    print(f"\n{results['runs']} cold starts (ms)\n  {'phase':12} {'p50':>9} {'min':>9} {'max':>9}")
+    for phase in ("import", "ready", "warm_up"):
+        s = results[phase]
+        print(f"  {phase:12} {s['p50_ms']:>9.1f} {s['min_ms']:>9.1f} {s['max_ms']:>9.1f}")
+    print("\nSlowest imports of main (ms)")
+    for module, ms in results["slowest_imports_ms"].items():
+        print(f"  {module:40} {ms:>9.1f}")
+    print("\nServices after warm-up")
+    for name, service in results["services"].items():
+        warm = results["warm_up_status"].get(name, {})
+        print(f"  {name:12} init {service['init_ms'] or 0:>8.1f} ms  warm-up {warm.get('ms', 0):>8.1f} ms  {warm.get('status', '-')}")
+    for name, warm in results["warm_up_status"].items():
+        if name not in results["services"]:
+            print(f"  {name:12} {'':16}  warm-up {warm.get('ms', 0):>8.1f} ms  {warm.get('status', '-')}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for ready / warm-up")
+    parser.add_argument("--top", type=int, default=8, help="slowest imports to list")
+    parser.add_argument("--max-ready-ms", type=float, help="fail if the median time to ready is above this")
+    parser.add_argument("--output", help="write the results JSON here")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run(args)
+    print_report(results)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\nResults saved to {args.output}")
+    if args.max_ready_ms is not None and results["ready"]["p50_ms"] > args.max_ready_ms:
+        print(f"\nMedian time to ready {results['ready']['p50_ms']} ms is over {args.max_ready_ms} ms")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Multi-process check of the shared session state: several worker processes
+save turns to the same interview at once, and no turn may be lost.
+
+Run from fastAPI_backend/:
+
+    python -m benchmarks.state_check --processes 4 --turns 50
+    STATE_BACKEND=remote python -m benchmarks.state_check --processes 8
+
+Each process stands in for a uvicorn worker and calls save_messages --turns
+times for one shared session, all starting together. Afterwards the session
+must hold processes x turns user messages, each followed by its own reply,
+with every process's turns in the order it saved them. With the SQLite
+backend the state goes to a scratch database unless STATE_DB_PATH is set.
+Exits with 1 if the check fails.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+def _save_turns(worker, turns, session_id, start):
+    from database.chat_history import save_messages
+    # Imports are done: wait for the others so the saves really overlap
+    start.wait()
+    for turn in range(turns):
+        save_messages(f"answer {worker}:{turn}", f"question after {worker}:{turn}", session_id)
+
+def check(messages, processes, turns):
+    """Problems found in the session's messages; empty if every turn is there and intact."""
+    problems = []
+    history = [m for m in messages if m["role"] != "system"]
+    users = [m for m in history if m["role"] == "user"]
+    if len(users) != processes * turns:
+        problems.append(f"expected {processes * turns} user messages, found {len(users)}")
+    last_turn = {}
+    for user, reply in zip(history[::2], history[1::2]):
+        if user["role"] != "user" or reply["role"] != "assistant":
+            problems.append(f"turn out of order: {user['content']!r} / {reply['content']!r}")
+            continue
+        turn_id = user["content"].removeprefix("answer ")
+        if reply["content"] != f"question after {turn_id}":
+            problems.append(f"answer {turn_id} has reply {reply['content']!r}")
+        worker, turn = (int(part) for part in turn_id.split(":"))
+        if turn <= last_turn.get(worker, -1):
+            problems.append(f"worker {worker}: turn {turn} saved after turn {last_turn[worker]}")
+        last_turn[worker] = turn
+    if len(history) % 2:
+        problems.append(f"unpaired message at the end: {history[-1]['content']!r}")
+    return problems
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=4, help="worker processes saving at once")
+    parser.add_argument("--turns", type=int, default=50, help="turns each process saves")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    scratch = None
+    if os.getenv("STATE_BACKEND", "sqlite") == "sqlite" and not os.getenv("STATE_DB_PATH"):
+        scratch = tempfile.TemporaryDirectory(prefix="state-check-")
+        os.environ["STATE_DB_PATH"] = os.path.join(scratch.name, "state.db")
+    session_id = f"state-check-{uuid.uuid4().hex[:8]}"
+
+    # Fresh interpreters, like separate uvicorn workers: nothing in memory is shared
+    context = multiprocessing.get_context("spawn")
+    start = context.Barrier(args.processes + 1)
+    workers = [
+        context.Process(target=_save_turns, args=(i, args.turns, session_id, start))
+        for i in range(args.processes)
+    ]
+    for worker in workers:
+        worker.start()
+    start.wait()
+    started = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    from database.chat_history import load_messages
+    problems = [f"worker process exited with {w.exitcode}" for w in workers if w.exitcode != 0]
+    problems += check(load_messages(session_id), args.processes, args.turns)
+    saved = args.processes * args.turns
+    print(f"{args.processes} processes x {args.turns} turns in {elapsed:.2f} s ({saved / elapsed:.0f} turns/s)")
+    for problem in problems[:20]:
+        print("  FAIL", problem)
+    if len(problems) > 20:
+        print(f"  ... and {len(problems) - 20} more")
+    print("FAILED" if problems else "OK: every turn was kept")
+    if scratch is not None:
+        scratch.cleanup()
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
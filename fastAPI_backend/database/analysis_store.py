@@ -0,0 +1,109 @@
+import json
+import numpy as np
+from database.state_backend import state
+from database.write_behind import write_behind
+from services.speech_metrics import answer_features, timeline
+from utils.session import DEFAULT_SESSION_ID
+
+# Per-session vocal analysis, keeping only what feedback uses. Each session
+# has append-only logs in the shared state backend:
+#   answers      one JSON item per answer: transcript text, overall confidence, audio duration
+#                and speech features computed once here at ingest
+#   words        one item per answer of fixed-size word timing records (WORD_DTYPE)
+#   sentiments   one item per answer of fixed-size sentiment segment records (SENTIMENT_DTYPE)
+#   evaluations  per-answer LLM scores and notes, keyed by question/answer (services/answer_evaluator.py)
+# The record items concatenate straight into NumPy arrays with np.frombuffer.
+# Writes go through the write-behind queue (group analysis:<session>); readers
+# flush the session's writes first.
+WORD_DTYPE = np.dtype([
+    ("answer", "<i4"), ("start", "<i4"), ("end", "<i4"), ("confidence", "<f4"),
+])
+SENTIMENT_DTYPE = np.dtype([
+    ("answer", "<i4"), ("start", "<i4"), ("end", "<i4"), ("sentiment", "i1"), ("confidence", "<f4"),
+])
+SENTIMENT_LABELS = ["NEGATIVE", "NEUTRAL", "POSITIVE"]
+_SENTIMENT_CODES = {label: code for code, label in enumerate(SENTIMENT_LABELS)}
+_LOGS = ("answers", "words", "sentiments", "evaluations")
+
+def _key(session_id, log=None):
+    return f"analysis:{session_id}:{log}" if log else f"analysis:{session_id}"
+
+def save_assemblyai_analysis(analysis, session_id=DEFAULT_SESSION_ID):
+    """Queue an answer's analysis to be saved behind the request."""
+    write_behind.call(_key(session_id), _save_analysis, analysis, session_id)
+
+def _save_analysis(analysis, session_id):
+    words = analysis.get("words") or []
+    sentiments = analysis.get("sentiment_analysis_results") or []
+    # Held so two workers saving answers for the session can't take the same index
+    with state.lock(_key(session_id)):
+        _, index = state.stat(_key(session_id, "answers"))
+        word_records = np.array(
+            [(index, w.get("start", 0), w.get("end", 0), w.get("confidence", 0.0)) for w in words],
+            dtype=WORD_DTYPE,
+        )
+        sentiment_records = np.array(
+            [(index, s.get("start", 0), s.get("end", 0), _SENTIMENT_CODES.get(s.get("sentiment"), 1), s.get("confidence", 0.0))
+             for s in sentiments],
+            dtype=SENTIMENT_DTYPE,
+        )
+        features = answer_features(analysis.get("text"), word_records, sentiment_records, analysis.get("audio_duration"))
+        # Arrays first, index entry last: a reader never sees an answer whose records are missing
+        state.append(_key(session_id, "words"), [word_records.tobytes()])
+        state.append(_key(session_id, "sentiments"), [sentiment_records.tobytes()])
+        state.append(_key(session_id, "answers"), [json.dumps({
+            "answer": index,
+            "text": analysis.get("text") or "",
+            "confidence": analysis.get("confidence"),
+            "audio_duration": analysis.get("audio_duration"),
+            "features": features,
+        }).encode("utf-8")])
+    return index
+
+def load_answers(session_id=DEFAULT_SESSION_ID):
+    # Just the answer index (with precomputed features); no record arrays are read
+    write_behind.flush(_key(session_id))
+    _, items = state.read(_key(session_id, "answers"))
+    return [json.loads(item) for item in items]
+
+def _load_records(session_id, log, dtype):
+    _, items = state.read(_key(session_id, log))
+    return np.frombuffer(b"".join(items), dtype=dtype)
+
+def load_session_analysis(session_id=DEFAULT_SESSION_ID):
+    """
+    Return (answers, words, sentiments) for one session: the answer index
+    entries plus the word and sentiment record arrays.
+    """
+    answers = load_answers(session_id)
+    words = _load_records(session_id, "words", WORD_DTYPE)
+    sentiments = _load_records(session_id, "sentiments", SENTIMENT_DTYPE)
+    # Drop records past the last indexed answer (a save interrupted mid-answer)
+    count = len(answers)
+    return answers, words[words["answer"] < count], sentiments[sentiments["answer"] < count]
+
+def load_timeline(session_id=DEFAULT_SESSION_ID, resolution_ms=1000):
+    answers, words, sentiments = load_session_analysis(session_id)
+    return [
+        timeline(words[words["answer"] == entry["answer"]], sentiments[sentiments["answer"] == entry["answer"]], resolution_ms)
+        for entry in answers
+    ]
+
+def save_evaluation(session_id, key, evaluation):
+    write_behind.append(_key(session_id), _key(session_id, "evaluations"), [json.dumps({"key": key, **evaluation}).encode("utf-8")])
+
+def load_evaluations(session_id=DEFAULT_SESSION_ID):
+    """Per-answer evaluations saved so far, by answer key."""
+    write_behind.flush(_key(session_id))
+    evaluations = {}
+    _, items = state.read(_key(session_id, "evaluations"))
+    for item in items:
+        record = json.loads(item)
+        evaluations[record.pop("key")] = record
+    return evaluations
+
+def clear_analysis(session_id=DEFAULT_SESSION_ID):
+    write_behind.flush(_key(session_id))
+    with state.lock(_key(session_id)):
+        for log in _LOGS:
+            state.delete(_key(session_id, log))
@@ -1,55 +1,191 @@
 import json
-from pathlib import Path
-
-DATABASE_FILE = Path('database.json')
-
-def load_messages():
-    messages = []
-    file = 'database.json'
-    resume_context = ""
-    position = ""
-    difficulty = ""
-    interview_type = ""
-    from utils.file_utils import DIFFICULTY_FILE, INTERVIEW_TYPE_FILE, POSITION_FILE
-
-    if DIFFICULTY_FILE.exists():
-        difficulty = DIFFICULTY_FILE.read_text().strip()
-    if INTERVIEW_TYPE_FILE.exists():
-        interview_type = INTERVIEW_TYPE_FILE.read_text().strip().lower()
-    if Path("resume_context.txt").exists():
-        with open("resume_context.txt", encoding="utf-8") as f:
-            resume_context = f.read()
-    if POSITION_FILE.exists():
-        position = POSITION_FILE.read_text().strip()
-
-    if Path(file).exists() and Path(file).stat().st_size > 0:
-        with open(file) as db_file:
-            data = json.load(db_file)
-            for item in data:
-                messages.append(item)
-    else:
-        # Always start with an introduction question
-        system_prompt = (
-            f"You are a friendly interviewer. "
-            f"You are interviewing the user for a {position} position. "
-            f"Ask the first question as: 'Let's start with a quick introduction. Please introduce yourself.' "
-            f"After that, ask {difficulty}-level relevant {interview_type} questions at a time, based on the user's resume and previous answers. "
-            "Wait for the user's answer before asking the next question. "
-            "Keep asking questions, until the user says 'end interview'. "
-            "Keep responses under 30 words and be conversational."
-        )
-        if resume_context:
-            system_prompt += f"\n\nThe user's resume is:\n{resume_context}\nUse this information to tailor your questions."
-        messages.append({"role": "system", "content": system_prompt})
-    return messages
-
-def save_messages(user_message: str, gemini_response: str):
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from database.state_backend import state
+from database.write_behind import write_behind
+from utils.session import DEFAULT_SESSION_ID
+
+# Each session is an append-only log in the shared state backend, one JSON record per item:
+#   {"op": "set", "settings": {...}}                 interview settings (position, difficulty, ...)
+#   {"op": "reset", "messages": [...], "epoch": n}   history replaced (new interview / clear)
+#   {"op": "append", "messages": [...]}              one turn added
+#   {"op": "summary", "summary": {...}}              rolling summary of the first `upto` non-system messages
+# Every worker keeps a hot copy of the sessions it has served and, on each
+# access, applies only the records appended since (by any worker). Writes
+# hold the session's state lock, so workers serving the same session never
+# interleave their read-modify-write steps.
+# A turn is saved behind the reply (queue_messages): the reading functions
+# below flush the session's queued turns first, so this worker always reads
+# its own writes. Other workers see a turn once it lands, normally within
+# milliseconds and long before the candidate's next answer reaches them.
+# Hot copies kept per worker; the least recently used are dropped (and replayed if needed again)
+CHAT_SESSION_CACHE_SIZE = max(1, int(os.getenv("CHAT_SESSION_CACHE_SIZE", "1000")))
+# session id -> {"lock", "session"}; the lock guards one session's copy, so
+# sessions never wait on each other's backend I/O
+_sessions = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _key(session_id):
+    return f"chat:{session_id}"
+
+def _new_session():
+    return {
+        "messages": [], "settings": {}, "summary": {"text": "", "upto": 0}, "epoch": 0,
+        # Position in the shared log this copy has caught up to
+        "generation": None, "length": 0,
+    }
+
+def _apply(session, record):
+    op = record.get("op")
+    if op == "reset":
+        session["messages"] = list(record.get("messages", []))
+        session["summary"] = {"text": "", "upto": 0}
+        session["epoch"] = record.get("epoch", session["epoch"])
+    elif op == "append":
+        session["messages"].extend(record.get("messages", []))
+    elif op == "set":
+        session["settings"].update(record.get("settings", {}))
+    elif op == "summary":
+        session["summary"] = record.get("summary", session["summary"])
+
+@contextmanager
+def _locked(session_id):
+    with _cache_lock:
+        entry = _sessions.get(session_id)
+        if entry is None:
+            entry = _sessions[session_id] = {"lock": threading.RLock(), "session": None}
+            if len(_sessions) > CHAT_SESSION_CACHE_SIZE:
+                _sessions.popitem(last=False)
+        else:
+            _sessions.move_to_end(session_id)
+    with entry["lock"]:
+        yield entry
+
+def _sync(entry, session_id):
+    """The worker's copy of the session, caught up with the shared log. `entry` is from _locked(session_id)."""
+    key = _key(session_id)
+    session = entry["session"]
+    generation, length = state.stat(key)
+    if session is not None and (session["generation"], session["length"]) == (generation, length):
+        return session
+    if session is None or session["generation"] != generation or session["length"] > length:
+        # The log was compacted by a reset (here or on another worker): replay it
+        session = _new_session()
+    generation, records = state.read(key, session["length"])
+    if session["generation"] not in (None, generation):
+        # ...and it happened between the two calls
+        session = _new_session()
+        generation, records = state.read(key, 0)
+    for record in records:
+        _apply(session, json.loads(record))
+    session["generation"] = generation
+    session["length"] += len(records)
+    entry["session"] = session
+    return session
+
+def _append_records(session_id, *records):
+    state.append(_key(session_id), [json.dumps(r).encode("utf-8") for r in records])
+
+def _default_system_prompt(settings):
+    position = settings.get("position", "")
+    difficulty = settings.get("difficulty", "")
+    interview_type = settings.get("interview_type", "").lower()
+    # Always start with an introduction question
+    system_prompt = (
+        f"You are a friendly interviewer. "
+        f"You are interviewing the user for a {position} position. "
+        f"Ask the first question as: 'Let's start with a quick introduction. Please introduce yourself.' "
+        f"After that, ask {difficulty}-level relevant {interview_type} questions at a time, based on the user's resume and previous answers. "
+        "Wait for the user's answer before asking the next question. "
+        "Keep asking questions, until the user says 'end interview'. "
+        "Keep responses under 30 words and be conversational."
+    )
+    if settings.get("resume_hash"):
+        system_prompt += " The parts of the user's resume relevant to each answer are included with it; use them to tailor your questions."
+    return {"role": "system", "content": system_prompt}
+
+def _flush(session_id):
+    write_behind.flush(_key(session_id))
+
+def load_messages(session_id=DEFAULT_SESSION_ID):
+    _flush(session_id)
+    with _locked(session_id) as entry:
+        session = _sync(entry, session_id)
+        if session["messages"]:
+            return list(session["messages"])
+        return [_default_system_prompt(session["settings"])]
+
+def save_messages(user_message: str, gemini_response: str, session_id=DEFAULT_SESSION_ID):
     try:
-        messages = load_messages()
-        messages.extend([
-            {"role": "user", "content": user_message},
-            {"role": "assistant", "content": gemini_response}
-        ])
-        DATABASE_FILE.write_text(json.dumps(messages))
+        with state.lock(_key(session_id)), _locked(session_id) as entry:
+            session = _sync(entry, session_id)
+            new_messages = [
+                {"role": "user", "content": user_message},
+                {"role": "assistant", "content": gemini_response}
+            ]
+            if session["messages"]:
+                _append_records(session_id, {"op": "append", "messages": new_messages})
+            else:
+                # First turn of the interview: persist the system prompt along with it
+                _append_records(
+                    session_id,
+                    {"op": "reset", "messages": [_default_system_prompt(session["settings"])], "epoch": session["epoch"]},
+                    {"op": "append", "messages": new_messages},
+                )
+            _sync(entry, session_id)
     except Exception as e:
-        raise RuntimeError(f"Failed to save messages: {str(e)}")
\ No newline at end of file
+        raise RuntimeError(f"Failed to save messages: {str(e)}")
+
+def queue_messages(user_message: str, gemini_response: str, session_id=DEFAULT_SESSION_ID):
+    """save_messages behind the request; returns at once."""
+    write_behind.call(_key(session_id), save_messages, user_message, gemini_response, session_id)
+
+def reset_messages(session_id=DEFAULT_SESSION_ID, messages=None):
+    """
+    Replace the session's history, e.g. with a fresh system prompt. Passing
+    no messages starts over from the default interviewer prompt.
+    """
+    _flush(session_id)
+    with state.lock(_key(session_id)), _locked(session_id) as entry:
+        session = _sync(entry, session_id)
+        # Resets are rare, so compact the log to the current state while we are at it.
+        # The epoch lets a summary computed against the old history notice it is stale.
+        state.replace(_key(session_id), [
+            json.dumps({"op": "set", "settings": session["settings"]}).encode("utf-8"),
+            json.dumps({"op": "reset", "messages": list(messages or []), "epoch": session["epoch"] + 1}).encode("utf-8"),
+        ])
+        _sync(entry, session_id)
+
+def get_settings(session_id=DEFAULT_SESSION_ID):
+    _flush(session_id)
+    with _locked(session_id) as entry:
+        return dict(_sync(entry, session_id)["settings"])
+
+def update_settings(session_id=DEFAULT_SESSION_ID, **settings):
+    _flush(session_id)
+    with state.lock(_key(session_id)), _locked(session_id) as entry:
+        _append_records(session_id, {"op": "set", "settings": settings})
+        _sync(entry, session_id)
+
+def get_summary(session_id=DEFAULT_SESSION_ID):
+    """
+    Return (summary, epoch). `summary["upto"]` counts the non-system messages
+    folded into `summary["text"]`; pass `epoch` back to save_summary.
+    """
+    _flush(session_id)
+    with _locked(session_id) as entry:
+        session = _sync(entry, session_id)
+        return dict(session["summary"]), session["epoch"]
+
+def save_summary(session_id, text, upto, epoch):
+    _flush(session_id)
+    with state.lock(_key(session_id)), _locked(session_id) as entry:
+        session = _sync(entry, session_id)
+        if session["epoch"] != epoch or upto <= session["summary"]["upto"]:
+            # History was reset or a newer summary landed while this one was generated
+            return False
+        _append_records(session_id, {"op": "summary", "summary": {"text": text, "upto": upto}})
+        _sync(entry, session_id)
+        return True
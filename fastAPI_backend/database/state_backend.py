@@ -0,0 +1,300 @@
+import asyncio
+import base64
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager, asynccontextmanager
+from pathlib import Path
+from utils.executors import run_in
+from utils.file_utils import SESSIONS_DIR
+
+# Interview state shared by every worker process, so any worker (or node)
+# can serve any request of any session:
+#   sqlite  (default) one database file shared by the workers on this machine
+#   remote  a state server (python -m database.state_server) the workers reach over HTTP
+STATE_BACKEND = os.getenv("STATE_BACKEND", "sqlite")
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", str(SESSIONS_DIR / "state.db"))
+STATE_URL = os.getenv("STATE_URL", "http://127.0.0.1:8790")
+STATE_TIMEOUT = float(os.getenv("STATE_TIMEOUT", "10"))
+# A lock whose holder died is free again after this long
+STATE_LOCK_TTL = float(os.getenv("STATE_LOCK_TTL", "10"))
+STATE_LOCK_TIMEOUT = float(os.getenv("STATE_LOCK_TIMEOUT", "10"))
+
+class StateBackend:
+    """
+    Every key holds a log: a list of byte strings that only grows, until
+    replace() swaps it for a new list and bumps the key's generation. A
+    reader that remembers (generation, length) can pick up just the items
+    appended since, and knows to start over when the generation changed.
+    append() with `expected_length` is a compare-and-set; lock() holds a
+    key exclusively across processes for read-modify-write sequences.
+    Every method blocks: from the event loop, call them through
+    run_in("blocking", ...) and take locks with alock().
+    """
+
+    def stat(self, key):
+        """(generation, length) of the key's log. Keys never written are (0, 0)."""
+        raise NotImplementedError
+
+    def read(self, key, start=0):
+        """(generation, items[start:])."""
+        raise NotImplementedError
+
+    def append(self, key, items, expected_length=None):
+        """
+        Append items to the log and return its new (generation, length); or,
+        if `expected_length` is given and the log has a different length,
+        append nothing and return None.
+        """
+        raise NotImplementedError
+
+    def replace(self, key, items, ttl=None):
+        """Replace the whole log, dropping it after `ttl` seconds if given. Returns the new generation."""
+        raise NotImplementedError
+
+    def acquire(self, key, owner, ttl):
+        """Take the lock on `key` for `owner` unless someone else holds it. Returns True on success."""
+        raise NotImplementedError
+
+    def release(self, key, owner):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def delete(self, key):
+        self.replace(key, [])
+
+    def get(self, key):
+        """The latest item of the key's log, or None."""
+        _, items = self.read(key)
+        return items[-1] if items else None
+
+    def put(self, key, value, ttl=None):
+        self.replace(key, [value], ttl)
+
+    @contextmanager
+    def lock(self, key, timeout=STATE_LOCK_TIMEOUT):
+        # Holders only keep the lock across a few quick reads and writes, so short polling is enough
+        owner = uuid.uuid4().hex
+        deadline = time.monotonic() + timeout
+        delay = 0.002
+        while not self.acquire(key, owner, STATE_LOCK_TTL):
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Timed out waiting for the state lock on {key}")
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+        try:
+            yield
+        finally:
+            self.release(key, owner)
+
+    @asynccontextmanager
+    async def alock(self, key, timeout=STATE_LOCK_TIMEOUT):
+        # lock() for the event loop: backend calls go to the blocking pool and waiting doesn't block the loop
+        owner = uuid.uuid4().hex
+        deadline = time.monotonic() + timeout
+        delay = 0.002
+        while not await run_in("blocking", self.acquire, key, owner, STATE_LOCK_TTL):
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Timed out waiting for the state lock on {key}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.05)
+        try:
+            yield
+        finally:
+            await run_in("blocking", self.release, key, owner)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS state_keys (
+    key TEXT PRIMARY KEY, generation INTEGER NOT NULL, length INTEGER NOT NULL, expires REAL
+);
+CREATE TABLE IF NOT EXISTS state_items (
+    key TEXT NOT NULL, seq INTEGER NOT NULL, value BLOB NOT NULL, PRIMARY KEY (key, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS state_locks (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL);
+"""
+# Expired keys and locks are swept out after this many writes
+_SWEEP_EVERY = 500
+
+class SQLiteStateBackend(StateBackend):
+    """
+    State in one SQLite database in WAL mode: readers never block, and
+    writers from all processes are serialized by SQLite's write lock, so
+    each method is atomic across workers.
+    """
+
+    def __init__(self, path=STATE_DB_PATH):
+        self.path = path
+        self._mutex = threading.Lock()
+        self._db = None
+        self._pid = None
+        self._writes = 0
+
+    def _connection(self):
+        # A connection must not cross a fork (gunicorn --preload), so each process opens its own
+        if self._db is None or self._pid != os.getpid():
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(_SCHEMA)
+            self._pid = os.getpid()
+        return self._db
+
+    @contextmanager
+    def _transaction(self, write=False):
+        with self._mutex:
+            db = self._connection()
+            # IMMEDIATE takes the write lock up front, so a read-then-write can't be interleaved
+            db.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+            if write:
+                self._writes += 1
+                if self._writes % _SWEEP_EVERY == 0:
+                    self._sweep(db)
+
+    def _sweep(self, db):
+        now = time.time()
+        db.execute("DELETE FROM state_items WHERE key IN (SELECT key FROM state_keys WHERE expires <= ?)", (now,))
+        db.execute("DELETE FROM state_keys WHERE expires <= ?", (now,))
+        db.execute("DELETE FROM state_locks WHERE expires <= ?", (now,))
+
+    def _current(self, db, key):
+        # (generation, length, expired); an expired log reads as already replaced by an empty one
+        row = db.execute("SELECT generation, length, expires FROM state_keys WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return 0, 0, False
+        if row[2] is not None and row[2] <= time.time():
+            return row[0] + 1, 0, True
+        return row[0], row[1], False
+
+    def _write_items(self, db, key, items, start):
+        db.executemany(
+            "INSERT INTO state_items (key, seq, value) VALUES (?, ?, ?)",
+            [(key, start + i, sqlite3.Binary(item)) for i, item in enumerate(items)],
+        )
+
+    def stat(self, key):
+        with self._transaction() as db:
+            generation, length, _ = self._current(db, key)
+        return generation, length
+
+    def read(self, key, start=0):
+        with self._transaction() as db:
+            generation, length, _ = self._current(db, key)
+            rows = db.execute(
+                "SELECT value FROM state_items WHERE key = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                (key, start, length),
+            ).fetchall()
+        return generation, [bytes(row[0]) for row in rows]
+
+    def append(self, key, items, expected_length=None):
+        with self._transaction(write=True) as db:
+            generation, length, expired = self._current(db, key)
+            if expected_length is not None and expected_length != length:
+                return None
+            if expired:
+                db.execute("DELETE FROM state_items WHERE key = ?", (key,))
+            self._write_items(db, key, items, length)
+            db.execute(
+                "INSERT INTO state_keys (key, generation, length, expires) VALUES (?, ?, ?, NULL) "
+                "ON CONFLICT(key) DO UPDATE SET generation = excluded.generation, length = excluded.length, "
+                "expires = CASE WHEN ? THEN NULL ELSE expires END",
+                (key, generation, length + len(items), expired),
+            )
+        return generation, length + len(items)
+
+    def replace(self, key, items, ttl=None):
+        expires = time.time() + ttl if ttl else None
+        with self._transaction(write=True) as db:
+            generation, _, _ = self._current(db, key)
+            generation += 1
+            db.execute("DELETE FROM state_items WHERE key = ?", (key,))
+            self._write_items(db, key, items, 0)
+            db.execute(
+                "INSERT OR REPLACE INTO state_keys (key, generation, length, expires) VALUES (?, ?, ?, ?)",
+                (key, generation, len(items), expires),
+            )
+        return generation
+
+    def acquire(self, key, owner, ttl):
+        now = time.time()
+        with self._transaction(write=True) as db:
+            row = db.execute("SELECT owner, expires FROM state_locks WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[0] != owner and row[1] > now:
+                return False
+            db.execute("INSERT OR REPLACE INTO state_locks (key, owner, expires) VALUES (?, ?, ?)", (key, owner, now + ttl))
+        return True
+
+    def release(self, key, owner):
+        with self._transaction(write=True) as db:
+            db.execute("DELETE FROM state_locks WHERE key = ? AND owner = ?", (key, owner))
+
+    def close(self):
+        with self._mutex:
+            if self._db is not None and self._pid == os.getpid():
+                self._db.close()
+            self._db = None
+
+def encode_items(items):
+    return [base64.b64encode(item).decode("ascii") for item in items]
+
+def decode_items(items):
+    return [base64.b64decode(item) for item in items]
+
+class RemoteStateBackend(StateBackend):
+    """
+    Client for database/state_server.py, which runs the SQLite backend
+    behind a small HTTP API; items travel base64-encoded.
+    """
+
+    def __init__(self, url=STATE_URL):
+        import httpx
+        self.url = url
+        self._client = httpx.Client(base_url=url, timeout=STATE_TIMEOUT)
+
+    def _call(self, op, **args):
+        response = self._client.post(f"/state/{op}", json=args)
+        response.raise_for_status()
+        return response.json()["result"]
+
+    def stat(self, key):
+        generation, length = self._call("stat", key=key)
+        return generation, length
+
+    def read(self, key, start=0):
+        generation, items = self._call("read", key=key, start=start)
+        return generation, decode_items(items)
+
+    def append(self, key, items, expected_length=None):
+        result = self._call("append", key=key, items=encode_items(items), expected_length=expected_length)
+        return tuple(result) if result is not None else None
+
+    def replace(self, key, items, ttl=None):
+        return self._call("replace", key=key, items=encode_items(items), ttl=ttl)
+
+    def acquire(self, key, owner, ttl):
+        return self._call("acquire", key=key, owner=owner, ttl=ttl)
+
+    def release(self, key, owner):
+        self._call("release", key=key, owner=owner)
+
+    def close(self):
+        self._client.close()
+
+def open_state_backend(kind=STATE_BACKEND):
+    if kind == "sqlite":
+        return SQLiteStateBackend(STATE_DB_PATH)
+    if kind == "remote":
+        return RemoteStateBackend(STATE_URL)
+    raise ValueError(f"Unknown STATE_BACKEND {kind!r} (expected 'sqlite' or 'remote')")
+
+state = open_state_backend()
@@ -0,0 +1,53 @@
+"""
+Networked state backend: serves a SQLite state database over HTTP so API
+workers on several machines can share it. Point the workers at it with
+STATE_BACKEND=remote and STATE_URL=http://<host>:<port>.
+
+    python -m database.state_server --port 8790 --db sessions/state.db
+"""
+import argparse
+import uvicorn
+from fastapi import Body, FastAPI, HTTPException
+from database.state_backend import SQLiteStateBackend, STATE_DB_PATH, encode_items, decode_items
+
+app = FastAPI()
+backend = SQLiteStateBackend(STATE_DB_PATH)
+
+def _read(key, start=0):
+    generation, items = backend.read(key, start)
+    return generation, encode_items(items)
+
+_OPS = {
+    "stat": lambda key: backend.stat(key),
+    "read": _read,
+    "append": lambda key, items, expected_length=None: backend.append(key, decode_items(items), expected_length),
+    "replace": lambda key, items, ttl=None: backend.replace(key, decode_items(items), ttl),
+    "acquire": lambda key, owner, ttl: backend.acquire(key, owner, ttl),
+    "release": lambda key, owner: backend.release(key, owner),
+}
+
+@app.post("/state/{op}")
+def state_op(op: str, args: dict = Body(...)):
+    # Plain def: FastAPI runs it on its threadpool, so SQLite never blocks the event loop
+    if op not in _OPS:
+        raise HTTPException(404, detail=f"Unknown state operation {op}")
+    try:
+        return {"result": _OPS[op](**args)}
+    except TypeError as e:
+        raise HTTPException(400, detail=str(e))
+
+@app.on_event("shutdown")
+def shutdown():
+    backend.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared interview state server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--db", default=STATE_DB_PATH, help="SQLite database file")
+    args = parser.parse_args()
+    backend.path = args.db
+    uvicorn.run(app, host=args.host, port=args.port, access_log=False)
+
+if __name__ == "__main__":
+    main()
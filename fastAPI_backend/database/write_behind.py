@@ -0,0 +1,127 @@
+import atexit
+import threading
+from collections import OrderedDict
+from database.state_backend import state
+
+class WriteBehindQueue:
+    """
+    State backend writes applied on a background thread, so request
+    handlers don't wait on the backend for writes nobody needs to see land.
+    Writes are queued under a group (e.g. "analysis:<session>"): a group's
+    writes land in the order they were queued, consecutive appends to the
+    same key are merged into a single append, and a put drops the writes to
+    its key still waiting ahead of it. Readers on this worker call
+    flush(group) before reading keys the queue writes; other workers see
+    the writes once they land.
+    """
+
+    def __init__(self, backend=state):
+        self.backend = backend
+        self._pending = OrderedDict()
+        self._writing = set()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closed = False
+        self.stats = {"queued": 0, "coalesced": 0, "superseded": 0, "writes": 0, "errors": 0}
+
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+
+    def _queue(self, group, op):
+        # The condition's lock is reentrant, so callers may already hold it
+        with self._cond:
+            self.stats["queued"] += 1
+            self._pending.setdefault(group, []).append(op)
+            self._start()
+            self._cond.notify_all()
+
+    def append(self, group, key, items):
+        """Append items to the key's log."""
+        with self._cond:
+            ops = self._pending.get(group)
+            last = ops[-1] if ops else None
+            if last and last["kind"] == "append" and last["key"] == key:
+                last["items"] = last["items"] + list(items)
+                self.stats["queued"] += 1
+                self.stats["coalesced"] += 1
+            else:
+                self._queue(group, {"kind": "append", "key": key, "items": list(items)})
+
+    def put(self, group, key, value, ttl=None):
+        """Replace the key's log with `value` (like state.put)."""
+        with self._cond:
+            ops = self._pending.get(group)
+            if ops:
+                # A call may read what was written before it, so nothing ahead of one is dropped
+                start = max((i + 1 for i, op in enumerate(ops) if op["kind"] == "call"), default=0)
+                kept = ops[:start] + [op for op in ops[start:] if op["key"] != key]
+                self.stats["superseded"] += len(ops) - len(kept)
+                self._pending[group] = kept
+            self._queue(group, {"kind": "put", "key": key, "value": value, "ttl": ttl})
+
+    def call(self, group, fn, *args):
+        """Run `fn(*args)` in the group's order, for writes that read first (e.g. under a state lock)."""
+        self._queue(group, {"kind": "call", "fn": fn, "args": args})
+
+    def _apply(self, op):
+        if op["kind"] == "append":
+            self.backend.append(op["key"], op["items"])
+        elif op["kind"] == "put":
+            self.backend.put(op["key"], op["value"], op["ttl"])
+        else:
+            op["fn"](*op["args"])
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                group, ops = self._pending.popitem(last=False)
+                self._writing.add(group)
+            try:
+                for op in ops:
+                    try:
+                        self._apply(op)
+                        self.stats["writes"] += 1
+                    except Exception as e:
+                        self.stats["errors"] += 1
+                        print(f"Write-behind failed for {group}:", e)
+            finally:
+                with self._cond:
+                    self._writing.discard(group)
+                    self._cond.notify_all()
+
+    def flush(self, group=None, timeout=None):
+        """Block until writes queued so far (for `group`, or all groups) have landed."""
+        with self._cond:
+            if group is None:
+                done = lambda: not self._pending and not self._writing
+            else:
+                done = lambda: group not in self._pending and group not in self._writing
+            return self._cond.wait_for(done, timeout)
+
+    def close(self, timeout=10):
+        # Land everything still queued, then stop the writer thread
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        with self._cond:
+            # Anything queued later starts a fresh writer thread
+            self._closed = False
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                **self.stats,
+                "pending_groups": len(self._pending),
+                "pending_ops": sum(len(ops) for ops in self._pending.values()),
+            }
+
+write_behind = WriteBehindQueue()
+atexit.register(write_behind.close)
@@ -1,10 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
+from utils.tracing import TracingMiddleware
+from utils.session import SessionCookieMiddleware
 
 load_dotenv()
 
 app = FastAPI()
+# Clients that send no session id get one in a cookie instead of sharing the default session
+app.add_middleware(SessionCookieMiddleware)
 
 origins = [
     "http://localhost:5174",
@@ -18,14 +22,45 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Reply-Text", "Server-Timing"],
 )
+# Outermost, so request timings include CORS handling
+app.add_middleware(TracingMiddleware)
 
-from routers import interview, feedback, resume, tts
+from routers import interview, feedback, resume, tts, stt, audio, status
+from services.registry import services, WARM_ON_STARTUP
+from services.tts_service import prewarm_tts
+from utils.executors import run_in, shutdown_executors
+from database.state_backend import state
+from database.write_behind import write_behind
+from services.gemini_service import HR_INTRO_QUESTION
+from services.feedback_jobs import stop_feedback_workers
 
 app.include_router(interview.router)
 app.include_router(feedback.router)
 app.include_router(resume.router)
 app.include_router(tts.router)
+app.include_router(stt.router)
+app.include_router(audio.router)
+app.include_router(status.router)
+
+# Synthesized during warm-up so /first_question and the first HR /tts call are served from the cache
+services.add_warmup("tts_cache", prewarm_tts, [interview.INTRO_QUESTION, HR_INTRO_QUESTION])
+
+@app.on_event("startup")
+async def startup():
+    # Clients are created lazily; warming them up runs in the background and doesn't delay serving
+    if WARM_ON_STARTUP:
+        services.start_warm_up()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await services.close()
+    stop_feedback_workers()
+    # Land the writes still queued before the pools and the backend go away
+    await run_in("blocking", write_behind.close)
+    shutdown_executors()
+    state.close()
 
 @app.get("/")
 async def root():
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
+from utils.audio_artifacts import get_artifact, parse_range, RangeNotSatisfiable, AUDIO_ARTIFACT_TTL
+from utils.executors import run_in
+
+router = APIRouter()
+
+@router.get("/audio/{artifact_id}")
+async def get_audio_artifact(artifact_id: str, request: Request):
+    artifact = await run_in("blocking", get_artifact, artifact_id)
+    if artifact is None:
+        raise HTTPException(404, detail="Audio not found or expired")
+    audio, etag = artifact
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": f"private, max-age={AUDIO_ARTIFACT_TTL}",
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    range_header = request.headers.get("range")
+    try:
+        byte_range = parse_range(range_header, len(audio)) if range_header else None
+    except RangeNotSatisfiable:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{len(audio)}"})
+    # A malformed Range is ignored (RFC 9110): the whole body is sent
+    if byte_range is not None:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{len(audio)}"
+        return Response(audio[start:end + 1], status_code=206, media_type="audio/mpeg", headers=headers)
+    return Response(audio, media_type="audio/mpeg", headers=headers)
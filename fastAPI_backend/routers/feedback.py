@@ -1,53 +1,67 @@
 #for technical interview
-from fastapi import APIRouter
-from database.chat_history import load_messages
-from services.stt_service import load_assemblyai_analysis
-from services.gemini_service import gemini_model
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi.responses import StreamingResponse
+from database.analysis_store import load_answers, load_timeline
+from routers.interview import SSE_HEADERS, _sse
+from services.feedback_jobs import submit_feedback, finished_feedback, get_job, wait_for_job, follow_job, job_view
+from utils.session import get_session_id
+from utils.executors import run_in
+from utils.tracing import stage
 
 router = APIRouter()
 
 @router.get("/feedback")
-async def get_feedback():
-    messages = load_messages()
-    vocal_analysis = load_assemblyai_analysis()
+async def get_feedback(session_id: str = Depends(get_session_id)):
+    # Usually already running (or cached) since /end_interview queued it
+    job = await submit_feedback(session_id, "technical")
+    return {"feedback": await finished_feedback(job)}
 
-    # Summarize vocal analysis for the prompt
-    vocal_summary = ""
-    for i, analysis in enumerate(vocal_analysis, 1):
-        sentiment = analysis.get('sentiment_analysis_results', [])
-        confidence = analysis.get('confidence', None)
-        # You can extract more features as needed
-        vocal_summary += f"\nAnswer {i}: Confidence={confidence}, Sentiment={sentiment}"
+@router.get("/feedback/jobs/{job_id}")
+async def get_feedback_job(job_id: str, wait: float = Query(0, ge=0, le=60)):
+    # Pass ?wait= to long-poll up to that many seconds for the job to finish
+    job = await get_job(job_id)
+    if job is None:
+        raise HTTPException(404, detail="Unknown or expired feedback job")
+    if wait:
+        await wait_for_job(job, wait)
+    return job_view(job)
 
-    feedback_prompt = (
-        "\n".join(f"{m['role']}: {m['content']}" for m in messages) +
-        f"\n\nVocal analysis of the user's answers:{vocal_summary}\n"
-        "Assistant: Please provide a structured interview feedback with the following sections as headings: Confidence, Tone, Sentiment, and Accuracy. For each section, give a score out of 10 and a short explanation. Format the response as:\n"
-        "Confidence: <score>/10 - <explanation>\n"
-        "Tone: <score>/10 - <explanation>\n"
-        "Sentiment: <score>/10 - <explanation>\n"
-        "Accuracy: <score>/10 - <explanation>\n"
-        "give a brief overall summary.\n"
-        "Also, calculate and display the total score out of 10 as the average of the four section scores. Format: Total Score: <score>/10.\n"
-        "Finally, based on the scores, give a final verdict as 'PASS' if the average score is 6 or above, otherwise 'FAIL'. Format: Verdict: PASS/FAIL."
-    )
-    response = gemini_model.generate_content(feedback_prompt)
-    return {"feedback": response.text.strip()}
+@router.get("/feedback/jobs/{job_id}/stream")
+async def stream_feedback_job(job_id: str):
+    # SSE: "token" events with the report as it is generated, then "done" or "error"
+    job = await get_job(job_id)
+    if job is None:
+        raise HTTPException(404, detail="Unknown or expired feedback job")
+    async def events():
+        async for chunk in follow_job(job):
+            yield _sse("token", {"text": chunk})
+        if job["status"] == "done":
+            yield _sse("done", {"feedback": job["feedback"]})
+        else:
+            yield _sse("error", {"detail": job["error"]})
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
 
 @router.get("/feedback_heatmap")
-async def feedback_heatmap():
-    vocal_analysis = load_assemblyai_analysis()
+async def feedback_heatmap(
+    session_id: str = Depends(get_session_id),
+    resolution_ms: Optional[int] = Query(None, ge=100),
+):
+    # Pass ?resolution_ms= to also get a time-binned confidence/sentiment timeline per answer
+    with stage("analysis_load"):
+        answers = await run_in("blocking", load_answers, session_id)
+        timelines = await run_in("blocking", load_timeline, session_id, resolution_ms) if resolution_ms else None
     heatmap_data = []
-    for i, analysis in enumerate(vocal_analysis, 1):
-        confidence = analysis.get('confidence', None)
-        sentiment = None
-        sentiments = analysis.get('sentiment_analysis_results', [])
-        if sentiments:
-            sentiment = max(sentiments, key=lambda s: s['confidence'])['sentiment']
-        heatmap_data.append({
+    for i, analysis in enumerate(answers, 1):
+        features = analysis.get("features") or {}
+        entry = {
             "answer": i,
-            "confidence": confidence,
-            "sentiment": sentiment
-        })
+            "confidence": analysis.get("confidence"),
+            "sentiment": features.get("sentiment"),
+            "features": features,
+        }
+        if timelines is not None:
+            entry["timeline"] = timelines[i - 1]
+        heatmap_data.append(entry)
     return {"heatmap": heatmap_data}
 
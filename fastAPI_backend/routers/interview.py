@@ -1,22 +1,31 @@
-from fastapi import APIRouter, UploadFile, HTTPException, Body, Request, File
-from pathlib import Path
-import tempfile, shutil
-from services.stt_service import analyze_audio_with_assemblyai, save_assemblyai_analysis
-from services.gemini_service import get_chat_response
-from services.tts_service import text_to_speech
-from database.chat_history import load_messages, save_messages
+from fastapi import APIRouter, HTTPException, Body, Request, Depends, Query, WebSocket, WebSocketDisconnect
+from services.stt_service import analyze_audio_with_assemblyai
+from services.gemini_service import get_chat_response, stream_chat_response, record_turn
+from services.tts_service import generate_speech, stream_speech
+from services.streaming_stt import open_streaming_session
+from database.chat_history import load_messages, reset_messages, get_settings, update_settings
+from database.analysis_store import save_assemblyai_analysis, clear_analysis
+from database.state_backend import state
+from database.write_behind import write_behind
+from services.feedback_jobs import submit_feedback, finished_feedback
 from utils.file_utils import ALLOWED_AUDIO_EXTENSIONS
-import os
+from utils.session import get_session_id, issued_session_id, session_cookie
+from utils.audio_artifacts import put_artifact
+from utils.executors import run_in
+from utils.tracing import stage
 import json
-from fastapi.responses import StreamingResponse, JSONResponse
+from typing import Optional
+from fastapi.responses import StreamingResponse, JSONResponse, Response
 import base64
+from urllib.parse import quote
 from pydantic import BaseModel
-from utils.audio_convert import convert_webm_to_mp3
-from utils.file_utils import POSITION_FILE
+from utils.audio_convert import prepare_speech_for_stt, AudioConversionError
+from utils.upload_stream import open_audio_stream
 
 router = APIRouter()
 
-LAST_TRANSCRIPT_FILE = 'last_transcript.txt'
+INTRO_QUESTION = "Let's start with a quick introduction. Please introduce yourself."
+STREAMING_SAMPLE_RATE = 16000
 
 class TextAnswer(BaseModel):
     answer: str
@@ -37,69 +46,144 @@ class HRAnswerRequest(BaseModel):
     role: str
     answer: str
 
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _write_last_transcript(session_id, transcript):
+    key = f"transcript:{session_id}"
+    write_behind.put(key, key, (transcript or '').encode('utf-8'))
+
+def _read_last_transcript(session_id):
+    write_behind.flush(f"transcript:{session_id}")
+    transcript = state.get(f"transcript:{session_id}")
+    return transcript.decode('utf-8') if transcript is not None else ""
+
+async def _audio_reply(chat_response, audio_mode):
+    # audio=base64 (default): JSON with the MP3 base64-encoded
+    # audio=binary: raw MP3 body, reply text URL-encoded in X-Reply-Text
+    # audio=stream: like binary, but MP3 chunks are sent sentence by sentence
+    # audio=url: JSON with a short-lived /audio/{id} link (ETag + Range aware)
+    if audio_mode == "stream":
+        return StreamingResponse(
+            stream_speech(chat_response),
+            media_type="audio/mpeg",
+            headers={"X-Reply-Text": quote(chat_response)},
+        )
+    audio_output = await generate_speech(chat_response)
+    if not audio_output:
+        raise HTTPException(500, detail="Failed to generate speech")
+    if audio_mode == "binary":
+        return Response(audio_output, media_type="audio/mpeg", headers={"X-Reply-Text": quote(chat_response)})
+    if audio_mode == "url":
+        return JSONResponse({
+            "text": chat_response,
+            "audio_url": f"/audio/{put_artifact(audio_output)}"
+        })
+    # Encode audio as base64
+    with stage("encode"):
+        audio_b64 = base64.b64encode(audio_output).decode("utf-8")
+    return JSONResponse({
+        "text": chat_response,
+        "audio_base64": audio_b64
+    })
+
 @router.post("/talk") # for technical interview
-async def post_audio(file: UploadFile):
+async def post_audio(request: Request, session_id: str = Depends(get_session_id), audio: str = Query("base64", pattern="^(base64|binary|stream|url)$")):
+    # Expects multipart "file" (or a raw audio body); read as a stream rather than an UploadFile
     try:
-        file_ext = Path(file.filename).suffix.lower()
-        if file_ext not in ALLOWED_AUDIO_EXTENSIONS:
-            raise HTTPException(400, detail="Unsupported audio format")
-        with tempfile.NamedTemporaryFile(suffix=file_ext, delete=False) as tmp:
-            shutil.copyfileobj(file.file, tmp)
-            tmp_path = tmp.name
-
-        # Convert webm to mp3 if needed
-        if file_ext == ".webm":
-            mp3_path = tmp_path + ".mp3"
-            convert_webm_to_mp3(tmp_path, mp3_path)
-            os.unlink(tmp_path)
-            audio_path = mp3_path
-        else:
-            audio_path = tmp_path
-
-        assemblyai_result = analyze_audio_with_assemblyai(audio_path)
-        save_assemblyai_analysis(assemblyai_result)
+        file_ext, chunks = await open_audio_stream(request, ALLOWED_AUDIO_EXTENSIONS)
+        # Trim silence (and reject recordings without speech) before uploading to AssemblyAI
+        audio_chunks = await prepare_speech_for_stt(chunks, file_ext)
+
+        assemblyai_result = await analyze_audio_with_assemblyai(audio_chunks)
+        # Both are saved behind the request; the reply doesn't wait for them
+        save_assemblyai_analysis(assemblyai_result, session_id)
         # Save transcript for frontend chat display
         transcript = assemblyai_result.get('text', '')
-        with open(LAST_TRANSCRIPT_FILE, 'w', encoding='utf-8') as f:
-            f.write(transcript or '')
+        _write_last_transcript(session_id, transcript)
         user_message = {"text": transcript}
-        chat_response = get_chat_response(user_message)
-        audio_output = text_to_speech(chat_response)
-        os.unlink(audio_path)
-        if not audio_output:
-            raise HTTPException(500, detail="Failed to generate speech")
-        # Encode audio as base64
-        audio_b64 = base64.b64encode(audio_output).decode("utf-8")
-        return JSONResponse({
-            "text": chat_response,
-            "audio_base64": audio_b64
-        })
+        chat_response = await get_chat_response(user_message, session_id)
+        return await _audio_reply(chat_response, audio)
+    except HTTPException:
+        raise
     except Exception as e:
         print("Error in /talk:", e)
         raise HTTPException(500, detail=str(e))
 
+@router.websocket("/ws/talk") # for technical interview
+async def ws_talk(websocket: WebSocket, session_id: str = Depends(get_session_id)):
+    """
+    Live voice turn. The client streams 16-bit mono PCM as binary frames
+    (optionally preceded by {"type": "start", "sample_rate": N}) and receives
+    {"type": "partial"} transcripts while speaking. Sending {"type": "stop"}
+    returns {"type": "transcript"}, then {"type": "reply"} followed by the
+    reply MP3 as a binary frame (skip it with "audio": false). The socket can
+    be reused for further turns. The session comes from the session cookie,
+    X-Session-Id or ?session_id= (browsers can't set headers on a WebSocket);
+    a connection with none of them gets a new session, and its cookie comes
+    with the handshake response.
+    """
+    # SessionCookieMiddleware only sees HTTP responses
+    issued = issued_session_id(websocket)
+    await websocket.accept(headers=[session_cookie(issued)] if issued else None)
+    stt = None
+
+    async def send_partial(text):
+        await websocket.send_json({"type": "partial", "text": text})
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                if stt is None:
+                    stt = await open_streaming_session(STREAMING_SAMPLE_RATE, send_partial)
+                await stt.send_audio(message["bytes"])
+                continue
+            control = json.loads(message.get("text") or "{}")
+            if control.get("type") == "start":
+                if stt is not None:
+                    await stt.close()
+                stt = await open_streaming_session(int(control.get("sample_rate", STREAMING_SAMPLE_RATE)), send_partial)
+            elif control.get("type") == "stop":
+                transcript = ""
+                if stt is not None:
+                    transcript = await stt.finish()
+                    await stt.close()
+                    stt = None
+                await websocket.send_json({"type": "transcript", "text": transcript})
+                if not transcript.strip():
+                    await websocket.send_json({"type": "error", "detail": "No speech detected. Please try again."})
+                    continue
+                _write_last_transcript(session_id, transcript)
+                chat_response = await get_chat_response({"text": transcript}, session_id)
+                await websocket.send_json({"type": "reply", "text": chat_response})
+                if control.get("audio", True):
+                    await websocket.send_bytes(await generate_speech(chat_response))
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        print("Error in /ws/talk:", e)
+        await websocket.close(code=1011)
+    finally:
+        if stt is not None:
+            await stt.close()
+
 @router.get("/last_transcript") # for technical interview
-async def last_transcript():
+async def last_transcript(session_id: str = Depends(get_session_id)):
     try:
-        if not os.path.exists(LAST_TRANSCRIPT_FILE):
-            return {"transcript": ""}
-        with open(LAST_TRANSCRIPT_FILE, 'r', encoding='utf-8') as f:
-            transcript = f.read()
-        return {"transcript": transcript}
+        return {"transcript": await run_in("blocking", _read_last_transcript, session_id)}
     except Exception as e:
         return {"transcript": ""}
 
-@router.post("/set_position") # for technical interview
-async def set_position(position: str = Body(..., embed=True)):
-    from utils.file_utils import POSITION_FILE, DATABASE_FILE, ASSEMBLYAI_ANALYSIS_FILE, DIFFICULTY_FILE
-    import json
-    # Read difficulty if it exists
-    if DIFFICULTY_FILE.exists():
-        difficulty = DIFFICULTY_FILE.read_text().strip()
-    else:
-        difficulty = "Beginner"
-    # Reset database.json to system prompt
-    DATABASE_FILE.write_text(json.dumps([
+def _start_technical_interview(session_id, position):
+    difficulty = get_settings(session_id).get("difficulty") or "Beginner"
+    update_settings(session_id, position=position, interview_kind="technical")
+    # Reset the session history to the system prompt
+    reset_messages(session_id, [
         {
             "role": "system",
             "content": (
@@ -111,27 +195,24 @@ async def set_position(position: str = Body(..., embed=True)):
                 "Keep responses under 30 words and be conversational."
             )
         }
-    ], indent=4))
+    ])
+    clear_analysis(session_id)
 
-    if ASSEMBLYAI_ANALYSIS_FILE.exists():
-        ASSEMBLYAI_ANALYSIS_FILE.unlink()
-    POSITION_FILE.write_text(position)
+@router.post("/set_position") # for technical interview
+async def set_position(position: str = Body(..., embed=True), session_id: str = Depends(get_session_id)):
+    await run_in("blocking", _start_technical_interview, session_id, position)
     return {"message": f"Position set to '{position}' and interview state reset."}
 
 @router.post("/set_difficulty") # for technical interview
-async def set_difficulty(difficulty: str = Body(..., embed=True)):
-    from utils.file_utils import DIFFICULTY_FILE
-    DIFFICULTY_FILE.write_text(difficulty)
+async def set_difficulty(difficulty: str = Body(..., embed=True), session_id: str = Depends(get_session_id)):
+    await run_in("blocking", update_settings, session_id, difficulty=difficulty)
     return {"message": f"Difficulty set to '{difficulty}'"}
 
-@router.post("/set_interview_type") # for technical interview
-async def set_interview_type(interview_type: str = Body(..., embed=True)):
-    from utils.file_utils import INTERVIEW_TYPE_FILE, DATABASE_FILE
-    import json
-    INTERVIEW_TYPE_FILE.write_text(interview_type)
+def _set_interview_type(session_id, interview_type):
+    update_settings(session_id, interview_type=interview_type)
     # Set a custom system prompt for HR interviews
     if interview_type == "hr":
-        DATABASE_FILE.write_text(json.dumps([
+        reset_messages(session_id, [
             {
                 "role": "system",
                 "content": (
@@ -141,23 +222,33 @@ async def set_interview_type(interview_type: str = Body(..., embed=True)):
                     "Keep responses under 40 words and be conversational."
                 )
             }
-        ], indent=4))
+        ])
+
+@router.post("/set_interview_type") # for technical interview
+async def set_interview_type(interview_type: str = Body(..., embed=True), session_id: str = Depends(get_session_id)):
+    await run_in("blocking", _set_interview_type, session_id, interview_type)
     return {"message": f"Interview type set to '{interview_type}'"}
 
 @router.post("/end_interview") 
-async def end_interview():
-    return {"message": "Interview ended by user."}
+async def end_interview(session_id: str = Depends(get_session_id), kind: Optional[str] = Query(None, pattern="^(technical|hr)$")):
+    # Start on the feedback now so it is ready (or streaming) by the time the results page asks;
+    # the kind is the one of the interview the session started last
+    settings = await run_in("blocking", get_settings, session_id)
+    kind = kind or settings.get("interview_kind", "technical")
+    if kind == "hr":
+        job = await submit_feedback(session_id, "hr", company=settings.get("company", ""), role=settings.get("position", ""))
+    else:
+        job = await submit_feedback(session_id, "technical")
+    return {"message": "Interview ended by user.", "job_id": job["id"], "status": job["status"]}
 
 @router.get("/clear")
-async def clear_history():
-    from utils.file_utils import DATABASE_FILE, ASSEMBLYAI_ANALYSIS_FILE
+async def clear_history(session_id: str = Depends(get_session_id)):
     try:
-        DATABASE_FILE.write_text(json.dumps([{
+        await run_in("blocking", reset_messages, session_id, [{
             "role": "system",
             "content": "You are playing the role of an interviewer. Ask short questions relevant to the user."
-        }]))
-        if ASSEMBLYAI_ANALYSIS_FILE.exists():
-            ASSEMBLYAI_ANALYSIS_FILE.unlink()
+        }])
+        await run_in("blocking", clear_analysis, session_id)
         return {"message": "Chat history cleared"}
     except Exception as e:
         raise HTTPException(500, detail=str(e))
@@ -165,10 +256,8 @@ async def clear_history():
 @router.get("/first_question") #for technical interview
 async def first_question():
     try:
-        # The introduction question
-        intro_text = "Let's start with a quick introduction. Please introduce yourself."
-        from services.tts_service import text_to_speech
-        audio_output = text_to_speech(intro_text)
+        # The introduction question (pre-warmed into the TTS cache at startup)
+        audio_output = await generate_speech(INTRO_QUESTION)
         if not audio_output:
             raise HTTPException(500, detail="Failed to generate speech for introduction question")
         def iterfile():
@@ -183,34 +272,73 @@ async def first_question():
         raise HTTPException(500, detail=str(e))
 
 @router.post("/talk_text_full") #for technical interview
-async def talk_text_full(answer: TextAnswer):
+async def talk_text_full(answer: TextAnswer, session_id: str = Depends(get_session_id), audio: str = Query("base64", pattern="^(base64|binary|stream|url)$")):
     try:
         # Prevent empty answers
         if not answer.answer or not answer.answer.strip():
             raise HTTPException(400, detail="Answer cannot be empty.")
         # Get AI response text
         user_message = {"text": answer.answer}
-        chat_response = get_chat_response(user_message)
+        chat_response = await get_chat_response(user_message, session_id)
         # Generate TTS audio
-        audio_output = text_to_speech(chat_response)
-        if not audio_output:
-            raise HTTPException(500, detail="Failed to generate speech")
-        # Encode audio as base64
-        audio_b64 = base64.b64encode(audio_output).decode("utf-8")
-        return JSONResponse(content={"text": chat_response, "audio_base64": audio_b64})
+        return await _audio_reply(chat_response, audio)
+    except HTTPException:
+        raise
     except Exception as e:
         print("Error in /talk_text_full:", e)
         raise HTTPException(500, detail=str(e))
 
+@router.post("/talk_text_stream") #for technical interview
+async def talk_text_stream(answer: TextAnswer, session_id: str = Depends(get_session_id)):
+    # Server-Sent Events: "token" events while Gemini generates, then "done" with the full reply
+    if not answer.answer or not answer.answer.strip():
+        raise HTTPException(400, detail="Answer cannot be empty.")
+    async def events():
+        parts = []
+        try:
+            async for token in stream_chat_response({"text": answer.answer}, session_id):
+                parts.append(token)
+                yield _sse("token", {"text": token})
+            yield _sse("done", {"text": "".join(parts).strip()})
+        except Exception as e:
+            print("Error in /talk_text_stream:", e)
+            yield _sse("error", {"detail": str(e)})
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+def _asked_questions(session_id):
+    return [m["content"] for m in load_messages(session_id) if m["role"] == "assistant"]
+
+def _hr_context(session_id):
+    return get_settings(session_id), _asked_questions(session_id)
+
+async def _next_hr_question(session_id, answer, instruction=None):
+    # Serve from the question bank when possible and record the answer with the question that follows it
+    from services.gemini_service import next_hr_question
+    settings, asked = await run_in("blocking", _hr_context, session_id)
+    next_question = await next_hr_question(
+        company=settings.get("company", ""),
+        role=settings.get("position", ""),
+        previous_answers=[answer],
+        asked=asked,
+        difficulty=settings.get("difficulty", ""),
+        instruction=instruction,
+    )
+    record_turn(answer, next_question, session_id, summarize=False)
+    return next_question
+
+def _start_hr_interview(session_id, company, role):
+    # Save company and role with the session and start a fresh history
+    update_settings(session_id, position=role, company=company, interview_kind="hr")
+    reset_messages(session_id)
+    return get_settings(session_id)
+
 @router.post("/hr_interview/start")
-async def start_hr_interview(request: HRInterviewStartRequest):
-    # Save company and role to position.txt (or a new file if needed)
-    with open("position.txt", "w", encoding="utf-8") as f:
-        f.write(request.role)
-    with open("company.txt", "w", encoding="utf-8") as f:
-        f.write(request.company)
-    if os.path.exists("database.json"): os.remove("database.json")
+async def start_hr_interview(request: HRInterviewStartRequest, session_id: str = Depends(get_session_id)):
+    settings = await run_in("blocking", _start_hr_interview, session_id, request.company, request.role)
     from services.gemini_service import get_hr_interview_question
+    from services.question_bank import schedule_refill
+    # Fill the question bank while the candidate answers the intro question
+    schedule_refill(request.company, request.role, settings.get("difficulty", ""))
     question = await get_hr_interview_question(
         company=request.company,
         role=request.role,
@@ -219,106 +347,59 @@ async def start_hr_interview(request: HRInterviewStartRequest):
     return {"question": question}
 
 @router.post("/hr_interview/answer")
-async def answer_hr_interview(request: HRInterviewAnswerRequest):
-    from database.chat_history import save_messages, load_messages
-    from services.gemini_service import get_hr_interview_question
-    save_messages(request.answer, "")
-    company = ""
-    role = ""
-    if os.path.exists("company.txt"):
-        with open("company.txt", encoding="utf-8") as f:
-            company = f.read().strip()
-    if os.path.exists("position.txt"):
-        with open("position.txt", encoding="utf-8") as f:
-            role = f.read().strip()
-    next_question = await get_hr_interview_question(
-        company=company,
-        role=role,
-        previous_answers=[request.answer]
-    )
+async def answer_hr_interview(request: HRInterviewAnswerRequest, session_id: str = Depends(get_session_id)):
+    next_question = await _next_hr_question(session_id, request.answer)
     return {"next_question": next_question}
 
+@router.post("/hr_interview/answer_stream")
+async def answer_hr_interview_stream(request: HRInterviewAnswerRequest, session_id: str = Depends(get_session_id)):
+    from services.gemini_service import stream_hr_interview_question
+    from services.question_bank import take_question
+    settings, asked = await run_in("blocking", _hr_context, session_id)
+    company = settings.get("company", "")
+    role = settings.get("position", "")
+    banked = take_question(company, role, settings.get("difficulty", ""), asked)
+    async def events():
+        parts = []
+        try:
+            if banked:
+                parts.append(banked)
+                yield _sse("token", {"text": banked})
+            else:
+                async for token in stream_hr_interview_question(company=company, role=role, previous_answers=[request.answer]):
+                    parts.append(token)
+                    yield _sse("token", {"text": token})
+            next_question = "".join(parts).strip()
+            record_turn(request.answer, next_question, session_id, summarize=False)
+            yield _sse("done", {"next_question": next_question})
+        except Exception as e:
+            print("Error in /hr_interview/answer_stream:", e)
+            yield _sse("error", {"detail": str(e)})
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @router.post("/hr_interview/feedback")
-async def hr_interview_feedback(request: HRInterviewStartRequest):
-    from database.chat_history import load_messages
-    from services.gemini_service import get_hr_feedback
-    company = request.company
-    role = request.role
-    messages = load_messages()
-    answers = [m['content'] for m in messages if m['role'] == 'user']
-    all_answers = " ".join(answers)
-    # Compose a feedback prompt for Gemini
-    feedback_prompt = (
-        f"The following are the answers given by a candidate in an HR interview for the role of {role} at {company}. "
-        f"Please provide detailed feedback on the following aspects:\n"
-        f"1. Emotional tone\n2. Empathy level\n3. Articulation\n4. Use of the STAR methodology (Situation, Task, Action, Result)\n"
-        f"Also, give actionable suggestions for improvement at the end.\n\nAnswers:\n{all_answers}"
-    )
-    feedback = await get_hr_feedback(company=company, role=role, answer=feedback_prompt)
-    return {"feedback": feedback}
+async def hr_interview_feedback(request: HRInterviewStartRequest, session_id: str = Depends(get_session_id)):
+    job = await submit_feedback(session_id, "hr", company=request.company, role=request.role)
+    return {"feedback": await finished_feedback(job)}
 
 @router.post("/hr_interview/voice_answer")
-async def hr_interview_voice_answer(file: UploadFile = File(...)):
-    from services.stt_service import analyze_audio_with_assemblyai
-    from utils.audio_convert import convert_webm_to_mp3
-    import tempfile, os
-    # Save uploaded file to temp
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.webm') as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
-    # Check file size
-    file_size = os.path.getsize(tmp_path)
-    if file_size == 0:
-        os.unlink(tmp_path)
-        raise HTTPException(400, detail="Uploaded audio file is empty. Please try recording again.")
-    # Convert webm to mp3 if needed
+async def hr_interview_voice_answer(request: Request):
+    # Rejects empty and speechless uploads before anything is sent to AssemblyAI
+    file_ext, chunks = await open_audio_stream(request)
+    # Transcribe
     try:
-        mp3_path = tmp_path + '.mp3'
-        convert_webm_to_mp3(tmp_path, mp3_path)
-        os.unlink(tmp_path)
-        audio_path = mp3_path
-    except Exception as e:
-        os.unlink(tmp_path)
+        result = await analyze_audio_with_assemblyai(await prepare_speech_for_stt(chunks, file_ext))
+    except AudioConversionError as e:
         raise HTTPException(400, detail=f"Audio conversion failed: {str(e)}")
-    # Transcribe
-    result = analyze_audio_with_assemblyai(audio_path)
     transcript = result.get('text', '')
-    # Clean up temp file
-    if os.path.exists(audio_path):
-        os.unlink(audio_path)
     return {"transcript": transcript}
 
 @router.post("/hr_interview/voice_answer_and_next")
-async def hr_interview_voice_answer_and_next(file: UploadFile = File(...)):
-    from services.stt_service import analyze_audio_with_assemblyai
-    from database.chat_history import save_messages
-    from services.gemini_service import get_hr_interview_question
-    import tempfile
-    import os
-    # Save uploaded file to temp
-    with tempfile.NamedTemporaryFile(delete=False, suffix=file.filename) as tmp:
-        tmp.write(await file.read())
-        tmp_path = tmp.name
+async def hr_interview_voice_answer_and_next(request: Request, session_id: str = Depends(get_session_id)):
+    file_ext, chunks = await open_audio_stream(request)
     # Transcribe
-    result = analyze_audio_with_assemblyai(tmp_path)
+    result = await analyze_audio_with_assemblyai(await prepare_speech_for_stt(chunks, file_ext))
     transcript = result.get('text', '')
-    # Save answer
-    save_messages(transcript, "")
-    # Get company/role
-    company = ""
-    role = ""
-    if os.path.exists("company.txt"):
-        with open("company.txt", encoding="utf-8") as f:
-            company = f.read().strip()
-    if os.path.exists("position.txt"):
-        with open("position.txt", encoding="utf-8") as f:
-            role = f.read().strip()
-    # Add instruction to keep questions short
-    next_question = await get_hr_interview_question(
-        company=company,
-        role=role,
-        previous_answers=[transcript],
-        instruction="Keep the question under 18 words."
-    )
+    # Add instruction to keep questions short (banked questions already are)
+    next_question = await _next_hr_question(session_id, transcript, instruction="Keep the question under 18 words.")
     return {"transcript": transcript, "next_question": next_question}
\ No newline at end of file
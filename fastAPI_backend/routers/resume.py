@@ -1,19 +1,23 @@
-from fastapi import APIRouter, UploadFile
-import shutil
-import pdfplumber
-from pathlib import Path
-import os
+from fastapi import APIRouter, UploadFile, HTTPException, Depends
+from database.chat_history import update_settings
+from services.resume_service import extract_resume_text
+from services.resume_index import save_resume_index
+from utils.executors import run_in
+from utils.session import get_session_id
+from utils.tracing import stage
 
 router = APIRouter()
 
+MAX_RESUME_BYTES = 10 * 1024 * 1024
+
 @router.post("/analyze_resume")
-async def analyze_resume(file: UploadFile):
-    temp_filename = "temp_resume.pdf"
-    with open(temp_filename, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    with pdfplumber.open(temp_filename) as pdf:
-        resume_text = "\n".join(page.extract_text() or "" for page in pdf.pages)
-    os.remove(temp_filename)
-    with open("resume_context.txt", "w", encoding="utf-8") as f:
-        f.write(resume_text)
-    return {"message": "Resume uploaded and context saved."}
\ No newline at end of file
+async def analyze_resume(file: UploadFile, session_id: str = Depends(get_session_id)):
+    data = await file.read()
+    if len(data) > MAX_RESUME_BYTES:
+        raise HTTPException(413, detail="Resume file is too large")
+    with stage("resume_parse"):
+        resume_hash, resume_text = await extract_resume_text(data)
+    with stage("resume_index"):
+        await run_in("blocking", save_resume_index, resume_hash, resume_text)
+    await run_in("blocking", update_settings, session_id, resume_hash=resume_hash)
+    return {"message": "Resume uploaded and context saved."}
@@ -0,0 +1,72 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import PlainTextResponse, JSONResponse
+from database.state_backend import state
+from database.write_behind import write_behind
+from services.feedback_jobs import feedback_job_stats
+from services.llm_scheduler import llm_scheduler
+from services.registry import services
+from utils.executors import executor_stats, run_in
+from utils.tracing import render_metrics
+
+router = APIRouter()
+
+@router.get("/ready")
+async def ready(warm: bool = Query(False)):
+    """
+    Readiness probe: 200 once this worker can reach the shared session state.
+    Backend clients are created on first use; pass ?warm=true to build them,
+    open their connections and fill the TTS cache in the background. The
+    response shows which services exist yet and how warm-up is going.
+    """
+    try:
+        await run_in("blocking", state.stat, "ready")
+    except Exception as e:
+        return JSONResponse({"ready": False, "error": str(e)}, status_code=503)
+    if warm:
+        services.start_warm_up()
+    return {"ready": True, **services.snapshot()}
+
+@router.get("/status/executors")
+async def get_executor_stats():
+    # Per-pool worker usage, queue depth and wait times
+    return executor_stats()
+
+@router.get("/status/llm")
+async def get_llm_stats():
+    # Scheduler budgets, queue depth per priority and retry counters
+    return llm_scheduler.snapshot()
+
+@router.get("/status/feedback_jobs")
+async def get_feedback_job_stats():
+    return feedback_job_stats()
+
+@router.get("/status/write_behind")
+async def get_write_behind_stats():
+    # Writes queued, merged, replaced before landing, and failed
+    return write_behind.snapshot()
+
+@router.get("/metrics")
+async def metrics():
+    # Prometheus text format: request and per-stage latency histograms plus executor pool gauges
+    lines = [render_metrics()]
+    for metric, field, kind in (
+        ("interview_executor_active", "active", "gauge"),
+        ("interview_executor_queued", "queued", "gauge"),
+        ("interview_executor_rejected_total", "rejected", "counter"),
+    ):
+        lines.append(f"# TYPE {metric} {kind}")
+        lines.extend(f'{metric}{{pool="{pool}"}} {stats[field]}' for pool, stats in executor_stats().items())
+    llm = llm_scheduler.snapshot()
+    for metric, field, kind in (
+        ("interview_llm_in_flight", "in_flight", "gauge"),
+        ("interview_llm_calls_total", "calls", "counter"),
+        ("interview_llm_coalesced_total", "coalesced", "counter"),
+        ("interview_llm_retries_total", "retries", "counter"),
+        ("interview_llm_rate_limited_total", "rate_limited", "counter"),
+        ("interview_llm_failures_total", "failures", "counter"),
+    ):
+        lines.append(f"# TYPE {metric} {kind}")
+        lines.append(f"{metric} {llm[field]}")
+    lines.append("# TYPE interview_llm_waiting gauge")
+    lines.extend(f'interview_llm_waiting{{priority="{p}"}} {n}' for p, n in sorted(llm["waiting_by_priority"].items()))
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
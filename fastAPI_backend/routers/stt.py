@@ -0,0 +1,22 @@
+import hmac
+from fastapi import APIRouter, Body, Header, HTTPException
+from typing import Optional
+from services.stt_service import get_stt_client, ASSEMBLYAI_WEBHOOK_URL, ASSEMBLYAI_WEBHOOK_SECRET
+
+router = APIRouter()
+
+@router.post("/stt/webhook") # AssemblyAI transcript completion callback
+async def assemblyai_webhook(
+    payload: dict = Body(...),
+    x_webhook_secret: Optional[str] = Header(None),
+):
+    # Only enabled together with its secret (see services/stt_service.py)
+    if not ASSEMBLYAI_WEBHOOK_URL:
+        raise HTTPException(404, detail="Transcript webhooks are not enabled")
+    if not hmac.compare_digest((x_webhook_secret or "").encode(), ASSEMBLYAI_WEBHOOK_SECRET.encode()):
+        raise HTTPException(401, detail="Invalid webhook secret")
+    transcript_id = payload.get("transcript_id")
+    if not transcript_id:
+        raise HTTPException(400, detail="Missing transcript_id")
+    await get_stt_client().complete_webhook(transcript_id, payload.get("status"))
+    return {"message": "ok"}
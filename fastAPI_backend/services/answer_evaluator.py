@@ -0,0 +1,270 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import numpy as np
+from database.chat_history import load_messages
+from database.analysis_store import save_evaluation, load_evaluations, load_answers
+from utils.executors import run_in
+
+# Every answer is scored on these (0-10) in the background as soon as it is
+# saved, so the end-of-interview feedback only has to merge small records
+CRITERIA = ("confidence", "tone", "sentiment", "accuracy", "empathy", "articulation", "star")
+PASS_SCORE = 6
+# Notes from at most this many answers (the weakest and the strongest) go into
+# the final summary prompt, which keeps it the same size however long the interview was
+FEEDBACK_SUMMARY_NOTES = int(os.getenv("FEEDBACK_SUMMARY_NOTES", "6"))
+
+# (report heading, criterion, what the summary should say about it)
+TECHNICAL_SECTIONS = (
+    ("Confidence", "confidence", "one sentence on the candidate's confidence"),
+    ("Tone", "tone", "one sentence on their tone"),
+    ("Sentiment", "sentiment", "one sentence on the sentiment of their answers"),
+    ("Accuracy", "accuracy", "one sentence on the accuracy of their answers"),
+)
+HR_SECTIONS = (
+    ("😊 Emotional Tone", "tone", "one sentence on their emotional tone"),
+    ("💬 Empathy", "empathy", "one sentence on their empathy"),
+    ("⭐ STAR Method", "star", "one sentence on their use of the STAR method"),
+    ("💡 Articulation", "articulation", "one sentence on their articulation"),
+)
+
+_pending = {}
+_JSON_OBJECT = re.compile(r"\{.*\}", re.S)
+_SUMMARY_LINE = re.compile(r"^[\s*#-]*(\w+)[\s*]*:\s*(\S.*)$")
+
+def answer_key(question, answer):
+    return hashlib.sha1(f"{question}\n{answer}".encode("utf-8")).hexdigest()[:16]
+
+def _answer_pairs(session_id):
+    # (question, answer) for every answer in the history, in order
+    pairs = []
+    question = ""
+    for m in load_messages(session_id):
+        if m["role"] == "assistant":
+            question = m["content"]
+        elif m["role"] == "user":
+            pairs.append((question, m["content"]))
+    return pairs
+
+def _parse_json(reply):
+    match = _JSON_OBJECT.search(reply or "")
+    if not match:
+        raise ValueError(f"No JSON object in reply: {reply!r}")
+    return json.loads(match.group(0))
+
+def _score(value):
+    try:
+        return min(10, max(0, int(round(float(value)))))
+    except (TypeError, ValueError):
+        return None
+
+def _evaluation_prompt(question, answer):
+    return (
+        "You are grading one answer from a job interview. Score it from 0 to 10 on each criterion:\n"
+        "confidence: how sure and decisive the candidate sounds\n"
+        "tone: how professional and positive the tone is\n"
+        "sentiment: how positive the overall sentiment is\n"
+        "accuracy: how correct and relevant the answer is to the question\n"
+        "empathy: awareness of other people (teammates, users, customers)\n"
+        "articulation: clarity and structure\n"
+        "star: use of the STAR method (Situation, Task, Action, Result); 0 if no example is given\n"
+        "Reply with JSON only, for example: "
+        '{"confidence": 7, "tone": 8, "sentiment": 6, "accuracy": 7, "empathy": 5, "articulation": 7, "star": 4, '
+        '"strength": "<under 12 words>", "improve": "<under 12 words>"}\n\n'
+        f"Question: {question or '(none)'}\nAnswer: {answer}"
+    )
+
+async def evaluate_answer(session_id, question, answer, priority):
+    """Score one answer with the LLM and save the result with the session's analysis."""
+    from services.gemini_service import generate_text
+    data = _parse_json(await generate_text(_evaluation_prompt(question, answer), priority))
+    evaluation = {criterion: _score(data.get(criterion)) for criterion in CRITERIA}
+    evaluation["strength"] = str(data.get("strength") or "")[:120]
+    evaluation["improve"] = str(data.get("improve") or "")[:120]
+    save_evaluation(session_id, answer_key(question, answer), evaluation)
+    return evaluation
+
+async def _background_evaluation(session_id, question, answer):
+    from services.gemini_service import PRIORITY_BACKGROUND
+    try:
+        return await evaluate_answer(session_id, question, answer, PRIORITY_BACKGROUND)
+    except Exception as e:
+        # The final feedback evaluates whatever is missing
+        print("Answer evaluation failed:", e)
+        return None
+
+async def schedule_answer_evaluation(session_id):
+    """Score the session's latest answer in the background."""
+    pairs = await run_in("blocking", _answer_pairs, session_id)
+    if not pairs:
+        return
+    question, answer = pairs[-1]
+    key = (session_id, answer_key(question, answer))
+    if key in _pending:
+        return
+    task = asyncio.get_running_loop().create_task(_background_evaluation(session_id, question, answer))
+    _pending[key] = task
+    task.add_done_callback(lambda _: _pending.pop(key, None))
+
+async def _session_evaluations(session_id, pairs):
+    from services.gemini_service import PRIORITY_FEEDBACK
+    saved = await run_in("blocking", load_evaluations, session_id)
+
+    async def one(question, answer):
+        key = answer_key(question, answer)
+        if key in saved:
+            return saved[key]
+        pending = _pending.get((session_id, key))
+        if pending is not None:
+            evaluation = await asyncio.shield(pending)
+            if evaluation is not None:
+                return evaluation
+        try:
+            return await evaluate_answer(session_id, question, answer, PRIORITY_FEEDBACK)
+        except Exception as e:
+            print("Answer evaluation failed:", e)
+            return None
+
+    return await asyncio.gather(*(one(question, answer) for question, answer in pairs))
+
+def _vocal_summary(answers):
+    # One line over all recorded answers, whatever their number
+    features = [a.get("features") or {} for a in answers]
+    def mean(values):
+        values = [v for v in values if v is not None]
+        return round(float(np.mean(values)), 2) if values else None
+    return (
+        f"{len(answers)} spoken answers: transcript confidence={mean([a.get('confidence') for a in answers])}, "
+        f"wpm={mean([f.get('wpm') for f in features])}, "
+        f"fillers_per_100_words={mean([f.get('filler_rate') for f in features])}, "
+        f"long_pauses={mean([f.get('long_pause_count') for f in features])}, "
+        f"positive_share={mean([f.get('sentiment_mix', {}).get('positive') for f in features])}"
+    )
+
+def _notes(evaluations, criteria):
+    # Strengths and weaknesses of the weakest and the strongest answers
+    scored = []
+    for number, evaluation in enumerate(evaluations, 1):
+        if evaluation is not None:
+            values = [evaluation[c] for c in criteria if evaluation.get(c) is not None]
+            scored.append((np.mean(values) if values else 0.0, number, evaluation))
+    scored.sort(key=lambda s: s[0])
+    half = FEEDBACK_SUMMARY_NOTES // 2
+    picked = scored if len(scored) <= FEEDBACK_SUMMARY_NOTES else scored[:half] + scored[-(FEEDBACK_SUMMARY_NOTES - half):]
+    return "\n".join(
+        f"Answer {number} ({score:.1f}/10): strength: {e['strength'] or '-'}; to improve: {e['improve'] or '-'}"
+        for score, number, e in sorted(picked, key=lambda s: s[1])
+    )
+
+def _summary_prompt(kind, company, role, sections, averages, answer_count, notes, vocal):
+    interview = f"an HR interview for the role of {role} at {company}" if kind == "hr" else "a technical interview"
+    lines = [f"{criterion}: <{describe}>" for _, criterion, describe in sections]
+    if kind == "hr":
+        lines += ["tip: <actionable tip>"] * 3
+    else:
+        lines.append("summary: <2-3 sentence overall summary>")
+    return (
+        f"You are writing the final feedback for {interview}. Each of the candidate's {answer_count} answers was "
+        "already scored from 0 to 10. Average scores:\n"
+        + "\n".join(f"{criterion}: {averages[criterion]:.1f}" for _, criterion, _ in sections)
+        + f"\n\nNotes on individual answers:\n{notes or '(none)'}\n"
+        + (f"\nVocal analysis: {vocal}\n" if vocal else "")
+        + "\nReply with exactly these lines, in this order, and nothing else:\n"
+        + "\n".join(lines)
+    )
+
+def _read_line(line, texts):
+    # One "field: text" line of the summary reply; anything else is ignored
+    match = _SUMMARY_LINE.match(line)
+    if not match:
+        return
+    field, text = match.group(1).lower(), match.group(2).strip()
+    if field == "tip":
+        texts.setdefault("tips", []).append(text)
+    else:
+        texts.setdefault(field, text)
+
+def _render(kind, sections, averages, texts, final=True):
+    """
+    The report's lines for the summary texts received so far. Until `final`
+    it stops at the first section still waiting for its text, so lines
+    rendered earlier never change.
+    """
+    lines = []
+    for title, criterion, _ in sections:
+        if not final and criterion not in texts:
+            return lines
+        if kind == "hr":
+            lines += [title, f"• Score: {averages[criterion]:.1f}/10"]
+            if texts.get(criterion):
+                lines.append(f"• {texts[criterion]}")
+            lines.append("")
+        else:
+            lines.append(f"{title}: {averages[criterion]:.1f}/10 - {texts.get(criterion) or 'Averaged over all answers.'}")
+    if kind == "hr":
+        lines.append("📦 Summary & Actionable Tips")
+        lines += [f"✅ {tip}" for tip in texts.get("tips", [])]
+        if final and not texts.get("tips"):
+            lines.append("✅ Keep practising with concrete examples from your experience")
+        return lines
+    if not final and "summary" not in texts:
+        return lines
+    total = float(np.mean([averages[criterion] for _, criterion, _ in sections]))
+    lines.append(f"Overall Summary: {texts.get('summary') or ''}")
+    lines.append(f"Total Score: {total:.1f}/10")
+    lines.append(f"Verdict: {'PASS' if total >= PASS_SCORE else 'FAIL'}")
+    return lines
+
+def _new_lines(lines, sent):
+    # Report text for lines[sent:], continuing what was already sent
+    return ("\n" if sent else "") + "\n".join(lines[sent:])
+
+async def feedback_report(session_id, kind, company="", role=""):
+    """
+    Final feedback for a technical or HR interview, merged from the per-answer
+    evaluations: averages computed here, plus one short LLM call for the wording.
+    Answers whose evaluation is missing (still queued, or failed) are scored now.
+    Yields the report in pieces as the LLM call streams, a section at a time.
+    """
+    from services.gemini_service import stream_text, PRIORITY_FEEDBACK
+    sections = HR_SECTIONS if kind == "hr" else TECHNICAL_SECTIONS
+    pairs = await run_in("blocking", _answer_pairs, session_id)
+    evaluations = await _session_evaluations(session_id, pairs)
+    scores = np.array(
+        [[np.nan if e.get(c) is None else e[c] for c in CRITERIA] for e in evaluations if e is not None],
+        dtype=float,
+    ).reshape(-1, len(CRITERIA))
+    if not pairs:
+        yield "\n".join(_render(kind, sections, {criterion: 0.0 for criterion in CRITERIA}, {"summary": "No answers were recorded in this interview."}))
+        return
+    if not len(scores):
+        raise RuntimeError("None of the answers could be evaluated")
+    with np.errstate(all="ignore"):
+        means = np.nan_to_num(np.nanmean(scores, axis=0))
+    averages = dict(zip(CRITERIA, means.tolist()))
+    vocal = ""
+    if kind != "hr":
+        answers = await run_in("blocking", load_answers, session_id)
+        vocal = _vocal_summary(answers) if answers else ""
+    prompt = _summary_prompt(
+        kind, company, role, sections, averages, len(pairs),
+        _notes(evaluations, [criterion for _, criterion, _ in sections]), vocal,
+    )
+    texts = {}
+    sent = 0
+    pending = ""
+    async for chunk in stream_text(prompt, PRIORITY_FEEDBACK):
+        *complete, pending = (pending + chunk).split("\n")
+        for line in complete:
+            _read_line(line, texts)
+        lines = _render(kind, sections, averages, texts, final=False)
+        if len(lines) > sent:
+            yield _new_lines(lines, sent)
+            sent = len(lines)
+    _read_line(pending, texts)
+    # Sections the reply left out still get their scores
+    lines = _render(kind, sections, averages, texts)
+    if len(lines) > sent:
+        yield _new_lines(lines, sent)
@@ -0,0 +1,247 @@
+import asyncio
+import contextvars
+import json
+import os
+import time
+import uuid
+from fastapi import HTTPException
+from database.chat_history import load_messages, get_summary
+from database.state_backend import state
+from database.write_behind import write_behind
+from services.answer_evaluator import feedback_report
+from utils.executors import ExecutorBusy, run_in
+from utils.tracing import stage_seconds
+
+# End-of-interview feedback runs as background jobs on a few dedicated
+# workers, so a burst of interviews ending together queues here (at the
+# scheduler's feedback priority) instead of competing with live turns.
+FEEDBACK_WORKERS = int(os.getenv("FEEDBACK_WORKERS", "2"))
+FEEDBACK_QUEUE_SIZE = int(os.getenv("FEEDBACK_QUEUE_SIZE", "64"))
+# Jobs stay pollable, and their reports reusable until the interview changes, this long
+FEEDBACK_JOB_TTL = float(os.getenv("FEEDBACK_JOB_TTL", "3600"))
+# A job still unfinished after this long is assumed lost with its worker and is resubmitted
+FEEDBACK_JOB_TIMEOUT = float(os.getenv("FEEDBACK_JOB_TIMEOUT", "600"))
+# How often a job running on another worker is re-read while waiting for it
+FEEDBACK_POLL_INTERVAL = 0.25
+
+# Job records live in the shared state backend, so a job can be polled from
+# any worker and a report made on one worker is reused by all of them:
+#   feedback_job:<job id>           the job's public fields
+#   feedback:<session id>:<kind>    {"job_id", "fingerprint"} of the session's latest job
+# A job runs on the worker that queued it; _jobs holds that worker's own jobs.
+_JOB_FIELDS = ("id", "session_id", "kind", "company", "role", "fingerprint", "status",
+               "created", "started", "finished", "parts", "feedback", "error")
+_jobs = {}
+_queue = None
+_workers = []
+_loop = None
+
+def _fingerprint(session_id, kind, company, role):
+    # Changes whenever the interview does: a new answer, or a reset/new interview
+    _, epoch = get_summary(session_id)
+    return f"{kind}:{epoch}:{len(load_messages(session_id))}:{company}:{role}"
+
+def _save_job(job):
+    # Written behind the job; each save replaces any still queued for it
+    key = f"feedback_job:{job['id']}"
+    write_behind.put(key, key, json.dumps({f: job[f] for f in _JOB_FIELDS}).encode("utf-8"), FEEDBACK_JOB_TTL)
+
+def _load_job(job_id):
+    write_behind.flush(f"feedback_job:{job_id}")
+    record = state.get(f"feedback_job:{job_id}")
+    return json.loads(record) if record is not None else None
+
+def _notify(job):
+    # Wake everyone waiting on the job; later waiters pick up the fresh event
+    wake = job["_wake"]
+    job["_wake"] = asyncio.Event()
+    wake.set()
+
+async def _run(job):
+    job["status"] = "running"
+    job["started"] = time.time()
+    stage_seconds.observe(job["started"] - job["created"], "feedback_queue")
+    _save_job(job)
+    _notify(job)
+    try:
+        # Answers were scored as they came in, so this is a merge plus one short LLM call
+        async for part in feedback_report(job["session_id"], job["kind"], job["company"], job["role"]):
+            job["parts"].append(part)
+            # Saved as it grows so followers on other workers can stream it too
+            _save_job(job)
+            _notify(job)
+        job["feedback"] = "".join(job["parts"])
+        job["status"] = "done"
+    except Exception as e:
+        print(f"Feedback job {job['id']} for session {job['session_id']} failed:", e)
+        job["status"] = "failed"
+        job["error"] = str(e)
+    finally:
+        job["finished"] = time.time()
+        stage_seconds.observe(job["finished"] - job["started"], "feedback_job")
+        _save_job(job)
+        _notify(job)
+
+async def _worker():
+    while True:
+        job = await _queue.get()
+        try:
+            await _run(job)
+        finally:
+            _queue.task_done()
+
+def _ensure_workers():
+    global _queue, _loop
+    loop = asyncio.get_running_loop()
+    if _loop is loop:
+        return
+    _queue = asyncio.Queue(FEEDBACK_QUEUE_SIZE)
+    _loop = loop
+    _workers.clear()
+    for _ in range(FEEDBACK_WORKERS):
+        # Start workers outside the submitting request's context so their
+        # stages don't end up in that request's Server-Timing
+        _workers.append(contextvars.Context().run(loop.create_task, _worker()))
+
+def _prune():
+    cutoff = time.time() - FEEDBACK_JOB_TTL
+    for job_id in [j["id"] for j in _jobs.values() if j["finished"] and j["finished"] < cutoff]:
+        del _jobs[job_id]
+
+def _reusable(job, fingerprint):
+    if job is None or job["fingerprint"] != fingerprint or job["status"] == "failed":
+        return False
+    return job["status"] == "done" or time.time() - job["created"] < FEEDBACK_JOB_TIMEOUT
+
+async def submit_feedback(session_id, kind, company="", role=""):
+    """
+    Return the feedback job for the session's interview as it stands: the
+    finished job if nothing changed since its report was generated, the job
+    already queued or running for it (on any worker), or a newly queued job.
+    Raises ExecutorBusy if the queue is full. Must be called from the event loop.
+    """
+    _ensure_workers()
+    _prune()
+    key = f"feedback:{session_id}:{kind}"
+    fingerprint = await run_in("blocking", _fingerprint, session_id, kind, company, role)
+    # Held so two workers asked for the same report don't both generate it
+    async with state.alock(key):
+        latest = await run_in("blocking", state.get, key)
+        latest = json.loads(latest) if latest is not None else {}
+        if latest.get("fingerprint") == fingerprint:
+            job = await get_job(latest["job_id"])
+            if _reusable(job, fingerprint):
+                return job
+        job = {
+            "id": uuid.uuid4().hex,
+            "session_id": session_id,
+            "kind": kind,
+            "company": company,
+            "role": role,
+            "fingerprint": fingerprint,
+            "status": "queued",
+            "created": time.time(),
+            "started": None,
+            "finished": None,
+            "parts": [],
+            "feedback": None,
+            "error": None,
+            "_wake": asyncio.Event(),
+        }
+        try:
+            _queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise ExecutorBusy("feedback")
+        _jobs[job["id"]] = job
+        _save_job(job)
+        # The record lands before the pointer to it, so another worker never finds a pointer without its job
+        await run_in("blocking", write_behind.flush, f"feedback_job:{job['id']}")
+        pointer = json.dumps({"job_id": job["id"], "fingerprint": fingerprint}).encode("utf-8")
+        await run_in("blocking", state.put, key, pointer, FEEDBACK_JOB_TTL)
+    return job
+
+async def get_job(job_id):
+    """The job, whichever worker runs it, or None if it is unknown or expired."""
+    return _jobs.get(job_id) or await run_in("blocking", _load_job, job_id)
+
+def job_finished(job):
+    return job["status"] in ("done", "failed")
+
+async def _refresh(job):
+    # A job running on another worker is followed through its record
+    await asyncio.sleep(FEEDBACK_POLL_INTERVAL)
+    record = await run_in("blocking", _load_job, job["id"])
+    if record is None:
+        job.update(status="failed", error="Feedback job expired")
+    else:
+        job.update(record)
+
+async def wait_for_job(job, timeout=None):
+    """Wait until the job finishes, or up to `timeout` seconds. Returns the job."""
+    async def wait():
+        while not job_finished(job):
+            if "_wake" in job:
+                await job["_wake"].wait()
+            else:
+                await _refresh(job)
+    try:
+        await asyncio.wait_for(wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    return job
+
+async def finished_feedback(job):
+    """Wait for a feedback job and return its report, or raise a 500 if generation failed."""
+    await wait_for_job(job)
+    if job["status"] != "done":
+        raise HTTPException(500, detail=job["error"])
+    return job["feedback"]
+
+async def follow_job(job):
+    """
+    Yield the job's report from the start, a section at a time as the
+    summary streams in; parts of a job on another worker arrive every
+    FEEDBACK_POLL_INTERVAL.
+    """
+    sent = 0
+    while True:
+        wake = job.get("_wake")
+        while sent < len(job["parts"]):
+            sent += 1
+            yield job["parts"][sent - 1]
+        if job_finished(job):
+            return
+        if wake is not None:
+            await wake.wait()
+        else:
+            await _refresh(job)
+
+def job_view(job):
+    view = {
+        "job_id": job["id"],
+        "session_id": job["session_id"],
+        "kind": job["kind"],
+        "status": job["status"],
+    }
+    if job["status"] == "done":
+        view["feedback"] = job["feedback"]
+    elif job["status"] == "running":
+        view["partial"] = "".join(job.get("parts", []))
+    elif job["status"] == "failed":
+        view["error"] = job["error"]
+    return view
+
+def feedback_job_stats():
+    return {
+        "workers": FEEDBACK_WORKERS,
+        "queued": _queue.qsize() if _queue is not None else 0,
+        "running": sum(1 for j in _jobs.values() if j["status"] == "running"),
+        "jobs": len(_jobs),
+    }
+
+def stop_feedback_workers():
+    global _loop
+    for task in _workers:
+        task.cancel()
+    _workers.clear()
+    _loop = None
@@ -1,50 +1,195 @@
-import google.generativeai as genai
+import asyncio
+import contextvars
 import os
+import threading
+import time
 from dotenv import load_dotenv
+from services.llm_scheduler import llm_scheduler, PRIORITY_INTERACTIVE, PRIORITY_FEEDBACK, PRIORITY_BACKGROUND
+from services.registry import services
+from utils.executors import run_in
+from utils.tracing import stage, record_stage
+from utils.session import DEFAULT_SESSION_ID
 
 load_dotenv()
 
-gemini_api_key = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=gemini_api_key)
-gemini_model = genai.GenerativeModel("models/gemini-1.5-flash-latest")
+GEMINI_MODEL = "models/gemini-1.5-flash-latest"
 
-def get_chat_response(user_message): #technical interview
-    from database.chat_history import load_messages, save_messages
-    messages = load_messages()
-    messages.append({"role": "user", "content": user_message['text']})
-    resume_context = ""
+def _create_model():
+    # google.generativeai takes most of a second to import, so it is only loaded on first use
+    import google.generativeai as genai
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    return genai.GenerativeModel(GEMINI_MODEL)
+
+def _warm_model(model):
+    # One metadata call sets up the client's connection
+    import google.generativeai as genai
+    genai.get_model(GEMINI_MODEL)
+
+services.register("gemini", _create_model, warm=_warm_model)
+
+HR_INTRO_QUESTION = "Let's start with an introduction. Tell me about yourself."
+
+def _build_chat_prompt(user_text, session_id):
+    from database.chat_history import get_settings, load_messages
+    from services.prompt_builder import build_chat_prompt
+    from services.resume_index import relevant_resume_context
+    # Retrieve resume sections matching the current topic: the last question plus the answer to it
+    last_question = next((m["content"] for m in reversed(load_messages(session_id)) if m["role"] == "assistant"), "")
+    resume_context = relevant_resume_context(get_settings(session_id).get("resume_hash"), f"{last_question}\n{user_text}")
+    return build_chat_prompt(user_text, session_id, context=resume_context)
+
+def _generate_text(prompt):
+    return services.get("gemini").generate_content(prompt).text
+
+async def generate_text(prompt, priority=PRIORITY_INTERACTIVE):
+    # Gemini's client is blocking; run it on the network pool once the
+    # scheduler has budget for it
+    with stage("llm"):
+        return await llm_scheduler.generate(prompt, lambda: run_in("network", _generate_text, prompt), priority)
+
+_turn_tasks = set()
+
+async def _after_turn(session_id, summarize):
+    from services.answer_evaluator import schedule_answer_evaluation
+    from services.prompt_builder import schedule_summary_update
+    await schedule_answer_evaluation(session_id)
+    if summarize:
+        await schedule_summary_update(session_id, lambda prompt: generate_text(prompt, PRIORITY_BACKGROUND))
+
+def record_turn(user_text, reply, session_id, summarize=True):
+    """
+    Save a turn behind the reply, then start its answer evaluation (and
+    summary update) in the background. Both read the history, which waits
+    for the queued turn to land, so none of it is on the reply's path.
+    Must be called from the event loop.
+    """
+    from database.chat_history import queue_messages
+    queue_messages(user_text, reply, session_id)
+    # Outside the request's context, so its stages stay out of the request's Server-Timing
+    task = contextvars.Context().run(asyncio.get_running_loop().create_task, _after_turn(session_id, summarize))
+    _turn_tasks.add(task)
+    task.add_done_callback(_turn_tasks.discard)
+
+async def _stream_once(prompt):
+    # generate_content(stream=True) is a blocking iterator; drain it on a
+    # worker thread and hand chunks back to the event loop as they arrive
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    done = object()
+    # Set when the consumer stops early, so the thread (and its pool slot) doesn't drain the rest of the reply
+    cancelled = threading.Event()
+
+    def produce():
+        try:
+            for chunk in services.get("gemini").generate_content(prompt, stream=True):
+                if cancelled.is_set():
+                    break
+                if chunk.text:
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk.text)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    def producer_done(future):
+        # produce() reports its own errors; this only sees the pool turning the job away
+        if not future.cancelled() and future.exception() is not None:
+            queue.put_nowait(future.exception())
+
+    producer = asyncio.ensure_future(run_in("network", produce))
+    producer.add_done_callback(producer_done)
     try:
-        with open("resume_context.txt", "r", encoding="utf-8") as f:
-            resume_context = f.read().strip()
-    except Exception:
-        pass
-    prompt = ""
-    if resume_context:
-        prompt += f"Resume Context:\n{resume_context}\n\n"
-    prompt += "\n".join(f"{m['role']}: {m['content']}" for m in messages) + "\nAssistant:"
-    response = gemini_model.generate_content(prompt)
-    gemini_reply = response.text.strip()
-    save_messages(user_message['text'], gemini_reply)
+        while True:
+            item = await queue.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        cancelled.set()
+
+async def stream_text(prompt, priority=PRIORITY_INTERACTIVE):
+    # Streams are scheduled like any other call but never coalesced, and
+    # only retried if they fail before the first chunk reached the caller
+    started = time.perf_counter()
+    attempt = 0
+    while True:
+        attempt += 1
+        parts = []
+        try:
+            async with llm_scheduler.slot(prompt, priority) as usage:
+                async for chunk in _stream_once(prompt):
+                    if not parts:
+                        record_stage("llm_first_token", (time.perf_counter() - started) * 1000)
+                    parts.append(chunk)
+                    yield chunk
+                usage["reply"] = "".join(parts)
+            record_stage("llm", (time.perf_counter() - started) * 1000)
+            return
+        except Exception as e:
+            if parts or not await llm_scheduler.retry_after(e, attempt):
+                raise
+
+async def get_chat_response(user_message, session_id=DEFAULT_SESSION_ID): #technical interview
+    with stage("prompt"):
+        prompt = await run_in("blocking", _build_chat_prompt, user_message['text'], session_id)
+    gemini_reply = (await generate_text(prompt)).strip()
+    record_turn(user_message['text'], gemini_reply, session_id)
     return gemini_reply
 
-async def get_hr_interview_question(company, role, previous_answers, instruction=None):
-    if not previous_answers:
-        question = "Let's start with an introduction. Tell me about yourself."
-        if instruction:
-            # Try to apply instruction to the first question if possible
-            question = f"{question} ({instruction})" if instruction else question
-        return question
+async def stream_chat_response(user_message, session_id=DEFAULT_SESSION_ID): #technical interview
+    """
+    Same as get_chat_response, but yields the reply as Gemini produces it.
+    The full reply is saved to the chat history once the stream completes.
+    """
+    with stage("prompt"):
+        prompt = await run_in("blocking", _build_chat_prompt, user_message['text'], session_id)
+    parts = []
+    async for token in stream_text(prompt):
+        parts.append(token)
+        yield token
+    record_turn(user_message['text'], "".join(parts).strip(), session_id)
+
+def _build_hr_question_prompt(company, role, previous_answers, instruction=None):
     base_prompt = f"You are an HR interviewer for {company} hiring for the role of {role}. "
     if previous_answers:
         base_prompt += f"The candidate previously answered: {' | '.join(previous_answers)}. "
     base_prompt += "Ask the next common HR interview question relevant to this company and role. keep it under 30 words."
     if instruction:
         base_prompt += f" {instruction}"
-    response = gemini_model.generate_content(base_prompt)
-    return response.text.strip()
+    return base_prompt
 
-async def get_hr_feedback(company, role, answer):
-    prompt = f"""
+async def get_hr_interview_question(company, role, previous_answers, instruction=None):
+    if not previous_answers:
+        question = HR_INTRO_QUESTION
+        if instruction:
+            # Try to apply instruction to the first question if possible
+            question = f"{question} ({instruction})" if instruction else question
+        return question
+    base_prompt = _build_hr_question_prompt(company, role, previous_answers, instruction)
+    return (await generate_text(base_prompt)).strip()
+
+async def next_hr_question(company, role, previous_answers, asked=(), difficulty="", instruction=None):
+    """
+    Serve the next question from the precomputed question bank, falling back
+    to a live Gemini call when this session has used up the pool.
+    """
+    from services.question_bank import take_question
+    question = take_question(company, role, difficulty, asked)
+    if question:
+        return question
+    return await get_hr_interview_question(company, role, previous_answers, instruction)
+
+async def stream_hr_interview_question(company, role, previous_answers, instruction=None):
+    if not previous_answers:
+        yield await get_hr_interview_question(company, role, previous_answers, instruction)
+        return
+    async for token in stream_text(_build_hr_question_prompt(company, role, previous_answers, instruction)):
+        yield token
+
+def build_hr_feedback_prompt(company, role, answer):
+    return f"""
 You are an HR expert for {company} hiring for {role}. The candidate answered: '{answer}'.
 
 Provide detailed, visually organized feedback using:
@@ -79,5 +224,6 @@ Example format:
 
 Now, provide feedback in this format:
 """
-    response = gemini_model.generate_content(prompt)
-    return response.text.strip()
\ No newline at end of file
+
+async def get_hr_feedback(company, role, answer):
+    return (await generate_text(build_hr_feedback_prompt(company, role, answer), PRIORITY_FEEDBACK)).strip()
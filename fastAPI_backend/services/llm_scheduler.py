@@ -0,0 +1,216 @@
+import asyncio
+import hashlib
+import heapq
+import itertools
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from services.prompt_builder import estimate_tokens
+from utils.tracing import stage, record_stage
+
+# Budgets are for the whole deployment on this machine: each of the
+# WEB_CONCURRENCY worker processes (as started by uvicorn/gunicorn) gets an equal share
+LLM_WORKER_PROCESSES = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "60")) / LLM_WORKER_PROCESSES
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "1000000")) / LLM_WORKER_PROCESSES
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "4"))
+LLM_RETRY_BASE = float(os.getenv("LLM_RETRY_BASE", "0.5"))
+LLM_RETRY_MAX = float(os.getenv("LLM_RETRY_MAX", "8"))
+# Reply tokens reserved per call until the actual reply length is known
+LLM_OUTPUT_TOKENS = 256
+
+# Lower runs first: interview turns, then feedback the user is waiting on,
+# then background work (question bank refills, rolling summaries)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_FEEDBACK = 1
+PRIORITY_BACKGROUND = 2
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+def _status(error):
+    # google.api_core errors carry the HTTP status as .code
+    code = getattr(error, "code", None)
+    return code if isinstance(code, int) else None
+
+def is_retryable(error):
+    return _status(error) in RETRYABLE_STATUS or isinstance(error, (TimeoutError, ConnectionError))
+
+class TokenBucket:
+    """Refills at `per_minute / 60` per second up to `capacity`."""
+
+    def __init__(self, per_minute, burst_seconds=10):
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        # Requests bigger than the bucket go through once it is full
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount, now):
+        self._refill(now)
+        self.level -= amount
+
+    def drain(self):
+        self.level = min(self.level, 0.0)
+        self.updated = time.monotonic()
+
+class LLMScheduler:
+    """
+    Admits LLM calls in priority order while keeping under a requests-per-
+    minute and a tokens-per-minute budget and a concurrency cap. generate()
+    adds retries with jittered exponential backoff for rate limits and
+    transient errors, and makes concurrent calls with the same prompt share
+    one request.
+    """
+
+    def __init__(self, requests_per_minute=LLM_REQUESTS_PER_MINUTE, tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+                 max_concurrency=LLM_MAX_CONCURRENCY, max_attempts=LLM_MAX_ATTEMPTS):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max_attempts
+        self.in_flight = 0
+        self._waiting = []
+        self._seq = itertools.count()
+        self._timer = None
+        self._shared = {}
+        self.stats = {"calls": 0, "coalesced": 0, "retries": 0, "rate_limited": 0, "failures": 0}
+
+    def _dispatch(self):
+        self._timer = None
+        while self._waiting and self.in_flight < self.max_concurrency:
+            _, _, future, tokens = self._waiting[0]
+            if future.done():
+                # Waiter was cancelled
+                heapq.heappop(self._waiting)
+                continue
+            now = time.monotonic()
+            wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+            if wait > 0:
+                # Strict priority: nothing jumps the head of the queue while it waits for budget
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self._waiting)
+            self.requests.take(1, now)
+            self.tokens.take(tokens, now)
+            self.in_flight += 1
+            future.set_result(None)
+
+    def _release(self):
+        self.in_flight -= 1
+        if self._timer is None:
+            self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, prompt, priority=PRIORITY_INTERACTIVE):
+        """
+        Wait for a turn to call the LLM with `prompt`. Yields a dict; set its
+        "reply" to the reply text so the token budget is charged for it.
+        """
+        reserved = estimate_tokens(prompt) + LLM_OUTPUT_TOKENS
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (priority, next(self._seq), future, reserved))
+        requested = time.perf_counter()
+        if self._timer is None:
+            self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+        wait_ms = (time.perf_counter() - requested) * 1000
+        if wait_ms >= 1:
+            record_stage("llm_queue", wait_ms)
+        self.stats["calls"] += 1
+        usage = {"reply": None}
+        try:
+            yield usage
+        finally:
+            if usage["reply"] is not None:
+                # Settle the reservation against the reply we actually got
+                self.tokens.take(estimate_tokens(usage["reply"]) - LLM_OUTPUT_TOKENS, time.monotonic())
+            self._release()
+
+    async def retry_after(self, error, attempt):
+        """
+        Called when attempt number `attempt` failed with `error`. Returns
+        False if the call should give up, otherwise sleeps for a jittered
+        exponential backoff and returns True.
+        """
+        if _status(error) == 429:
+            # Everyone is over the limit, not just this call: stop admitting for a while
+            self.stats["rate_limited"] += 1
+            self.requests.drain()
+        if attempt >= self.max_attempts or not is_retryable(error):
+            self.stats["failures"] += 1
+            return False
+        self.stats["retries"] += 1
+        delay = min(LLM_RETRY_MAX, LLM_RETRY_BASE * 2 ** (attempt - 1))
+        with stage("llm_retry_wait"):
+            await asyncio.sleep(random.uniform(delay / 2, delay))
+        return True
+
+    async def _call(self, prompt, call, priority):
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                async with self.slot(prompt, priority) as usage:
+                    usage["reply"] = await call()
+                    return usage["reply"]
+            except Exception as e:
+                if not await self.retry_after(e, attempt):
+                    raise
+
+    async def generate(self, prompt, call, priority=PRIORITY_INTERACTIVE):
+        """
+        Run `await call()` (which sends `prompt` to the LLM and returns the
+        reply text) under the scheduler. Callers asking for an identical
+        prompt while it is in flight get the same reply.
+        """
+        key = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        shared = self._shared.get(key)
+        if shared is not None:
+            self.stats["coalesced"] += 1
+        else:
+            shared = {"task": asyncio.ensure_future(self._call(prompt, call, priority)), "waiters": 0}
+            self._shared[key] = shared
+            shared["task"].add_done_callback(lambda _: self._shared.pop(key, None))
+        shared["waiters"] += 1
+        try:
+            # Shielded so one caller going away doesn't cancel the call for the others
+            return await asyncio.shield(shared["task"])
+        except asyncio.CancelledError:
+            shared["waiters"] -= 1
+            if shared["waiters"] == 0:
+                shared["task"].cancel()
+            raise
+
+    def snapshot(self):
+        now = time.monotonic()
+        waiting = {}
+        for priority, _, future, _ in self._waiting:
+            if not future.done():
+                waiting[priority] = waiting.get(priority, 0) + 1
+        self.requests._refill(now)
+        self.tokens._refill(now)
+        return {
+            **self.stats,
+            "in_flight": self.in_flight,
+            "waiting_by_priority": waiting,
+            "request_budget": round(self.requests.level, 2),
+            "token_budget": round(self.tokens.level),
+        }
+
+llm_scheduler = LLMScheduler()
@@ -0,0 +1,106 @@
+import os
+import asyncio
+import threading
+from database.chat_history import load_messages, get_summary, save_summary
+from utils.executors import run_in
+from utils.session import DEFAULT_SESSION_ID
+from utils.tracing import prompt_tokens
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+# Turns (user + assistant message pairs) always sent verbatim
+PROMPT_RECENT_TURNS = int(os.getenv("PROMPT_RECENT_TURNS", "4"))
+# Older turns are folded into the summary in batches of this many turns
+SUMMARY_BATCH_TURNS = int(os.getenv("SUMMARY_BATCH_TURNS", "2"))
+
+_summaries_in_flight = set()
+_summary_tasks = set()
+_in_flight_lock = threading.Lock()
+
+def estimate_tokens(text):
+    # ~4 characters per token is close enough for English prose to budget with
+    return len(text) // 4 + 1
+
+def _format(messages):
+    return "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+
+def build_chat_prompt(user_text, session_id=DEFAULT_SESSION_ID, context="", budget=PROMPT_TOKEN_BUDGET):
+    """
+    Assemble the interview prompt within `budget` estimated tokens: system
+    prompt, optional extra context (skipped if the system prompt already
+    contains it), the rolling summary of older turns, then as many of the
+    unsummarized turns as fit.
+    """
+    messages = load_messages(session_id)
+    system = [m for m in messages if m["role"] == "system"]
+    history = [m for m in messages if m["role"] != "system"]
+    summary, _ = get_summary(session_id)
+
+    head = _format(system)
+    context = context.strip()
+    if context and context not in head:
+        head += f"\n\nRelevant resume sections:\n{context}"
+    if summary["text"]:
+        head += f"\n\nSummary of the interview so far:\n{summary['text']}"
+    tail = _format([{"role": "user", "content": user_text}]) + "\nAssistant:"
+
+    verbatim = history[summary["upto"]:]
+    used = estimate_tokens(head) + estimate_tokens(tail)
+    kept = []
+    kept_tokens = 0
+    # Walk backwards: the last PROMPT_RECENT_TURNS always go in, older
+    # unsummarized turns only while the budget allows
+    for message in reversed(verbatim):
+        cost = estimate_tokens(message["content"]) + 3
+        if used + cost > budget and len(kept) >= PROMPT_RECENT_TURNS * 2:
+            break
+        kept.append(message)
+        used += cost
+        kept_tokens += cost
+    kept.reverse()
+    prompt = head + "\n" + (_format(kept) + "\n" if kept else "") + tail
+    prompt_tokens.observe(estimate_tokens(prompt), "total")
+    prompt_tokens.observe(kept_tokens, "verbatim")
+    return prompt
+
+async def _summarize(session_id, generate, summary, epoch, turns, upto):
+    try:
+        prompt = (
+            "You are keeping notes on a job interview. Update the running summary with the new exchanges. "
+            "Keep the topics already covered, the candidate's key claims, strengths and weak spots. "
+            "Stay under 150 words and do not invent details.\n\n"
+            f"Current summary:\n{summary['text'] or '(none yet)'}\n\n"
+            f"New exchanges:\n{_format(turns)}\n\nUpdated summary:"
+        )
+        text = (await generate(prompt)).strip()
+        await run_in("blocking", save_summary, session_id, text, upto, epoch)
+    except Exception as e:
+        # The verbatim turns are still there; the next turn will retry
+        print("Summary update failed:", e)
+
+def _summary_state(session_id):
+    history = [m for m in load_messages(session_id) if m["role"] != "system"]
+    return history, get_summary(session_id)
+
+async def schedule_summary_update(session_id, generate):
+    """
+    Fold turns that fell out of the recent window into the session summary
+    as a background task. `await generate(prompt) -> str` calls the LLM.
+    """
+    history, (summary, epoch) = await run_in("blocking", _summary_state, session_id)
+    upto = len(history) - PROMPT_RECENT_TURNS * 2
+    if upto - summary["upto"] < SUMMARY_BATCH_TURNS * 2:
+        return
+    with _in_flight_lock:
+        if session_id in _summaries_in_flight:
+            return
+        _summaries_in_flight.add(session_id)
+    task = asyncio.get_running_loop().create_task(
+        _summarize(session_id, generate, summary, epoch, history[summary["upto"]:upto], upto)
+    )
+    _summary_tasks.add(task)
+    task.add_done_callback(lambda t: _summary_done(session_id, t))
+
+def _summary_done(session_id, task):
+    _summary_tasks.discard(task)
+    with _in_flight_lock:
+        _summaries_in_flight.discard(session_id)
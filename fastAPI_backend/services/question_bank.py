@@ -0,0 +1,99 @@
+import asyncio
+import os
+import random
+import re
+import time
+from collections import OrderedDict
+from utils.tracing import stage
+
+QUESTION_BANK_TTL = float(os.getenv("QUESTION_BANK_TTL", "3600"))
+QUESTION_BANK_MAX_POOLS = int(os.getenv("QUESTION_BANK_MAX_POOLS", "64"))
+# Questions generated per refill, and the most one pool keeps
+QUESTION_BANK_BATCH = int(os.getenv("QUESTION_BANK_BATCH", "8"))
+QUESTION_BANK_MAX_QUESTIONS = int(os.getenv("QUESTION_BANK_MAX_QUESTIONS", "40"))
+# Refill once a session has fewer than this many unasked questions left
+QUESTION_BANK_LOW_WATER = int(os.getenv("QUESTION_BANK_LOW_WATER", "3"))
+
+# Pools are shared by every session interviewing for the same (company, role,
+# difficulty); each session draws at random from the questions it has not
+# been asked yet. A pool expires QUESTION_BANK_TTL after its last refill.
+# Only touched from the event loop, so no locking is needed.
+_pools = OrderedDict()
+_refills = {}
+_LIST_PREFIX = re.compile(r"^\s*(?:\d+[.)]|[-*•])\s*")
+
+def _key(company, role, difficulty):
+    return (company.strip().lower(), role.strip().lower(), (difficulty or "").strip().lower())
+
+def _get_pool(key):
+    pool = _pools.get(key)
+    if pool is not None and time.monotonic() - pool["refreshed"] > QUESTION_BANK_TTL:
+        del _pools[key]
+        pool = None
+    if pool is not None:
+        _pools.move_to_end(key)
+    return pool
+
+def _batch_prompt(company, role, difficulty, count, existing):
+    prompt = (
+        f"You are an HR interviewer for {company} hiring for the role of {role}. "
+        f"Write {count} distinct common HR interview questions relevant to this company and role"
+        + (f" at {difficulty} level" if difficulty else "")
+        + ". Keep each question under 18 words. Put one question per line with no numbering or extra text."
+    )
+    if existing:
+        prompt += " Do not repeat any of these:\n" + "\n".join(existing)
+    return prompt
+
+def _parse_questions(text):
+    questions = []
+    for line in text.splitlines():
+        line = _LIST_PREFIX.sub("", line).strip().strip('"')
+        if line.endswith("?"):
+            questions.append(line)
+    return questions
+
+async def _refill(key, company, role, difficulty):
+    from services.gemini_service import generate_text, PRIORITY_BACKGROUND
+    try:
+        pool = _get_pool(key)
+        existing = list(pool["questions"]) if pool else []
+        with stage("question_bank_refill"):
+            text = await generate_text(_batch_prompt(company, role, difficulty, QUESTION_BANK_BATCH, existing), PRIORITY_BACKGROUND)
+        pool = _get_pool(key)
+        if pool is None:
+            pool = {"refreshed": time.monotonic(), "questions": []}
+            _pools[key] = pool
+            while len(_pools) > QUESTION_BANK_MAX_POOLS:
+                _pools.popitem(last=False)
+        seen = {q.lower() for q in pool["questions"]}
+        for question in _parse_questions(text):
+            if question.lower() not in seen and len(pool["questions"]) < QUESTION_BANK_MAX_QUESTIONS:
+                seen.add(question.lower())
+                pool["questions"].append(question)
+                pool["refreshed"] = time.monotonic()
+    except Exception as e:
+        print("Question bank refill failed:", e)
+    finally:
+        _refills.pop(key, None)
+
+def schedule_refill(company, role, difficulty=""):
+    """Start generating questions for this company/role in the background, once per pool."""
+    key = _key(company, role, difficulty)
+    pool = _get_pool(key)
+    if key in _refills or (pool and len(pool["questions"]) >= QUESTION_BANK_MAX_QUESTIONS):
+        return
+    _refills[key] = asyncio.get_running_loop().create_task(_refill(key, company, role, difficulty))
+
+def take_question(company, role, difficulty="", asked=()):
+    """
+    Return a banked question this session has not been asked yet, picked at
+    random so candidates for the same role don't all get the same sequence,
+    or None if the pool has none left. Schedules a refill when it runs low.
+    """
+    pool = _get_pool(_key(company, role, difficulty))
+    asked = {q.strip().lower() for q in asked}
+    remaining = [q for q in pool["questions"] if q.lower() not in asked] if pool else []
+    if len(remaining) <= QUESTION_BANK_LOW_WATER:
+        schedule_refill(company, role, difficulty)
+    return random.choice(remaining) if remaining else None
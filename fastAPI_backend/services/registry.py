@@ -0,0 +1,124 @@
+import asyncio
+import inspect
+import os
+import threading
+import time
+from utils.executors import run_in
+
+# Warm services up in the background as soon as the app starts; otherwise
+# only when asked through /ready?warm=true
+WARM_ON_STARTUP = os.getenv("WARM_ON_STARTUP", "1") == "1"
+
+class ServiceRegistry:
+    """
+    Backend clients (the Gemini model handle, the AssemblyAI HTTP client,
+    gTTS) are built on first use instead of at import, so a new replica
+    starts serving without paying for SDK imports and connection setup up
+    front. warm_up() does that work ahead of time in the background:
+    building each service and running its registered warm-ups (opening
+    connections, filling caches).
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._closers = {}
+        self._instances = {}
+        self._locks = {}
+        self._overridden = set()
+        self._warmups = {}
+        self._warm_task = None
+        self.init_ms = {}
+        self.warm_status = {}
+
+    def register(self, name, factory, warm=None, close=None):
+        """
+        Register a service built by `factory()`. `warm(service)` opens its
+        connections ahead of the first request; `close(service)` runs at
+        shutdown if the service was built. Either may be a coroutine function.
+        """
+        self._factories[name] = factory
+        self._locks[name] = threading.Lock()
+        if warm is not None:
+            self._warmups[name] = lambda: warm(self.get(name))
+        if close is not None:
+            self._closers[name] = close
+
+    def add_warmup(self, name, fn, *args):
+        """Extra warm-up work not tied to a service, e.g. filling a cache."""
+        self._warmups[name] = lambda: fn(*args)
+
+    def get(self, name):
+        instance = self._instances.get(name)
+        if instance is None:
+            # One build per service; building one doesn't hold up the others
+            with self._locks[name]:
+                instance = self._instances.get(name)
+                if instance is None:
+                    started = time.perf_counter()
+                    instance = self._factories[name]()
+                    self.init_ms[name] = round((time.perf_counter() - started) * 1000, 1)
+                    self._instances[name] = instance
+        return instance
+
+    def override(self, name, instance):
+        """Use `instance` for the service instead of building it (fakes in benchmarks); it is never warmed."""
+        self._instances[name] = instance
+        self._overridden.add(name)
+
+    async def _warm(self, name, fn):
+        started = time.perf_counter()
+        self.warm_status[name] = {"status": "running"}
+        try:
+            # Building the service (SDK imports, client setup) happens on the pool;
+            # an async warm-up hands its coroutine back to finish on the loop
+            result = await run_in("network", fn)
+            if inspect.isawaitable(result):
+                await result
+            status = "done"
+        except Exception as e:
+            # Best effort: whatever failed is set up again by the first request that needs it
+            print(f"Warm-up of {name} failed:", e)
+            status = "failed: " + (str(e).strip().splitlines() or [type(e).__name__])[0]
+        self.warm_status[name] = {"status": status, "ms": round((time.perf_counter() - started) * 1000, 1)}
+
+    async def warm_up(self):
+        await asyncio.gather(*(
+            self._warm(name, fn) for name, fn in self._warmups.items() if name not in self._overridden
+        ))
+
+    def start_warm_up(self):
+        """Start warm_up() in the background unless it already ran. Must be called from the event loop."""
+        if self._warm_task is None:
+            self.warm_status = {name: {"status": "pending"} for name in self._warmups if name not in self._overridden}
+            self._warm_task = asyncio.ensure_future(self.warm_up())
+        return self._warm_task
+
+    async def close(self):
+        if self._warm_task is not None and not self._warm_task.done():
+            self._warm_task.cancel()
+        self._warm_task = None
+        for name, close in self._closers.items():
+            instance = self._instances.pop(name, None)
+            if instance is None or name in self._overridden:
+                continue
+            try:
+                result = close(instance)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                print(f"Closing {name} failed:", e)
+
+    def snapshot(self):
+        return {
+            "services": {
+                name: {
+                    "created": name in self._instances,
+                    "overridden": name in self._overridden,
+                    "init_ms": self.init_ms.get(name),
+                }
+                for name in self._factories
+            },
+            "warm_up": dict(self.warm_status),
+        }
+
+services = ServiceRegistry()
@@ -0,0 +1,161 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from database.state_backend import state
+from services.resume_service import RESUME_CACHE_DIR
+
+RESUME_TOP_K = int(os.getenv("RESUME_TOP_K", "3"))
+CHUNK_WORDS = 60
+BM25_K1 = 1.5
+BM25_B = 0.75
+INDEX_CACHE_SIZE = 64
+
+# Heading keywords mapped to the section name a chunk is filed under
+SECTION_KEYWORDS = {
+    "summary": ("summary", "objective", "profile", "about me"),
+    "education": ("education", "academic", "qualification"),
+    "experience": ("experience", "employment", "work history", "internship"),
+    "projects": ("project",),
+    "skills": ("skill", "technologies", "tech stack", "tools"),
+    "certifications": ("certification", "certificate", "course"),
+    "achievements": ("achievement", "award", "honor", "honour", "activities"),
+}
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "do", "for", "from", "how", "i", "in", "is",
+    "it", "me", "my", "of", "on", "or", "so", "that", "the", "this", "to", "was", "we", "what", "with",
+    "you", "your", "can", "did", "have", "tell", "about", "which", "when", "there", "they", "our", "us",
+}
+_TOKEN = re.compile(r"[a-z0-9+#.]+")
+
+# resume hash -> index, least recently used first; used from pool threads
+_loaded = OrderedDict()
+_loaded_lock = threading.Lock()
+
+def _tokens(text):
+    return [t.strip(".") for t in _TOKEN.findall(text.lower()) if t.strip(".") and t.strip(".") not in STOPWORDS]
+
+def _heading(line):
+    words = line.strip(" :-•|").lower()
+    if not words or len(words.split()) > 4:
+        return None
+    for section, keywords in SECTION_KEYWORDS.items():
+        if any(k in words for k in keywords):
+            return section
+    return None
+
+def split_sections(text):
+    """
+    Split resume text into chunks of at most ~CHUNK_WORDS words, each tagged
+    with the section (education, projects, skills, ...) it falls under.
+    Text before the first recognised heading is filed under "profile".
+    """
+    chunks = []
+    section, lines, words = "profile", [], 0
+
+    def flush():
+        if lines:
+            chunks.append({"section": section, "text": "\n".join(lines)})
+
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        heading = _heading(line)
+        if heading:
+            flush()
+            section, lines, words = heading, [], 0
+            continue
+        if words and words + len(line.split()) > CHUNK_WORDS:
+            flush()
+            lines, words = [], 0
+        lines.append(line)
+        words += len(line.split())
+    flush()
+    return chunks
+
+def build_index(text):
+    chunks = split_sections(text)
+    terms = [Counter(_tokens(f"{c['section']} {c['text']}")) for c in chunks]
+    lengths = [sum(t.values()) for t in terms]
+    return {
+        "chunks": chunks,
+        "terms": [dict(t) for t in terms],
+        "lengths": lengths,
+        "df": dict(Counter(term for t in terms for term in t)),
+        "avgdl": sum(lengths) / len(lengths) if lengths else 0.0,
+    }
+
+def search(index, query, k=RESUME_TOP_K):
+    """
+    Return up to `k` chunk indexes ranked by BM25 against `query`. Falls back
+    to the first chunk of each section when nothing in the query matches.
+    """
+    n = len(index["chunks"])
+    query_terms = set(_tokens(query))
+    scores = []
+    for i, (terms, length) in enumerate(zip(index["terms"], index["lengths"])):
+        score = 0.0
+        for term in query_terms:
+            tf = terms.get(term)
+            if not tf:
+                continue
+            df = index["df"][term]
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            norm = 1 - BM25_B + BM25_B * length / (index["avgdl"] or 1)
+            score += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+        if score > 0:
+            scores.append((score, i))
+    if scores:
+        return [i for _, i in sorted(scores, reverse=True)[:k]]
+    seen, overview = set(), []
+    for i, chunk in enumerate(index["chunks"]):
+        if chunk["section"] not in seen:
+            seen.add(chunk["section"])
+            overview.append(i)
+    return overview[:k]
+
+def _index_key(resume_hash):
+    return f"resume_index:{resume_hash}"
+
+def save_resume_index(resume_hash, text):
+    """Build the section index for a parsed resume and keep it in the shared state, for every worker."""
+    index = build_index(text)
+    state.put(_index_key(resume_hash), json.dumps(index).encode("utf-8"))
+    return index
+
+def load_resume_index(resume_hash):
+    # Keyed by content hash, so a cached index never goes stale
+    with _loaded_lock:
+        index = _loaded.get(resume_hash)
+        if index is not None:
+            _loaded.move_to_end(resume_hash)
+            return index
+    # Loaded outside the lock; two threads loading the same index just both store it
+    stored = state.get(_index_key(resume_hash))
+    text_path = RESUME_CACHE_DIR / f"{resume_hash}.txt"
+    if stored is not None:
+        index = json.loads(stored)
+    elif text_path.exists():
+        # Parsed before indexing existed; build it now
+        index = save_resume_index(resume_hash, text_path.read_text(encoding="utf-8"))
+    else:
+        return None
+    with _loaded_lock:
+        _loaded[resume_hash] = index
+        _loaded.move_to_end(resume_hash)
+        while len(_loaded) > INDEX_CACHE_SIZE:
+            _loaded.popitem(last=False)
+    return index
+
+def relevant_resume_context(resume_hash, query, k=RESUME_TOP_K):
+    """The top-k resume chunks for `query`, in resume order, formatted for the prompt."""
+    index = load_resume_index(resume_hash) if resume_hash else None
+    if not index or not index["chunks"]:
+        return ""
+    return "\n".join(
+        f"[{index['chunks'][i]['section']}] {index['chunks'][i]['text']}"
+        for i in sorted(search(index, query, k))
+    )
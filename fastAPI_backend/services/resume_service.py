@@ -0,0 +1,57 @@
+import asyncio
+import hashlib
+import os
+import uuid
+from io import BytesIO
+from pathlib import Path
+from utils.executors import run_in
+
+RESUME_CACHE_DIR = Path(os.getenv("RESUME_CACHE_DIR", "resume_cache"))
+PAGES_PER_TASK = 2
+
+# The two functions below run in the cpu pool's worker processes, so they take
+# the raw PDF bytes and open their own in-memory handle.
+def _page_count(data):
+    import pdfplumber
+    with pdfplumber.open(BytesIO(data)) as pdf:
+        return len(pdf.pages)
+
+def _extract_pages(data, start, end):
+    import pdfplumber
+    with pdfplumber.open(BytesIO(data)) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages[start:end]]
+
+def resume_hash(data: bytes):
+    return hashlib.sha256(data).hexdigest()
+
+def _read_cached(cache_path):
+    if cache_path.exists():
+        return cache_path.read_text(encoding="utf-8")
+    return None
+
+def _write_cached(cache_path, text):
+    RESUME_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    tmp_path.replace(cache_path)
+
+async def extract_resume_text(data: bytes):
+    """
+    Extract the text of a PDF resume, splitting the pages across the cpu
+    pool's worker processes. Results are cached by content hash, so
+    re-uploading the same file skips parsing entirely.
+    """
+    digest = resume_hash(data)
+    cache_path = RESUME_CACHE_DIR / f"{digest}.txt"
+    cached = await run_in("blocking", _read_cached, cache_path)
+    if cached is not None:
+        return digest, cached
+    page_count = await run_in("cpu", _page_count, data)
+    tasks = [
+        run_in("cpu", _extract_pages, data, start, min(start + PAGES_PER_TASK, page_count))
+        for start in range(0, page_count, PAGES_PER_TASK)
+    ]
+    pages = [text for chunk in await asyncio.gather(*tasks) for text in chunk]
+    resume_text = "\n".join(pages)
+    await run_in("blocking", _write_cached, cache_path, resume_text)
+    return digest, resume_text
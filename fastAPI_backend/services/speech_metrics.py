@@ -0,0 +1,110 @@
+import re
+import numpy as np
+
+FILLER_WORDS = {"um", "umm", "uh", "uhh", "er", "ah", "hmm", "like", "basically", "actually", "literally"}
+FILLER_PHRASES = ("you know", "i mean", "sort of", "kind of")
+PAUSE_MS = 300
+LONG_PAUSE_MS = 1000
+# Sentiment codes follow analysis_store.SENTIMENT_LABELS: NEGATIVE, NEUTRAL, POSITIVE
+SENTIMENT_SCORES = np.array([-1.0, 0.0, 1.0])
+_TOKEN = re.compile(r"[a-z']+")
+
+def _round(value, digits=3):
+    return None if value is None else round(float(value), digits)
+
+def answer_features(text, words, sentiments, audio_duration=None):
+    """
+    Per-answer speech features from one answer's word records and sentiment
+    segments (rows of WORD_DTYPE / SENTIMENT_DTYPE arrays).
+    """
+    tokens = _TOKEN.findall((text or "").lower())
+    joined = " ".join(tokens)
+    filler_count = sum(1 for t in tokens if t in FILLER_WORDS) + sum(joined.count(p) for p in FILLER_PHRASES)
+    word_count = len(words) or len(tokens)
+
+    features = {
+        "word_count": word_count,
+        "filler_count": filler_count,
+        "filler_rate": _round(100.0 * filler_count / word_count if word_count else 0.0, 2),
+        "wpm": None,
+        "speaking_ms": 0,
+        "pause_count": 0,
+        "long_pause_count": 0,
+        "pause_ms_p50": None,
+        "pause_ms_p90": None,
+        "pause_ratio": None,
+        "confidence_p10": None,
+        "confidence_p50": None,
+        "confidence_p90": None,
+        "sentiment_mix": {"negative": 0.0, "neutral": 0.0, "positive": 0.0},
+        "sentiment": None,
+    }
+    if len(words):
+        starts = words["start"].astype(np.int64)
+        ends = words["end"].astype(np.int64)
+        span_ms = max(int(ends.max() - starts.min()), 1)
+        gaps = np.clip(starts[1:] - ends[:-1], 0, None)
+        pauses = gaps[gaps >= PAUSE_MS]
+        p10, p50, p90 = np.percentile(words["confidence"], [10, 50, 90])
+        features.update({
+            "wpm": _round(len(words) / (span_ms / 60000.0), 1),
+            "speaking_ms": int(np.sum(ends - starts)),
+            "pause_count": int(pauses.size),
+            "long_pause_count": int(np.count_nonzero(pauses >= LONG_PAUSE_MS)),
+            "pause_ms_p50": _round(np.median(pauses), 0) if pauses.size else 0,
+            "pause_ms_p90": _round(np.percentile(pauses, 90), 0) if pauses.size else 0,
+            "pause_ratio": _round(pauses.sum() / span_ms),
+            "confidence_p10": _round(p10),
+            "confidence_p50": _round(p50),
+            "confidence_p90": _round(p90),
+        })
+    elif audio_duration and word_count:
+        features["wpm"] = _round(word_count / (audio_duration / 60.0), 1)
+    if len(sentiments):
+        # Time share of each sentiment, weighting segments by their duration
+        durations = np.maximum(sentiments["end"].astype(np.int64) - sentiments["start"], 1)
+        shares = np.bincount(sentiments["sentiment"].astype(np.int64), weights=durations, minlength=3)[:3]
+        shares = shares / shares.sum()
+        features["sentiment_mix"] = {
+            "negative": _round(shares[0]),
+            "neutral": _round(shares[1]),
+            "positive": _round(shares[2]),
+        }
+        features["sentiment"] = ["NEGATIVE", "NEUTRAL", "POSITIVE"][int(np.argmax(shares))]
+    return features
+
+def timeline(words, sentiments, resolution_ms=1000):
+    """
+    Time-binned confidence and sentiment for one answer. Each bin carries the
+    mean word confidence (None if nobody spoke) and a sentiment score in
+    [-1, 1] (negative..positive) over the segments overlapping it.
+    """
+    ends = [int(words["end"].max()) if len(words) else 0, int(sentiments["end"].max()) if len(sentiments) else 0]
+    bin_count = max(ends) // resolution_ms + 1
+    confidence = np.full(bin_count, np.nan)
+    if len(words):
+        # Assign each word to the bin holding its midpoint
+        bins = ((words["start"].astype(np.int64) + words["end"]) // 2) // resolution_ms
+        sums = np.bincount(bins, weights=words["confidence"], minlength=bin_count)
+        counts = np.bincount(bins, minlength=bin_count)
+        np.divide(sums, counts, out=confidence, where=counts > 0)
+    sentiment = np.zeros(bin_count)
+    if len(sentiments):
+        # Overlap (ms) of every segment with every bin, as a segments x bins matrix
+        edges = np.arange(bin_count) * resolution_ms
+        overlap = np.clip(
+            np.minimum(sentiments["end"][:, None], edges + resolution_ms) - np.maximum(sentiments["start"][:, None], edges),
+            0, None,
+        )
+        weights = overlap * sentiments["confidence"][:, None]
+        totals = weights.sum(axis=0)
+        scores = (weights * SENTIMENT_SCORES[sentiments["sentiment"].astype(np.int64)][:, None]).sum(axis=0)
+        np.divide(scores, totals, out=sentiment, where=totals > 0)
+    return [
+        {
+            "start_ms": int(i * resolution_ms),
+            "confidence": None if np.isnan(confidence[i]) else _round(confidence[i]),
+            "sentiment_score": _round(sentiment[i]),
+        }
+        for i in range(bin_count)
+    ]
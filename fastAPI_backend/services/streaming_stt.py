@@ -0,0 +1,131 @@
+import asyncio
+import base64
+import json
+import os
+
+ASSEMBLYAI_REALTIME_URL = os.getenv("ASSEMBLYAI_REALTIME_URL", "wss://api.assemblyai.com/v2/realtime/ws")
+STREAMING_STT_BACKEND = os.getenv("STREAMING_STT_BACKEND", "assemblyai")
+
+class StreamingSTTSession:
+    """
+    One live transcription. Feed 16-bit mono PCM frames with send_audio();
+    `on_partial(text)` is awaited whenever the running transcript changes,
+    and finish() returns the final transcript once the audio has ended.
+    """
+
+    def __init__(self, sample_rate, on_partial):
+        self.sample_rate = sample_rate
+        self.on_partial = on_partial
+
+    async def start(self):
+        pass
+
+    async def send_audio(self, frame: bytes):
+        raise NotImplementedError
+
+    async def finish(self) -> str:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+class FakeStreamingSTTSession(StreamingSTTSession):
+    """
+    Local stand-in for tests and benchmarks. With a scripted `transcript`,
+    every audio frame reveals the next `words_per_frame` words; without one,
+    frames are treated as UTF-8 text so a client can "speak" plain strings.
+    """
+
+    def __init__(self, sample_rate, on_partial, transcript=None, words_per_frame=1):
+        super().__init__(sample_rate, on_partial)
+        self.script = transcript.split() if transcript else None
+        self.words_per_frame = words_per_frame
+        self.words = []
+
+    async def send_audio(self, frame):
+        if self.script is not None:
+            new_words = self.script[len(self.words):len(self.words) + self.words_per_frame]
+        else:
+            new_words = frame.decode("utf-8", errors="ignore").split()
+        if new_words:
+            self.words.extend(new_words)
+            await self.on_partial(" ".join(self.words))
+
+    async def finish(self):
+        return " ".join(self.words)
+
+class AssemblyAIRealtimeSession(StreamingSTTSession):
+    def __init__(self, sample_rate, on_partial, api_key=None, url=ASSEMBLYAI_REALTIME_URL):
+        super().__init__(sample_rate, on_partial)
+        self.api_key = api_key or os.getenv("ASSEMBLYAI_API_KEY")
+        self.url = url
+        self._ws = None
+        self._reader = None
+        self._finals = []
+        self._partial = ""
+        self._terminated = None
+
+    async def start(self):
+        import websockets
+        self._terminated = asyncio.get_running_loop().create_future()
+        self._ws = await websockets.connect(
+            f"{self.url}?sample_rate={self.sample_rate}",
+            extra_headers={"Authorization": self.api_key or ""},
+        )
+        self._reader = asyncio.create_task(self._read())
+
+    def _transcript(self):
+        return " ".join(t for t in [*self._finals, self._partial] if t)
+
+    async def _read(self):
+        try:
+            async for raw in self._ws:
+                message = json.loads(raw)
+                message_type = message.get("message_type")
+                if message_type == "PartialTranscript":
+                    self._partial = message.get("text", "")
+                elif message_type == "FinalTranscript":
+                    self._partial = ""
+                    if message.get("text"):
+                        self._finals.append(message["text"])
+                elif message_type == "SessionTerminated":
+                    break
+                else:
+                    continue
+                await self.on_partial(self._transcript())
+        finally:
+            if not self._terminated.done():
+                self._terminated.set_result(None)
+
+    async def send_audio(self, frame):
+        await self._ws.send(json.dumps({"audio_data": base64.b64encode(frame).decode("ascii")}))
+
+    async def finish(self):
+        # Ask AssemblyAI to flush what it has heard; it answers with a final
+        # transcript and SessionTerminated
+        await self._ws.send(json.dumps({"terminate_session": True}))
+        try:
+            await asyncio.wait_for(asyncio.shield(self._terminated), timeout=5)
+        except asyncio.TimeoutError:
+            pass
+        return self._transcript()
+
+    async def close(self):
+        if self._reader is not None:
+            self._reader.cancel()
+        if self._ws is not None:
+            await self._ws.close()
+
+STREAMING_STT_BACKENDS = {
+    "assemblyai": AssemblyAIRealtimeSession,
+    "fake": FakeStreamingSTTSession,
+}
+
+def register_streaming_backend(name, factory):
+    STREAMING_STT_BACKENDS[name] = factory
+
+async def open_streaming_session(sample_rate, on_partial, backend=None, **options):
+    factory = STREAMING_STT_BACKENDS[backend or STREAMING_STT_BACKEND]
+    session = factory(sample_rate, on_partial, **options)
+    await session.start()
+    return session
@@ -1,71 +1,215 @@
-import requests
-import time
-import pickle
+import asyncio
+import random
 import os
 from pathlib import Path
+from database.state_backend import state
+from services.registry import services
+from utils.executors import run_in
+from utils.tracing import stage
 
 assemblyai_api_key = os.getenv("ASSEMBLYAI_API_KEY")
-ASSEMBLYAI_ANALYSIS_FILE = Path("assemblyai_analysis.pkl")
-
-def analyze_audio_with_assemblyai(audio_file_path):
-    headers = {'authorization': assemblyai_api_key}
-    print(f"Uploading audio file to AssemblyAI: {audio_file_path}")
-    with open(audio_file_path, 'rb') as f:
-        upload_response = requests.post(
-            'https://api.assemblyai.com/v2/upload',
-            headers=headers,
-            files={'file': ('audio.wav', f, 'audio/wav')}
-        )
-    print(f"Upload response status: {upload_response.status_code}")
-    if upload_response.status_code != 200:
-        print(f"Upload failed: {upload_response.text}")
-        raise Exception("AssemblyAI upload failed")
-    audio_url = upload_response.json()['upload_url']
-    print(f"Audio uploaded. URL: {audio_url}")
-
-    json_data = {
-        "audio_url": audio_url,
-        "sentiment_analysis": True
-    }
-    transcript_response = requests.post(
-        "https://api.assemblyai.com/v2/transcript",
-        json=json_data,
-        headers=headers
-    )
-    print(f"Transcript response status: {transcript_response.status_code}")
-    if transcript_response.status_code != 200:
-        print("AssemblyAI transcript error:", transcript_response.status_code, transcript_response.text)
-        raise Exception("AssemblyAI transcript request failed")
-    transcript_id = transcript_response.json()['id']
-    print(f"Transcript ID: {transcript_id}")
-
-    while True:
-        print(f"Polling transcript status for ID: {transcript_id}")
-        polling = requests.get(
-            f"https://api.assemblyai.com/v2/transcript/{transcript_id}",
-            headers=headers
-        )
-        result = polling.json()
-        print(f"Polling result: {result}")
-        if result['status'] == 'completed':
-            print("Transcription completed.")
-            break
-        elif result['status'] == 'failed':
-            print("Transcription failed.")
-            raise Exception("AssemblyAI transcription failed")
-        time.sleep(3)
-    return result
-
-def save_assemblyai_analysis(analysis):
-    if ASSEMBLYAI_ANALYSIS_FILE.exists():
-        all_analysis = pickle.load(ASSEMBLYAI_ANALYSIS_FILE.open("rb"))
-    else:
-        all_analysis = []
-    all_analysis.append(analysis)
-    with ASSEMBLYAI_ANALYSIS_FILE.open("wb") as f:
-        pickle.dump(all_analysis, f)
-
-def load_assemblyai_analysis():
-    if ASSEMBLYAI_ANALYSIS_FILE.exists():
-        return pickle.load(ASSEMBLYAI_ANALYSIS_FILE.open("rb"))
-    return []
\ No newline at end of file
+ASSEMBLYAI_BASE_URL = os.getenv("ASSEMBLYAI_BASE_URL", "https://api.assemblyai.com")
+# Public URL of our /stt/webhook route; when set, completion is pushed by AssemblyAI instead of polled
+ASSEMBLYAI_WEBHOOK_URL = os.getenv("ASSEMBLYAI_WEBHOOK_URL")
+ASSEMBLYAI_WEBHOOK_SECRET = os.getenv("ASSEMBLYAI_WEBHOOK_SECRET")
+if ASSEMBLYAI_WEBHOOK_URL and not ASSEMBLYAI_WEBHOOK_SECRET:
+    # Without the secret anyone could post fake completions to /stt/webhook (and fill the state store)
+    print("ASSEMBLYAI_WEBHOOK_URL is set without ASSEMBLYAI_WEBHOOK_SECRET; polling for transcripts instead")
+    ASSEMBLYAI_WEBHOOK_URL = None
+ASSEMBLYAI_MAX_CONCURRENCY = int(os.getenv("ASSEMBLYAI_MAX_CONCURRENCY", "8"))
+WEBHOOK_AUTH_HEADER = "X-Webhook-Secret"
+# Webhooks land on whichever worker the load balancer picks, so completions
+# are published in the shared state (stt_done:<transcript id>) for this long
+WEBHOOK_DONE_TTL = 600
+
+class AssemblyAIClient:
+    """
+    Async AssemblyAI client sharing one pooled HTTP connection set across
+    requests. At most `max_concurrency` calls (uploads, transcript requests
+    and polls) run against this backend at once; the rest wait their turn
+    instead of piling onto the API.
+    """
+
+    def __init__(self, api_key, base_url=ASSEMBLYAI_BASE_URL, max_concurrency=ASSEMBLYAI_MAX_CONCURRENCY,
+                 webhook_url=None, webhook_secret=None, poll_initial=0.25, poll_max=3.0, poll_factor=1.6,
+                 transcript_timeout=300.0, webhook_check_interval=0.5, webhook_poll_interval=10.0):
+        if webhook_url and not webhook_secret:
+            raise ValueError("webhook_url needs a webhook_secret")
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.webhook_url = webhook_url
+        self.webhook_secret = webhook_secret
+        self.poll_initial = poll_initial
+        self.poll_max = poll_max
+        self.poll_factor = poll_factor
+        self.transcript_timeout = transcript_timeout
+        self.webhook_check_interval = webhook_check_interval
+        self.webhook_poll_interval = webhook_poll_interval
+        self._client = None
+        self._semaphore = None
+        self._waiters = {}
+
+    def _http(self):
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"authorization": self.api_key or ""},
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency * 2,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+                timeout=httpx.Timeout(30.0, connect=5.0),
+            )
+        return self._client
+
+    def _limit(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def upload(self, audio):
+        # bytes, a file path, or an async iterable of chunks
+        if isinstance(audio, (str, Path)):
+            audio = await run_in("blocking", Path(audio).read_bytes)
+        elif not isinstance(audio, (bytes, bytearray)):
+            # Read the caller's stream before taking a slot, so a slow sender can't hold one
+            audio = b"".join([chunk async for chunk in audio])
+        async with self._limit():
+            response = await self._http().post(
+                "/v2/upload",
+                content=audio,
+                headers={"content-type": "application/octet-stream"},
+            )
+        if response.status_code != 200:
+            print("AssemblyAI upload error:", response.status_code, response.text)
+            raise RuntimeError("AssemblyAI upload failed")
+        return response.json()["upload_url"]
+
+    async def request_transcript(self, audio_url):
+        json_data = {
+            "audio_url": audio_url,
+            "sentiment_analysis": True,
+        }
+        if self.webhook_url:
+            json_data["webhook_url"] = self.webhook_url
+            json_data["webhook_auth_header_name"] = WEBHOOK_AUTH_HEADER
+            json_data["webhook_auth_header_value"] = self.webhook_secret
+        async with self._limit():
+            response = await self._http().post("/v2/transcript", json=json_data)
+        if response.status_code != 200:
+            print("AssemblyAI transcript error:", response.status_code, response.text)
+            raise RuntimeError("AssemblyAI transcript request failed")
+        return response.json()["id"]
+
+    async def get_transcript(self, transcript_id):
+        async with self._limit():
+            response = await self._http().get(f"/v2/transcript/{transcript_id}")
+        if response.status_code != 200:
+            raise RuntimeError(f"AssemblyAI transcript lookup failed: {response.status_code}")
+        return response.json()
+
+    async def wait_for_transcript(self, transcript_id):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.transcript_timeout
+        if self.webhook_url:
+            result = await self._wait_for_webhook(transcript_id, deadline)
+            if result is not None:
+                return result
+        # Poll with exponential backoff and jitter: short first waits catch
+        # short answers quickly, longer ones stop hammering the API
+        delay = self.poll_initial
+        while True:
+            result = await self.get_transcript(transcript_id)
+            if result["status"] == "completed":
+                return result
+            if result["status"] in ("error", "failed"):
+                raise RuntimeError(f"AssemblyAI transcription failed: {result.get('error')}")
+            if loop.time() >= deadline:
+                raise TimeoutError(f"AssemblyAI transcription {transcript_id} timed out")
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+            delay = min(delay * self.poll_factor, self.poll_max)
+
+    async def _wait_for_webhook(self, transcript_id, deadline):
+        """
+        Wait for the completion webhook, wherever it lands: a delivery to this
+        worker wakes the waiter at once, one to another worker is seen in the
+        shared state within webhook_check_interval, and the transcript is
+        polled every webhook_poll_interval in case the webhook never comes.
+        Returns the completed transcript, or None to fall back to polling.
+        """
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters[transcript_id] = waiter
+        next_poll = loop.time() + self.webhook_poll_interval
+        try:
+            while not waiter.done() and loop.time() < deadline:
+                # Delivered to another worker (or before we started waiting)
+                if await run_in("blocking", state.get, f"stt_done:{transcript_id}") is not None:
+                    break
+                if loop.time() >= next_poll:
+                    result = await self.get_transcript(transcript_id)
+                    if result["status"] == "completed":
+                        return result
+                    if result["status"] in ("error", "failed"):
+                        # The polling loop reports the failure
+                        return None
+                    next_poll = loop.time() + self.webhook_poll_interval
+                try:
+                    await asyncio.wait_for(
+                        asyncio.shield(waiter),
+                        timeout=max(min(self.webhook_check_interval, deadline - loop.time()), 0),
+                    )
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._waiters.pop(transcript_id, None)
+        result = await self.get_transcript(transcript_id)
+        return result if result["status"] == "completed" else None
+
+    async def complete_webhook(self, transcript_id, status):
+        waiter = self._waiters.get(transcript_id)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(status)
+        # Also for the worker waiting on it, if that is not this one, and for
+        # a webhook that raced ahead of request_transcript() returning
+        await run_in("blocking", state.put, f"stt_done:{transcript_id}", (status or "").encode("utf-8"), WEBHOOK_DONE_TTL)
+
+    async def transcribe(self, audio):
+        # Streamed uploads include the time spent receiving (and converting) the recording
+        with stage("stt_upload"):
+            audio_url = await self.upload(audio)
+        with stage("stt_request"):
+            transcript_id = await self.request_transcript(audio_url)
+        with stage("stt_wait"):
+            return await self.wait_for_transcript(transcript_id)
+
+    async def connect(self):
+        """Open a pooled connection ahead of the first upload."""
+        await self._http().head("/v2/transcript")
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+def _warm_stt(client):
+    # Runs on the pool, so building the HTTP client (and importing httpx) stays off the event loop;
+    # the connection itself is opened on the loop
+    client._http()
+    return client.connect()
+
+services.register(
+    "stt",
+    lambda: AssemblyAIClient(assemblyai_api_key, webhook_url=ASSEMBLYAI_WEBHOOK_URL, webhook_secret=ASSEMBLYAI_WEBHOOK_SECRET),
+    warm=_warm_stt,
+    close=lambda client: client.aclose(),
+)
+
+def get_stt_client():
+    return services.get("stt")
+
+async def analyze_audio_with_assemblyai(audio):
+    # `audio` is a file path, the encoded audio bytes, or an async iterable of chunks
+    return await get_stt_client().transcribe(audio)
@@ -0,0 +1,133 @@
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+TTS_CACHE_DIR = Path(os.getenv("TTS_CACHE_DIR", "tts_cache"))
+TTS_CACHE_MEMORY_ITEMS = int(os.getenv("TTS_CACHE_MEMORY_ITEMS", "256"))
+TTS_CACHE_DISK_BYTES = int(os.getenv("TTS_CACHE_DISK_BYTES", str(200 * 1024 * 1024)))
+
+def cache_key(text, voice, lang):
+    return hashlib.sha256(f"{voice}\0{lang}\0{text}".encode("utf-8")).hexdigest()
+
+class TTSCache:
+    """
+    Two-tier cache for synthesized audio keyed by hash of (text, voice, lang):
+    a bounded in-memory LRU in front of a size-capped directory of .mp3 files.
+    """
+
+    def __init__(self, directory=TTS_CACHE_DIR, max_items=TTS_CACHE_MEMORY_ITEMS, max_disk_bytes=TTS_CACHE_DISK_BYTES):
+        self.directory = Path(directory)
+        self.max_items = max_items
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        # Size of each cached file (scanned on first put) and their total
+        self._disk_sizes = None
+        self._disk_bytes = None
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    def _path(self, key):
+        return self.directory / f"{key}.mp3"
+
+    def _remember(self, key, audio):
+        self._memory[key] = audio
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get(self, key):
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return audio
+        path = self._path(key)
+        try:
+            audio = path.read_bytes()
+        except FileNotFoundError:
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        try:
+            # Touch the file so disk eviction is least-recently-used too
+            os.utime(path)
+        except OSError:
+            # Evicted by another worker since we read it; we still have the audio
+            pass
+        with self._lock:
+            self.stats["disk_hits"] += 1
+            self._remember(key, audio)
+        return audio
+
+    def put(self, key, audio):
+        if not audio:
+            return
+        with self._lock:
+            self._remember(key, audio)
+        path = self._path(key)
+        # Unique temp name: the same sentence can be stored by several threads or workers at once
+        tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_bytes(audio)
+            tmp_path.replace(path)
+        except OSError as e:
+            # The audio is still served from memory; only the disk copy is lost
+            print("TTS cache write failed:", e)
+            tmp_path.unlink(missing_ok=True)
+            return
+        with self._lock:
+            if self._disk_sizes is None:
+                self._disk_sizes = {key: size for key, (size, _) in self._scan().items()}
+                self._disk_bytes = sum(self._disk_sizes.values())
+            else:
+                # Overwriting a file only changes the total by the difference
+                self._disk_bytes += len(audio) - self._disk_sizes.get(key, 0)
+                self._disk_sizes[key] = len(audio)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _scan(self):
+        # {key: (size, mtime)} of the files on disk; another worker may delete some meanwhile
+        files = {}
+        for path in self.directory.glob("*.mp3"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            files[path.stem] = (st.st_size, st.st_mtime)
+        return files
+
+    def _evict_disk(self):
+        files = self._scan()
+        sizes = {key: size for key, (size, _) in files.items()}
+        total = sum(sizes.values())
+        # Trim to 90% of the cap so we don't rescan the directory on every put
+        target = self.max_disk_bytes * 0.9
+        for key in sorted(files, key=lambda k: files[k][1]):
+            if total <= target:
+                break
+            self._path(key).unlink(missing_ok=True)
+            total -= sizes.pop(key)
+            self.stats["evictions"] += 1
+        self._disk_sizes = sizes
+        self._disk_bytes = total
+
+    def snapshot(self):
+        with self._lock:
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            lookups = hits + self.stats["misses"]
+            return {
+                **self.stats,
+                "hits": hits,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_items": len(self._memory),
+                "disk_bytes": self._disk_bytes,
+            }
+
+tts_cache = TTSCache()
@@ -1,13 +1,94 @@
+import asyncio
 import os
+import re
+import time
 from io import BytesIO
-from gtts import gTTS
+from services.registry import services
+from services.tts_cache import tts_cache, cache_key
+from utils.executors import run_in
+from utils.tracing import stage, record_stage
 
-def text_to_speech(text: str) -> bytes:
-    if not text:
-        return b''
-    # Use gTTS to generate speech
-    tts = gTTS(text=text, lang='en')
+# gTTS picks the accent from the Google domain it talks to
+DEFAULT_VOICE = os.getenv("TTS_VOICE", "com")
+DEFAULT_LANG = "en"
+# Sentences of one reply synthesized ahead of the one being played
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "4"))
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+def _load_gtts():
+    from gtts import gTTS
+    return gTTS
+
+services.register("gtts", _load_gtts)
+
+def _synthesize(text, voice, lang):
+    tts = services.get("gtts")(text=text, lang=lang, tld=voice)
     mp3_fp = BytesIO()
     tts.write_to_fp(mp3_fp)
     mp3_fp.seek(0)
-    return mp3_fp.read()
\ No newline at end of file
+    return mp3_fp.read()
+
+def text_to_speech(text: str, voice: str = DEFAULT_VOICE, lang: str = DEFAULT_LANG) -> bytes:
+    if not text:
+        return b''
+    key = cache_key(text, voice, lang)
+    audio = tts_cache.get(key)
+    if audio is None:
+        # Use gTTS to generate speech
+        audio = _synthesize(text, voice, lang)
+        tts_cache.put(key, audio)
+    return audio
+
+async def generate_speech(text: str, voice: str = DEFAULT_VOICE, lang: str = DEFAULT_LANG) -> bytes:
+    # text_to_speech on the network pool, timed as the request's "tts" stage
+    with stage("tts"):
+        return await run_in("network", text_to_speech, text, voice, lang)
+
+def prewarm_tts(phrases):
+    failed = 0
+    for text in phrases:
+        try:
+            text_to_speech(text)
+        except Exception as e:
+            # Pre-warming is best effort; the first real request will retry
+            print("TTS pre-warm failed:", e)
+            failed += 1
+    if failed:
+        raise RuntimeError(f"{failed} of {len(phrases)} phrases could not be synthesized")
+
+def split_sentences(text):
+    return [s for s in (part.strip() for part in _SENTENCE_BOUNDARY.split(text or "")) if s]
+
+async def stream_speech(text, voice: str = DEFAULT_VOICE, lang: str = DEFAULT_LANG):
+    """
+    Synthesize `text` sentence by sentence on the network pool and yield
+    the MP3 chunks in order, so playback of the first sentence can start
+    while later ones are still rendering. At most TTS_WORKERS sentences are
+    in flight at once.
+    """
+    started = time.perf_counter()
+    first_audio_ms = None
+    pending = []
+    sentences = iter(split_sentences(text))
+
+    def submit_next():
+        sentence = next(sentences, None)
+        if sentence is not None:
+            pending.append(asyncio.ensure_future(run_in("network", text_to_speech, sentence, voice, lang)))
+
+    for _ in range(TTS_WORKERS):
+        submit_next()
+    try:
+        while pending:
+            audio = await pending.pop(0)
+            submit_next()
+            if first_audio_ms is None:
+                first_audio_ms = (time.perf_counter() - started) * 1000
+                record_stage("tts_first_audio", first_audio_ms)
+            yield audio
+    finally:
+        # Client went away mid-stream: don't synthesize sentences nobody will hear
+        for future in pending:
+            future.cancel()
+        record_stage("tts", (time.perf_counter() - started) * 1000)
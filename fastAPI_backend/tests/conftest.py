@@ -0,0 +1,29 @@
+import os
+import tempfile
+import pytest
+
+# Keep the shared state out of sessions/: set before any test imports the backend
+os.environ.setdefault("STATE_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="interview-tests-"), "state.db"))
+# The real backends are never contacted
+os.environ.setdefault("WARM_ON_STARTUP", "0")
+
+@pytest.fixture(scope="session")
+def fake_assemblyai():
+    """A local stand-in for AssemblyAI (benchmarks/fakes.py); yields its base URL."""
+    from benchmarks import fakes
+    from benchmarks.run_benchmark import _serve, _free_port
+    server, thread = _serve(fakes.fake_assemblyai_app(fakes.Latency(5), fakes.Latency(300)), _free_port())
+    yield f"http://127.0.0.1:{server.config.port}"
+    server.should_exit = True
+    thread.join(10)
+
+@pytest.fixture(scope="session")
+def app():
+    """The API with Gemini and gTTS replaced by the fakes from benchmarks/fakes.py."""
+    import main
+    from benchmarks import fakes
+    from services import tts_service
+    from services.registry import services
+    services.override("gemini", fakes.FakeGeminiModel(fakes.Latency(5)))
+    tts_service._synthesize = fakes.fake_synthesize(fakes.Latency(5))
+    return main.app
@@ -0,0 +1,74 @@
+import asyncio
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from services.stt_service import AssemblyAIClient
+
+def transcribe(base_url, audio, **options):
+    async def run():
+        client = AssemblyAIClient("test-key", base_url=base_url, poll_initial=0.05, poll_max=0.1, **options)
+        try:
+            return await client.transcribe(audio)
+        finally:
+            await client.aclose()
+    return asyncio.run(run())
+
+def test_transcribes_bytes(fake_assemblyai):
+    result = transcribe(fake_assemblyai, b"\0" * 4096)
+    assert result["status"] == "completed"
+    assert result["text"]
+    assert result["words"]
+
+def test_transcribes_streamed_upload(fake_assemblyai):
+    async def chunks():
+        for _ in range(4):
+            await asyncio.sleep(0.01)
+            yield b"\0" * 1024
+    assert transcribe(fake_assemblyai, chunks())["status"] == "completed"
+
+def test_failed_transcription_raises():
+    from benchmarks import fakes
+    from benchmarks.run_benchmark import _serve, _free_port
+    server, thread = _serve(fakes.fake_assemblyai_app(fakes.Latency(5), fakes.Latency(5, error_rate=1.0)), _free_port())
+    try:
+        with pytest.raises(RuntimeError, match="transcription failed"):
+            transcribe(f"http://127.0.0.1:{server.config.port}", b"\0" * 1024)
+    finally:
+        server.should_exit = True
+        thread.join(10)
+
+def test_webhook_from_another_worker_ends_the_wait(fake_assemblyai):
+    async def run():
+        waiting = AssemblyAIClient("test-key", base_url=fake_assemblyai, webhook_url="http://api/stt/webhook",
+                                   webhook_secret="s", webhook_check_interval=0.05, webhook_poll_interval=60)
+        other_worker = AssemblyAIClient("test-key", base_url=fake_assemblyai)
+        transcript_id = await waiting.request_transcript(await waiting.upload(b"\0" * 1024))
+        started = time.perf_counter()
+        wait = asyncio.ensure_future(waiting.wait_for_transcript(transcript_id))
+        await asyncio.sleep(0.4)
+        await other_worker.complete_webhook(transcript_id, "completed")
+        result = await asyncio.wait_for(wait, 5)
+        await waiting.aclose()
+        return result, time.perf_counter() - started
+    result, elapsed = asyncio.run(run())
+    assert result["status"] == "completed"
+    # Seen through the shared state, long before the next poll would have found it
+    assert elapsed < 2
+
+def test_webhook_needs_a_secret():
+    with pytest.raises(ValueError):
+        AssemblyAIClient("test-key", webhook_url="http://api/stt/webhook")
+
+def test_webhook_route(monkeypatch):
+    from routers import stt
+    app = FastAPI()
+    app.include_router(stt.router)
+    client = TestClient(app)
+    payload = {"transcript_id": "t-route", "status": "completed"}
+    monkeypatch.setattr(stt, "ASSEMBLYAI_WEBHOOK_URL", None)
+    assert client.post("/stt/webhook", json=payload).status_code == 404
+    monkeypatch.setattr(stt, "ASSEMBLYAI_WEBHOOK_URL", "http://api/stt/webhook")
+    monkeypatch.setattr(stt, "ASSEMBLYAI_WEBHOOK_SECRET", "s")
+    assert client.post("/stt/webhook", json=payload, headers={"X-Webhook-Secret": "wrong"}).status_code == 401
+    assert client.post("/stt/webhook", json=payload, headers={"X-Webhook-Secret": "s"}).status_code == 200
@@ -0,0 +1,44 @@
+import pytest
+from fastapi.testclient import TestClient
+from database.chat_history import load_messages
+from services import streaming_stt
+
+@pytest.fixture
+def client(app, monkeypatch):
+    monkeypatch.setattr(streaming_stt, "STREAMING_STT_BACKEND", "fake")
+    with TestClient(app) as client:
+        yield client
+
+def test_voice_turn(client):
+    # The fake backend treats frames as UTF-8 text
+    with client.websocket_connect("/ws/talk?session_id=ws-turn") as ws:
+        ws.send_json({"type": "start", "sample_rate": 16000})
+        ws.send_bytes(b"I built a")
+        assert ws.receive_json() == {"type": "partial", "text": "I built a"}
+        ws.send_bytes(b"data pipeline")
+        assert ws.receive_json() == {"type": "partial", "text": "I built a data pipeline"}
+        ws.send_json({"type": "stop", "audio": False})
+        assert ws.receive_json() == {"type": "transcript", "text": "I built a data pipeline"}
+        reply = ws.receive_json()
+        assert reply["type"] == "reply" and reply["text"]
+    assert client.get("/last_transcript", headers={"X-Session-Id": "ws-turn"}).json() == {"transcript": "I built a data pipeline"}
+    assert [m["content"] for m in load_messages("ws-turn") if m["role"] == "user"] == ["I built a data pipeline"]
+
+def test_reply_audio_and_empty_turn(client):
+    with client.websocket_connect("/ws/talk?session_id=ws-audio") as ws:
+        ws.send_json({"type": "stop"})
+        assert ws.receive_json() == {"type": "transcript", "text": ""}
+        assert ws.receive_json()["type"] == "error"
+        ws.send_bytes(b"hello there")
+        ws.receive_json()
+        ws.send_json({"type": "stop"})
+        ws.receive_json()
+        assert ws.receive_json()["type"] == "reply"
+        assert ws.receive_bytes()
+
+def test_new_session_gets_cookie_with_handshake(client):
+    with client.websocket_connect("/ws/talk") as ws:
+        headers = dict(ws.extra_headers or [])
+    assert headers[b"set-cookie"].startswith(b"session_id=")
+    with client.websocket_connect("/ws/talk?session_id=known") as ws:
+        assert not ws.extra_headers
@@ -0,0 +1,79 @@
+import hashlib
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from database.state_backend import state
+from database.write_behind import write_behind
+
+AUDIO_ARTIFACT_TTL = int(os.getenv("AUDIO_ARTIFACT_TTL", "300"))
+AUDIO_ARTIFACT_MAX_ITEMS = int(os.getenv("AUDIO_ARTIFACT_MAX_ITEMS", "512"))
+
+# Short-lived reply audio served from /audio/{artifact_id}. The worker that made it
+# keeps it here (artifact_id -> (audio, etag, expires_at)); other workers fetch it
+# from the shared state, where it is written behind the request.
+_artifacts = OrderedDict()
+_lock = threading.Lock()
+
+def _purge_expired(now):
+    while _artifacts:
+        artifact_id, (_, _, expires_at) = next(iter(_artifacts.items()))
+        if expires_at > now and len(_artifacts) <= AUDIO_ARTIFACT_MAX_ITEMS:
+            break
+        _artifacts.popitem(last=False)
+
+def _etag(audio):
+    return '"' + hashlib.sha256(audio).hexdigest()[:32] + '"'
+
+def put_artifact(audio: bytes) -> str:
+    artifact_id = secrets.token_urlsafe(16)
+    etag = _etag(audio)
+    now = time.monotonic()
+    with _lock:
+        _artifacts[artifact_id] = (audio, etag, now + AUDIO_ARTIFACT_TTL)
+        _purge_expired(now)
+    key = f"audio:{artifact_id}"
+    write_behind.put(key, key, audio, AUDIO_ARTIFACT_TTL)
+    return artifact_id
+
+def get_artifact(artifact_id):
+    now = time.monotonic()
+    with _lock:
+        _purge_expired(now)
+        artifact = _artifacts.get(artifact_id)
+    if artifact is None:
+        write_behind.flush(f"audio:{artifact_id}")
+        audio = state.get(f"audio:{artifact_id}")
+        return (audio, _etag(audio)) if audio is not None else None
+    return artifact[0], artifact[1]
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+def parse_range(range_header, size):
+    """
+    Parse a single "bytes=" range into an inclusive (start, end) pair.
+    Returns None for a malformed or unsupported (e.g. multi-part) range,
+    which the caller ignores and answers with the whole body, and raises
+    RangeNotSatisfiable for a valid range that lies outside the body.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    start_s, _, end_s = spec.strip().partition("-")
+    if not (start_s or end_s) or any(part and not part.isdigit() for part in (start_s, end_s)):
+        return None
+    if not start_s:
+        # Suffix range: the last N bytes
+        length = int(end_s)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    start = int(start_s)
+    end = int(end_s) if end_s else size - 1
+    if end_s and end < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
@@ -1,14 +1,146 @@
-import subprocess
+import asyncio
 import os
+import shutil
+import time
+from contextlib import nullcontext
+from utils.executors import run_in, subprocess_slot
+from utils.tracing import record_stage, audio_seconds
+from utils.vad import VAD_SAMPLE_RATE, VAD_MIN_SPEECH_MS, NoSpeechDetected, SpeechTrimmer
 
-def convert_webm_to_mp3(webm_path, mp3_path):
+# Containers AssemblyAI ingests as-is; uploading them untouched skips an ffmpeg pass
+STT_PASSTHROUGH_EXTENSIONS = {'.webm', '.ogg', '.mp3', '.m4a'}
+
+# Speech recognition only needs 16 kHz mono, so encode for that rather than music quality
+SPEECH_PROFILES = {
+    "opus": ["-ar", "16000", "-ac", "1", "-c:a", "libopus", "-b:a", "24k", "-application", "voip", "-f", "ogg"],
+    "mp3": ["-ar", "16000", "-ac", "1", "-c:a", "libmp3lame", "-b:a", "32k", "-f", "mp3"],
+    "pcm": ["-ar", "16000", "-ac", "1", "-f", "s16le"],
+}
+STT_SPEECH_PROFILE = os.getenv("STT_SPEECH_PROFILE", "opus")
+PIPE_CHUNK_SIZE = 64 * 1024
+PCM_INPUT = ["-f", "s16le", "-ar", str(VAD_SAMPLE_RATE), "-ac", "1"]
+# Decode, trim silence and re-encode uploads on their way to STT; needs ffmpeg
+STT_VAD = os.getenv("STT_VAD", "1") == "1" and shutil.which("ffmpeg") is not None
+
+class AudioConversionError(RuntimeError):
+    pass
+
+def needs_transcoding(file_ext):
+    return file_ext.lower() not in STT_PASSTHROUGH_EXTENSIONS
+
+async def transcode_stream(chunks, profile=STT_SPEECH_PROFILE, input_args=(), take_slot=True):
+    """
+    Pipe an async iterable of encoded audio bytes through ffmpeg stdin/stdout
+    and yield the re-encoded output as it is produced. No temp files are used.
+    `input_args` describe headerless input (e.g. PCM_INPUT); by default ffmpeg
+    probes the format. Requires ffmpeg to be installed and in PATH.
+    With take_slot, `chunks` is read to the end (at most MAX_UPLOAD_BYTES of
+    upload) before a slot is taken.
+    """
+    # The subprocess pool bounds how many ffmpeg processes run at once (FFMPEG_MAX_PROCESSES);
+    # the second stage of a pipeline runs under the first one's slot (take_slot=False)
+    if take_slot:
+        # A slow client must not hold a slot while it uploads
+        chunks = _single_chunk(b"".join([chunk async for chunk in chunks]))
+    busy = 0.0
+    async with subprocess_slot() if take_slot else nullcontext():
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-hide_banner", "-loglevel", "error", *input_args, "-i", "pipe:0", "-vn",
+            *SPEECH_PROFILES[profile], "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+        async def feed():
+            try:
+                async for chunk in chunks:
+                    process.stdin.write(chunk)
+                    await process.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                # ffmpeg bailed out early; its exit code and stderr tell us why
+                pass
+            finally:
+                process.stdin.close()
+
+        feeder = asyncio.create_task(feed())
+        stderr = asyncio.create_task(process.stderr.read())
+        try:
+            while True:
+                # Only time spent waiting on ffmpeg counts, not on whoever consumes its output
+                started = time.perf_counter()
+                data = await process.stdout.read(PIPE_CHUNK_SIZE)
+                busy += time.perf_counter() - started
+                if not data:
+                    break
+                yield data
+            started = time.perf_counter()
+            await feeder
+            returncode = await process.wait()
+            busy += time.perf_counter() - started
+            if returncode != 0:
+                raise AudioConversionError(f"ffmpeg error: {(await stderr).decode(errors='replace')}")
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            feeder.cancel()
+            stderr.cancel()
+            record_stage("ffmpeg", busy * 1000)
+
+async def _single_chunk(data):
+    yield data
+
+def prepare_stream_for_stt(chunks, file_ext):
+    # Containers AssemblyAI can't ingest flow through ffmpeg as they arrive; the rest pass through
+    if not needs_transcoding(file_ext):
+        return chunks
+    return transcode_stream(chunks)
+
+def _record_vad(trimmer):
+    record_stage("vad", trimmer.busy_ms)
+    audio_seconds.observe(trimmer.recorded_ms / 1000, "recorded")
+    audio_seconds.observe(trimmer.speech_ms / 1000, "speech")
+
+async def prepare_speech_for_stt(chunks, file_ext):
     """
-    Convert a .webm audio file to .mp3 using ffmpeg.
-    Requires ffmpeg to be installed and in PATH.
+    Decode the upload to 16 kHz PCM, cut silence and shorten long pauses with
+    the VAD, and return the remaining speech encoded for STT (as chunks, like
+    prepare_stream_for_stt). Once the upload has arrived, decoding, trimming
+    and encoding run as one pipeline; this returns once VAD_MIN_SPEECH_MS of
+    speech has been heard, or raises NoSpeechDetected if the recording ends
+    first, before anything is sent to the STT backend. With STT_VAD off the
+    upload goes through prepare_stream_for_stt untouched.
     """
-    result = subprocess.run([
-        "ffmpeg", "-y", "-i", webm_path, "-vn", "-ar", "44100", "-ac", "2", "-b:a", "192k", mp3_path
-    ], capture_output=True)
-    if result.returncode != 0:
-        raise RuntimeError(f"ffmpeg error: {result.stderr.decode()}")
-    return mp3_path
+    if not STT_VAD:
+        return prepare_stream_for_stt(chunks, file_ext)
+    decoded = transcode_stream(chunks, "pcm")
+    trimmer = SpeechTrimmer()
+    ahead = []
+    async for data in decoded:
+        ahead.append(await run_in("blocking", trimmer.feed, data))
+        if trimmer.speech_ms >= VAD_MIN_SPEECH_MS:
+            break
+    else:
+        _record_vad(trimmer)
+        raise NoSpeechDetected()
+
+    async def speech():
+        try:
+            for data in ahead:
+                if data:
+                    yield data
+            ahead.clear()
+            async for data in decoded:
+                kept = await run_in("blocking", trimmer.feed, data)
+                if kept:
+                    yield kept
+        finally:
+            # Stops the decoder (and frees its slot) if the STT upload is abandoned
+            await decoded.aclose()
+        trimmer.finish()
+        _record_vad(trimmer)
+        audio_seconds.observe(trimmer.kept_ms / 1000, "uploaded")
+
+    # Runs under the decoder's slot: waiting for a second slot while holding one could deadlock the pool
+    return transcode_stream(speech(), STT_SPEECH_PROFILE, input_args=PCM_INPUT, take_slot=False)
@@ -0,0 +1,159 @@
+import asyncio
+import functools
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from fastapi import HTTPException
+from utils.tracing import record_stage
+
+# How long a caller waits for a free worker before giving up with a 503
+EXECUTOR_QUEUE_TIMEOUT = float(os.getenv("EXECUTOR_QUEUE_TIMEOUT", "30"))
+STATS_WINDOW = 512
+
+class ExecutorBusy(HTTPException):
+    def __init__(self, pool_name):
+        super().__init__(503, detail=f"Server busy ({pool_name} pool is full), please retry.", headers={"Retry-After": "1"})
+
+def _percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+
+class WorkPool:
+    """
+    A named pool of `workers` with a bounded wait queue. At most `workers`
+    jobs run at once; up to `max_queue` more wait for a turn (for at most
+    EXECUTOR_QUEUE_TIMEOUT seconds), and anything beyond that is rejected
+    with ExecutorBusy so overload turns into fast 503s instead of an
+    ever-growing backlog.
+
+    kind is "thread" or "process" for pools that run functions via run(),
+    or "slots" for work the caller runs itself (e.g. subprocesses) under
+    `async with pool.slot():`.
+    """
+
+    def __init__(self, name, kind, workers, max_queue):
+        self.name = name
+        self.kind = kind
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = None
+        self._semaphore = None
+        self._loop = None
+        self.active = 0
+        self.queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self._wait_ms = deque(maxlen=STATS_WINDOW)
+        self._run_ms = deque(maxlen=STATS_WINDOW)
+
+    def _slots(self):
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.workers)
+            self._loop = loop
+        return self._semaphore
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+        return self._executor
+
+    @asynccontextmanager
+    async def slot(self):
+        semaphore = self._slots()
+        if semaphore.locked() and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise ExecutorBusy(self.name)
+        requested = time.perf_counter()
+        self.queued += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), EXECUTOR_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise ExecutorBusy(self.name)
+        finally:
+            self.queued -= 1
+        started = time.perf_counter()
+        wait_ms = (started - requested) * 1000
+        self._wait_ms.append(wait_ms)
+        if wait_ms >= 1:
+            # Only worth a stage of its own when the pool actually made the request wait
+            record_stage(f"{self.name}_queue", wait_ms)
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self.completed += 1
+            self._run_ms.append((time.perf_counter() - started) * 1000)
+            semaphore.release()
+
+    async def run(self, fn, *args, **kwargs):
+        async with self.slot():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), functools.partial(fn, *args, **kwargs))
+
+    def snapshot(self):
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_ms_p50": _percentile(self._wait_ms, 0.5),
+            "wait_ms_p95": _percentile(self._wait_ms, 0.95),
+            "wait_ms_max": round(max(self._wait_ms), 1) if self._wait_ms else None,
+            "run_ms_p50": _percentile(self._run_ms, 0.5),
+            "run_ms_p95": _percentile(self._run_ms, 0.95),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+# network:    LLM and TTS calls that mostly wait on a remote API
+# cpu:        pure-Python CPU work that would hold the GIL (PDF parsing), in worker processes
+# blocking:   disk I/O and NumPy analysis that touch in-process state
+# subprocess: concurrency limit for ffmpeg and other child processes
+_pools = {
+    "network": WorkPool(
+        "network", "thread",
+        int(os.getenv("EXECUTOR_NETWORK_WORKERS", "16")), int(os.getenv("EXECUTOR_NETWORK_QUEUE", "64")),
+    ),
+    "cpu": WorkPool(
+        "cpu", "process",
+        int(os.getenv("EXECUTOR_CPU_WORKERS", str(min(4, os.cpu_count() or 1)))), int(os.getenv("EXECUTOR_CPU_QUEUE", "32")),
+    ),
+    "blocking": WorkPool(
+        "blocking", "thread",
+        int(os.getenv("EXECUTOR_BLOCKING_WORKERS", "8")), int(os.getenv("EXECUTOR_BLOCKING_QUEUE", "64")),
+    ),
+    "subprocess": WorkPool(
+        "subprocess", "slots",
+        int(os.getenv("FFMPEG_MAX_PROCESSES", "4")), int(os.getenv("EXECUTOR_SUBPROCESS_QUEUE", "16")),
+    ),
+}
+
+async def run_in(pool_name, fn, *args, **kwargs):
+    """Run a blocking `fn(*args, **kwargs)` on the named pool and await its result."""
+    return await _pools[pool_name].run(fn, *args, **kwargs)
+
+def subprocess_slot():
+    return _pools["subprocess"].slot()
+
+def executor_stats():
+    return {name: pool.snapshot() for name, pool in _pools.items()}
+
+def shutdown_executors():
+    for pool in _pools.values():
+        pool.shutdown()
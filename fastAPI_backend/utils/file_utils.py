@@ -1,8 +1,4 @@
 from pathlib import Path
 
-DATABASE_FILE = Path('database.json')
+SESSIONS_DIR = Path("sessions")
 ALLOWED_AUDIO_EXTENSIONS = {'.mp3', '.wav', '.ogg', '.m4a', '.webm'}
-DIFFICULTY_FILE = Path("difficulty.txt")
-POSITION_FILE = Path("position.txt")
-ASSEMBLYAI_ANALYSIS_FILE = Path("assemblyai_analysis.pkl")
-INTERVIEW_TYPE_FILE = Path("interview_type.txt")
\ No newline at end of file
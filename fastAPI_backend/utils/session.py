@@ -0,0 +1,67 @@
+import os
+import re
+import uuid
+from typing import Optional
+from fastapi import Header, Query
+from starlette.requests import HTTPConnection
+
+DEFAULT_SESSION_ID = "default"
+SESSION_COOKIE = "session_id"
+SESSION_COOKIE_MAX_AGE = int(os.getenv("SESSION_COOKIE_MAX_AGE", str(30 * 24 * 3600)))
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_-]")
+
+def normalize_session_id(value):
+    # Session ids double as state keys, so keep them short and path-safe. Returns None
+    # for an id with nothing usable left (or the shared default's), which counts as no id
+    value = _UNSAFE_CHARS.sub("", value or "")[:64]
+    return value if value and value != DEFAULT_SESSION_ID else None
+
+def get_session_id(
+    connection: HTTPConnection,
+    x_session_id: Optional[str] = Header(None),
+    session_id: Optional[str] = Query(None),
+):
+    """
+    Resolve the interview session from the X-Session-Id header, a
+    ?session_id= query parameter (for clients that cannot set headers) or
+    the session cookie. A client with none of them (or only unusable ones)
+    gets a new session, and SessionCookieMiddleware hands it the cookie for
+    its next requests.
+    """
+    for value in (x_session_id, session_id, connection.cookies.get(SESSION_COOKIE)):
+        value = normalize_session_id(value)
+        if value:
+            return value
+    state = connection.scope.setdefault("state", {})
+    return state.setdefault("issued_session_id", uuid.uuid4().hex)
+
+def session_cookie(session_id):
+    """The Set-Cookie header handing a client its session."""
+    cookie = f"{SESSION_COOKIE}={session_id}; Max-Age={SESSION_COOKIE_MAX_AGE}; Path=/; HttpOnly; SameSite=Lax"
+    return (b"set-cookie", cookie.encode())
+
+def issued_session_id(connection: HTTPConnection):
+    """The session get_session_id issued for this connection, or None if the client sent one."""
+    return connection.scope.get("state", {}).get("issued_session_id")
+
+class SessionCookieMiddleware:
+    """
+    Sets the session cookie on responses to requests that were given a new
+    session. HTTP only: WebSocket routes send it with their handshake.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            issued = scope.get("state", {}).get("issued_session_id")
+            if message["type"] == "http.response.start" and issued:
+                message["headers"] = list(message.get("headers", [])) + [session_cookie(issued)]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
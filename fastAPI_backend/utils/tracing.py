@@ -0,0 +1,158 @@
+import contextvars
+import os
+import threading
+import time
+from collections import defaultdict
+
+# Log a per-stage breakdown of any request slower than this (0 disables)
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_current_trace = contextvars.ContextVar("trace", default=None)
+
+def _labels(pairs, *extra):
+    return "{" + ",".join([*pairs, *extra]) + "}"
+
+class Histogram:
+    """A Prometheus histogram with a fixed label set, rendered in the text exposition format."""
+
+    def __init__(self, name, help_text, labelnames, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                pairs = [f'{k}="{v}"' for k, v in zip(self.labelnames, labels)]
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    le = f'le="{bound}"'
+                    lines.append(f"{self.name}_bucket{_labels(pairs, le)} {count}")
+                le = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_labels(pairs, le)} {series['count']}")
+                lines.append(f"{self.name}_sum{_labels(pairs)} {series['sum']:.6f}")
+                lines.append(f"{self.name}_count{_labels(pairs)} {series['count']}")
+        return "\n".join(lines)
+
+request_seconds = Histogram(
+    "interview_request_duration_seconds", "HTTP request latency by route.", ("method", "route", "status"),
+)
+stage_seconds = Histogram(
+    "interview_stage_duration_seconds", "Latency of each stage of a request (STT, LLM, TTS, ...).", ("stage",),
+)
+audio_seconds = Histogram(
+    "interview_audio_duration_seconds",
+    "Length of uploaded answers: as recorded, detected speech, and what was sent to STT after trimming.", ("kind",),
+    buckets=(1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0, 600.0),
+)
+prompt_tokens = Histogram(
+    "interview_prompt_tokens",
+    "Estimated tokens per interview prompt: the whole prompt, and the turns in it sent verbatim.", ("part",),
+    buckets=(100, 250, 500, 1000, 2000, 3000, 4000, 6000, 8000),
+)
+
+class Trace:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = defaultdict(float)
+
+    def server_timing(self):
+        parts = [f"{name};dur={ms:.1f}" for name, ms in self.stages.items()]
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+def record_stage(name, ms):
+    """Record `ms` spent in stage `name` for the current request (and the stage histogram)."""
+    stage_seconds.observe(ms / 1000, name)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.stages[name] += ms
+
+class stage:
+    """
+    Time a block as one stage of the current request, e.g.
+    `with stage("llm"): ...` or `async with stage("stt_wait"): ...`.
+    Repeated stages within a request add up.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record_stage(self.name, (time.perf_counter() - self.started) * 1000)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *exc):
+        return self.__exit__(*exc)
+
+class TracingMiddleware:
+    """
+    Starts a trace for every HTTP request, adds a Server-Timing header with
+    the stages finished before the response started, and records the request
+    in the latency histogram once the body is sent. Streaming responses keep
+    recording stages after the header is out; those only reach /metrics and
+    the slow-request log.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trace = Trace()
+        token = _current_trace.set(trace)
+        status = 500
+        finished = False
+
+        def finish():
+            nonlocal finished
+            finished = True
+            total_ms = (time.perf_counter() - trace.started) * 1000
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            request_seconds.observe(total_ms / 1000, scope["method"], route, str(status))
+            if SLOW_REQUEST_MS and total_ms >= SLOW_REQUEST_MS:
+                breakdown = ", ".join(f"{name}={ms:.0f}ms" for name, ms in sorted(trace.stages.items(), key=lambda s: -s[1]))
+                print(f"Slow request: {scope['method']} {scope['path']} -> {status} in {total_ms:.0f} ms ({breakdown or 'no stages'})")
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", trace.server_timing().encode())]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False) and not finished:
+                finish()
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            if not finished:
+                finish()
+            _current_trace.reset(token)
+
+def render_metrics():
+    return "\n".join(h.render() for h in (request_seconds, stage_seconds, audio_seconds, prompt_tokens)) + "\n"
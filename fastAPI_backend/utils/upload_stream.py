@@ -0,0 +1,151 @@
+import os
+from pathlib import Path
+from fastapi import HTTPException, Request
+from multipart.multipart import MultipartParser, parse_options_header
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+CONTENT_TYPE_EXTENSIONS = {
+    "audio/webm": ".webm",
+    "audio/ogg": ".ogg",
+    "audio/mpeg": ".mp3",
+    "audio/mp3": ".mp3",
+    "audio/wav": ".wav",
+    "audio/x-wav": ".wav",
+    "audio/mp4": ".m4a",
+    "audio/x-m4a": ".m4a",
+}
+
+class AudioUploadStream:
+    """
+    Streams an uploaded recording straight off the request body, without
+    UploadFile spooling it to memory or a temp file first. Accepts either a
+    multipart form with a "file" part (what the frontend's FormData sends) or
+    a raw audio body. Call open() to read up to the file headers, then iterate
+    chunks() to get the audio bytes as they arrive.
+    """
+
+    def __init__(self, request: Request, field_name="file", max_bytes=MAX_UPLOAD_BYTES, default_ext=".webm"):
+        self.request = request
+        self.field_name = field_name
+        self.max_bytes = max_bytes
+        self.filename = None
+        self.file_ext = default_ext
+        self.bytes_received = 0
+        self._events = None
+
+    async def open(self):
+        content_length = self.request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            raise HTTPException(413, detail="Audio upload is too large")
+        content_type, params = parse_options_header(self.request.headers.get("content-type", ""))
+        content_type = content_type.decode("latin-1")
+        if content_type == "multipart/form-data":
+            boundary = params.get(b"boundary")
+            if not boundary:
+                raise HTTPException(400, detail="Missing multipart boundary")
+            self._events = self._multipart_events(boundary)
+            # Advance to the audio part so filename/extension are known before any data is read
+            async for kind, value in self._events:
+                if kind == "file":
+                    self.filename = value
+                    break
+            else:
+                raise HTTPException(400, detail=f"Missing '{self.field_name}' upload")
+        else:
+            self.filename = self.request.headers.get("x-audio-filename")
+            self._events = self._raw_events()
+            if not self.filename and content_type in CONTENT_TYPE_EXTENSIONS:
+                self.file_ext = CONTENT_TYPE_EXTENSIONS[content_type]
+        if self.filename and Path(self.filename).suffix:
+            self.file_ext = Path(self.filename).suffix.lower()
+        return self
+
+    async def chunks(self):
+        async for kind, value in self._events:
+            if kind == "end":
+                return
+            if kind == "data":
+                self.bytes_received += len(value)
+                if self.bytes_received > self.max_bytes:
+                    raise HTTPException(413, detail="Audio upload is too large")
+                yield value
+
+    async def _raw_events(self):
+        async for chunk in self.request.stream():
+            if chunk:
+                yield "data", chunk
+        yield "end", None
+
+    async def _multipart_events(self, boundary):
+        events = []
+        header_field = bytearray()
+        header_value = bytearray()
+        headers = {}
+        state = {"in_file": False}
+
+        def on_part_begin():
+            headers.clear()
+
+        def on_header_field(data, start, end):
+            header_field.extend(data[start:end])
+
+        def on_header_value(data, start, end):
+            header_value.extend(data[start:end])
+
+        def on_header_end():
+            headers[bytes(header_field).lower()] = bytes(header_value)
+            header_field.clear()
+            header_value.clear()
+
+        def on_headers_finished():
+            _, options = parse_options_header(headers.get(b"content-disposition", b""))
+            name = options.get(b"name", b"").decode("latin-1")
+            state["in_file"] = name == self.field_name
+            if state["in_file"]:
+                events.append(("file", options.get(b"filename", b"").decode("utf-8", "replace")))
+
+        def on_part_data(data, start, end):
+            if state["in_file"]:
+                events.append(("data", bytes(data[start:end])))
+
+        def on_part_end():
+            if state["in_file"]:
+                events.append(("end", None))
+                state["in_file"] = False
+
+        parser = MultipartParser(boundary, {
+            "on_part_begin": on_part_begin,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+        })
+        async for chunk in self.request.stream():
+            parser.write(chunk)
+            # Hand over whatever this network chunk produced; memory stays at one chunk
+            while events:
+                yield events.pop(0)
+        parser.finalize()
+        while events:
+            yield events.pop(0)
+
+async def _chain(first, rest):
+    yield first
+    async for chunk in rest:
+        yield chunk
+
+async def open_audio_stream(request: Request, allowed_extensions=None):
+    """
+    Open the request's audio upload and return (file_ext, chunks). Empty
+    recordings are rejected here, before anything is sent to the STT backend.
+    """
+    upload = await AudioUploadStream(request).open()
+    if allowed_extensions is not None and upload.file_ext not in allowed_extensions:
+        raise HTTPException(400, detail="Unsupported audio format")
+    chunks = upload.chunks()
+    first = await anext(chunks, None)
+    if not first:
+        raise HTTPException(400, detail="Uploaded audio file is empty. Please try recording again.")
+    return upload.file_ext, _chain(first, chunks)
@@ -0,0 +1,129 @@
+import os
+import time
+from collections import deque
+import numpy as np
+from fastapi import HTTPException
+from services.speech_metrics import LONG_PAUSE_MS
+
+# Energy-based voice activity detection on 16 kHz mono 16-bit PCM
+VAD_SAMPLE_RATE = 16000
+VAD_FRAME_MS = 30
+# A frame is speech when it is this many dB above the noise floor
+VAD_MARGIN_DB = float(os.getenv("VAD_MARGIN_DB", "12"))
+# The noise floor is the 10th percentile of frame levels over this much of the
+# latest audio, updated once per chunk fed
+VAD_FLOOR_WINDOW_MS = int(os.getenv("VAD_FLOOR_WINDOW_MS", "3000"))
+# The noise floor is never taken to be louder than this, so a recording with
+# no silence in it at all still counts as speech
+VAD_NOISE_CEILING_DB = -40.0
+# Silence kept on either side of speech
+VAD_PAD_MS = int(os.getenv("VAD_PAD_MS", "200"))
+# Pauses are shortened to this. It stays above LONG_PAUSE_MS so long pauses
+# still count as long in the speech features.
+VAD_MAX_PAUSE_MS = int(os.getenv("VAD_MAX_PAUSE_MS", str(LONG_PAUSE_MS + 250)))
+# Recordings with less speech than this are rejected
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "300"))
+# Bursts shorter than this (clicks, bumps) are not speech
+VAD_MIN_BURST_MS = 60
+
+class NoSpeechDetected(HTTPException):
+    def __init__(self):
+        super().__init__(400, detail="No speech detected in the recording. Please try again.")
+
+class SpeechTrimmer:
+    """
+    Cuts leading and trailing silence and shortens long pauses in 16 kHz
+    mono s16le audio, frame by frame as it is decoded. feed() returns the
+    audio that is certain to be kept so far; at most one pause
+    (VAD_MAX_PAUSE_MS plus padding) is held back while waiting to see
+    whether speech follows it, so memory stays constant however long the
+    recording is.
+    """
+
+    def __init__(self):
+        self.frame_bytes = VAD_SAMPLE_RATE * VAD_FRAME_MS // 1000 * 2
+        self.pad = VAD_PAD_MS // VAD_FRAME_MS
+        # Every pause inside the answer keeps up to VAD_MAX_PAUSE_MS, counting the padding
+        self.retain = max(0, VAD_MAX_PAUSE_MS // VAD_FRAME_MS - 2 * self.pad)
+        self.min_burst = max(1, VAD_MIN_BURST_MS // VAD_FRAME_MS)
+        self._partial = b""
+        self._levels = deque(maxlen=max(1, VAD_FLOOR_WINDOW_MS // VAD_FRAME_MS))
+        # Loud frames not yet long enough to count as speech
+        self._candidate = []
+        self._in_speech = False
+        self._heard_speech = False
+        # Frames since speech last stopped; the first `pad` of them are kept outright
+        self._silence = 0
+        # The start and the end of the current pause; the middle is dropped
+        self._held_head = []
+        self._held_tail = deque(maxlen=self.pad)
+        self.recorded_ms = 0
+        self.speech_ms = 0
+        self.kept_ms = 0
+        # Time spent in feed(), for the request's "vad" stage
+        self.busy_ms = 0.0
+
+    def _silent_frame(self, frame, out):
+        self._in_speech = False
+        if self._heard_speech and self._silence < self.pad:
+            out.append(frame)
+        elif self._heard_speech and len(self._held_head) < self.retain // 2:
+            self._held_head.append(frame)
+        else:
+            self._held_tail.append(frame)
+        self._silence += 1
+
+    def _speech(self, frames, out):
+        # Speech goes on: the pause before it is kept (shortened)
+        out.extend(self._held_head)
+        out.extend(self._held_tail)
+        out.extend(frames)
+        self._held_head = []
+        self._held_tail = deque(maxlen=self.pad + self.retain - self.retain // 2)
+        self._silence = 0
+        self._in_speech = self._heard_speech = True
+        self.speech_ms += len(frames) * VAD_FRAME_MS
+
+    def _frame(self, frame, loud, out):
+        if not loud:
+            # A burst too short to be speech was silence after all
+            for held in self._candidate:
+                self._silent_frame(held, out)
+            self._candidate = []
+            self._silent_frame(frame, out)
+        elif self._in_speech:
+            self._speech([frame], out)
+        else:
+            self._candidate.append(frame)
+            if len(self._candidate) >= self.min_burst:
+                self._speech(self._candidate, out)
+                self._candidate = []
+
+    def feed(self, pcm: bytes) -> bytes:
+        started = time.perf_counter()
+        data = self._partial + pcm
+        count = len(data) // self.frame_bytes
+        self._partial = data[count * self.frame_bytes:]
+        if not count:
+            return b""
+        frames = np.frombuffer(data[:count * self.frame_bytes], dtype="<i2").astype(np.float32)
+        frames = frames.reshape(count, -1) / 32768.0
+        levels = 20 * np.log10(np.maximum(np.sqrt(np.mean(frames ** 2, axis=1)), 1e-6))
+        self._levels.extend(levels.tolist())
+        floor = min(float(np.percentile(self._levels, 10)), VAD_NOISE_CEILING_DB)
+        loud = levels > floor + VAD_MARGIN_DB
+        out = []
+        # Only the keep/drop decisions go frame by frame
+        for i in range(count):
+            self._frame(data[i * self.frame_bytes:(i + 1) * self.frame_bytes], loud[i], out)
+        self.recorded_ms += count * VAD_FRAME_MS
+        self.kept_ms += len(out) * VAD_FRAME_MS
+        self.busy_ms += (time.perf_counter() - started) * 1000
+        return b"".join(out)
+
+    def finish(self):
+        # Whatever is still held back is trailing silence (or a last click): drop it
+        self._candidate = []
+        self._held_head = []
+        self._held_tail.clear()
+        self._partial = b""
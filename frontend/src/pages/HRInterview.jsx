@@ -105,6 +105,7 @@ export default function HRInterview() {
             try {
               const res = await fetch('http://localhost:8000/hr_interview/voice_answer', {
                 method: 'POST',
+                credentials: 'include',
                 body: formData,
               });
               if (!res.ok) throw new Error('Failed to transcribe audio');
@@ -141,6 +142,7 @@ export default function HRInterview() {
     try {
       const res = await fetch("http://localhost:8000/hr_interview/start", {
         method: "POST",
+        credentials: 'include',
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ company, role }),
       });
@@ -165,6 +167,7 @@ export default function HRInterview() {
     try {
       const res = await fetch('http://localhost:8000/tts', {
         method: 'POST',
+        credentials: 'include',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ text }),
       });
@@ -187,6 +190,7 @@ export default function HRInterview() {
     try {
       const res = await fetch("http://localhost:8000/hr_interview/answer", {
         method: "POST",
+        credentials: 'include',
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ answer: userInput, company, role }),
       });
@@ -227,6 +231,7 @@ export default function HRInterview() {
     try {
       const res = await fetch("http://localhost:8000/hr_interview/feedback", {
         method: "POST",
+        credentials: 'include',
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ company, role }),
       });
@@ -161,12 +161,13 @@ const TechnicalInterview = () => {
       formData.append('file', audioBlob, 'answer.webm');
       const response = await fetch('http://localhost:8000/talk', {
         method: 'POST',
+        credentials: 'include',
         body: formData,
       });
       if (!response.ok) throw new Error('Failed to get next question');
       const data = await response.json();
       try {
-        const transcriptRes = await fetch('http://localhost:8000/last_transcript');
+        const transcriptRes = await fetch('http://localhost:8000/last_transcript', { credentials: 'include' });
         if (transcriptRes.ok) {
           const transcriptData = await transcriptRes.json();
           if (transcriptData.transcript && transcriptData.transcript.trim()) {
@@ -203,6 +204,7 @@ const TechnicalInterview = () => {
     try {
       const response = await fetch('http://localhost:8000/talk_text_full', {
         method: 'POST',
+        credentials: 'include',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ answer: textAnswer })
       });
@@ -299,7 +301,7 @@ const TechnicalInterview = () => {
   const handleEndInterview = async () => {
     setLoading(true);
     try {
-      await fetch('http://localhost:8000/end_interview', { method: 'POST' });
+      await fetch('http://localhost:8000/end_interview', { method: 'POST', credentials: 'include' });
       setInterviewEnded(true);
       const feedbackRes = await fastAPIService.getFeedback();
       setFeedback(feedbackRes.data.feedback);
@@ -3,6 +3,9 @@ import axios from 'axios';
 const API_URL = 'http://localhost:4000';
 const FASTAPI_URL = 'http://localhost:8000';
 
+// The interview API keeps each candidate's session in a cookie, so send it along
+const fastapi = axios.create({ withCredentials: true });
+
 // Create axios instance with default config
 const api = axios.create({
   baseURL: API_URL,
@@ -121,17 +124,17 @@ export const userService = {
 export const fastAPIService = {
   // Interview related
   setInterviewType: async (type) => {
-    const response = await axios.post(`${FASTAPI_URL}/set_interview_type`, { interview_type: type });
+    const response = await fastapi.post(`${FASTAPI_URL}/set_interview_type`, { interview_type: type });
     return response.data;
   },
 
   setDifficulty: async (difficulty) => {
-    const response = await axios.post(`${FASTAPI_URL}/set_difficulty`, { difficulty });
+    const response = await fastapi.post(`${FASTAPI_URL}/set_difficulty`, { difficulty });
     return response.data;
   },
 
   setPosition: async (position) => {
-    const response = await axios.post(`${FASTAPI_URL}/set_position`, { position });
+    const response = await fastapi.post(`${FASTAPI_URL}/set_position`, { position });
     return response.data;
   },
 
@@ -140,7 +143,7 @@ export const fastAPIService = {
     const formData = new FormData();
     formData.append('file', file);
 
-    const response = await axios.post(`${FASTAPI_URL}/analyze_resume`, formData, {
+    const response = await fastapi.post(`${FASTAPI_URL}/analyze_resume`, formData, {
       headers: {
         'Content-Type': 'multipart/form-data',
       },
@@ -150,19 +153,19 @@ export const fastAPIService = {
 
   getFirstQuestion: async () => {
     // Fetch the introduction audio from /first_question
-    const response = await axios.get(`${FASTAPI_URL}/first_question`, {
+    const response = await fastapi.get(`${FASTAPI_URL}/first_question`, {
       responseType: 'arraybuffer', // Expect audio response
     });
     return response;
   },
 
   getFeedback: async () => {
-    const response = await axios.get(`${FASTAPI_URL}/feedback`);
+    const response = await fastapi.get(`${FASTAPI_URL}/feedback`);
     return response;
   },
 
   getFeedbackHeatmap: async () => {
-    const response = await axios.get(`${FASTAPI_URL}/feedback_heatmap`);
+    const response = await fastapi.get(`${FASTAPI_URL}/feedback_heatmap`);
     return response;
   },
 };